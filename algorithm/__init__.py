@@ -0,0 +1,8 @@
+"""
+Algorithmes de tri et de remplissage automatique du planning.
+"""
+from .scheduler import (
+    DEFAULT_TIME_BUDGET, SchedulingProblem, ScheduleResult, AutoScheduler, auto_fill
+)
+
+__all__ = ['DEFAULT_TIME_BUDGET', 'SchedulingProblem', 'ScheduleResult', 'AutoScheduler', 'auto_fill']
@@ -0,0 +1,275 @@
+"""
+Remplissage automatique du planning (salles × jours).
+
+Le moteur ne dépend ni de Flask ni de SQLite : l'API construit un SchedulingProblem
+à partir de la base (infirmiers présents, compteurs de statistique, cases déjà
+occupées ou fermées) puis écrit le résultat avec le chemin d'écriture habituel.
+
+Objectif minimisé (équilibrage de la charge) :
+    somme sur (infirmier, salle) de count² + load_weight × somme sur infirmier de total²
+où count part des compteurs de statistique. Ajouter ou retirer une affectation ne
+modifie que deux termes : chaque mouvement est évalué en O(1) sans recalculer le plan.
+
+Déroulement :
+    1. construction gloutonne jour par jour (case la plus contrainte d'abord,
+       infirmier dont l'ajout coûte le moins)
+    2. recherche locale jusqu'à épuisement du budget de temps : remplacement d'un
+       infirmier par un infirmier libre ce jour-là, ou échange de deux salles le
+       même jour ; seuls les mouvements qui diminuent le score sont acceptés.
+       Elle s'arrête plus tôt après une série de mouvements sans amélioration
+       (plan localement optimal, ou aucun mouvement possible)
+"""
+import random
+import time
+
+# Budget de temps par défaut de la recherche locale (secondes)
+DEFAULT_TIME_BUDGET = 2.0
+
+# Nombre de tirages pour trouver un infirmier libre lors d'un remplacement
+REPLACE_SAMPLES = 8
+
+# Arrêt de la recherche locale après max(STALL_MIN_ITERATIONS, STALL_FACTOR × cases)
+# mouvements consécutifs sans amélioration
+STALL_MIN_ITERATIONS = 2000
+STALL_FACTOR = 4
+
+
+class SchedulingProblem:
+    """
+    Données d'entrée du remplissage.
+
+    - dates: jours à remplir (ordre conservé)
+    - rooms: noms des salles
+    - nurses: [(id, status)] des infirmiers disponibles (présents)
+    - counts: {(id, salle): nombre} compteurs existants (statistique)
+    - open_cells: {date: [salles à remplir]} (cases vides et ni fermées ni inutilisées)
+    - busy: {date: {ids déjà affectés ce jour-là}} (affectations conservées)
+    - status_rooms: {status: [salles autorisées]}; un statut absent de la table
+      (ou une table vide) autorise toutes les salles
+    """
+    def __init__(self, dates, rooms, nurses, counts=None, open_cells=None, busy=None,
+                 status_rooms=None, load_weight=1.0):
+        self.dates = list(dates)
+        self.rooms = list(rooms)
+        self.nurses = list(nurses)
+        self.counts = dict(counts or {})
+        self.open_cells = {date: list(cells) for date, cells in (open_cells or {}).items()}
+        self.busy = {date: set(ids) for date, ids in (busy or {}).items()}
+        self.status_rooms = dict(status_rooms or {})
+        self.load_weight = float(load_weight)
+
+    def is_eligible(self, status, room):
+        allowed = self.status_rooms.get(status)
+        return allowed is None or room in allowed
+
+
+class ScheduleResult:
+    """
+    Résultat du remplissage
+    """
+    def __init__(self, assignments, unfilled, score, initial_score, iterations, improvements, elapsed):
+        self.assignments = assignments  # [(date, salle, infirmier_id)]
+        self.unfilled = unfilled        # [(date, salle)] faute d'infirmier disponible
+        self.score = score
+        self.initial_score = initial_score
+        self.iterations = iterations
+        self.improvements = improvements
+        self.elapsed = elapsed
+
+    def to_dict(self):
+        return {
+            'assignments': [
+                {'date': date, 'salle': room, 'infirmier_id': nurse_id}
+                for date, room, nurse_id in self.assignments
+            ],
+            'unfilled': [{'date': date, 'salle': room} for date, room in self.unfilled],
+            'score': self.score,
+            'initial_score': self.initial_score,
+            'iterations': self.iterations,
+            'improvements': self.improvements,
+            'elapsed_ms': round(self.elapsed * 1000, 1),
+        }
+
+
+class AutoScheduler:
+    """
+    Remplit les cases ouvertes d'un SchedulingProblem en équilibrant la charge
+    """
+    def __init__(self, problem, seed=None):
+        self.problem = problem
+        self.random = random.Random(seed)
+
+        rooms = problem.rooms
+        self.nurse_ids = [nurse_id for nurse_id, _ in problem.nurses]
+        # Compteurs indexés (infirmier, salle) et totaux par infirmier
+        self.count = [[problem.counts.get((nurse_id, room), 0) for room in rooms]
+                      for nurse_id in self.nurse_ids]
+        self.total = [sum(row) for row in self.count]
+        self.eligible = [
+            [n for n, (_, status) in enumerate(problem.nurses) if problem.is_eligible(status, room)]
+            for room in rooms
+        ]
+        self.eligible_sets = [set(nurses) for nurses in self.eligible]
+
+        index_of_nurse = {nurse_id: n for n, nurse_id in enumerate(self.nurse_ids)}
+        index_of_room = {room: r for r, room in enumerate(rooms)}
+        # Cases à remplir par jour: [(d, r)] et occupation courante
+        self.cells = []
+        self.day_nurses = []
+        for d, date in enumerate(problem.dates):
+            busy = {index_of_nurse[nurse_id] for nurse_id in problem.busy.get(date, ())
+                    if nurse_id in index_of_nurse}
+            self.day_nurses.append(busy)
+            for room in problem.open_cells.get(date, ()):
+                if room in index_of_room:
+                    self.cells.append((d, index_of_room[room]))
+        self.assigned = {}
+
+    # ---- Score incrémental ----
+
+    def add_cost(self, n, r):
+        """Variation du score si l'infirmier n reçoit une affectation en salle r"""
+        return 2 * self.count[n][r] + 1 + self.problem.load_weight * (2 * self.total[n] + 1)
+
+    def remove_cost(self, n, r):
+        """Variation du score si l'infirmier n perd une affectation en salle r"""
+        return -(2 * self.count[n][r] - 1) - self.problem.load_weight * (2 * self.total[n] - 1)
+
+    def swap_cost(self, a, b, r1, r2):
+        """Variation du score si a passe de la salle r1 à r2 et b de r2 à r1 (même jour)"""
+        # Les totaux ne changent pas, seuls quatre compteurs de salle bougent
+        return (2 * (self.count[a][r2] - self.count[a][r1]) + 2
+                + 2 * (self.count[b][r1] - self.count[b][r2]) + 2)
+
+    def score(self):
+        weight = self.problem.load_weight
+        return (sum(c * c for row in self.count for c in row)
+                + weight * sum(t * t for t in self.total))
+
+    def _place(self, cell, n):
+        d, r = cell
+        self.assigned[cell] = n
+        self.day_nurses[d].add(n)
+        self.count[n][r] += 1
+        self.total[n] += 1
+
+    def _unplace(self, cell):
+        d, r = cell
+        n = self.assigned.pop(cell)
+        self.day_nurses[d].discard(n)
+        self.count[n][r] -= 1
+        self.total[n] -= 1
+        return n
+
+    # ---- Construction gloutonne ----
+
+    def construct(self):
+        by_day = {}
+        for cell in self.cells:
+            by_day.setdefault(cell[0], []).append(cell)
+        for d in sorted(by_day):
+            # Salles les plus contraintes (moins d'infirmiers éligibles) d'abord
+            for cell in sorted(by_day[d], key=lambda c: len(self.eligible[c[1]])):
+                r = cell[1]
+                busy = self.day_nurses[d]
+                best = None
+                best_cost = None
+                for n in self.eligible[r]:
+                    if n in busy:
+                        continue
+                    cost = self.add_cost(n, r)
+                    if best_cost is None or cost < best_cost:
+                        best, best_cost = n, cost
+                if best is not None:
+                    self._place(cell, best)
+
+    # ---- Recherche locale ----
+
+    def _try_replace(self, cell):
+        d, r = cell
+        n = self.assigned[cell]
+        candidates = self.eligible[r]
+        busy = self.day_nurses[d]
+        removal = self.remove_cost(n, r)
+        for _ in range(REPLACE_SAMPLES):
+            m = candidates[self.random.randrange(len(candidates))]
+            if m in busy:
+                continue
+            # n et m sont distincts: les deux variations sont indépendantes
+            if removal + self.add_cost(m, r) < 0:
+                self._unplace(cell)
+                self._place(cell, m)
+                return True
+            return False
+        return False
+
+    def _try_swap(self, cell, other):
+        (d, r1), (_, r2) = cell, other
+        a = self.assigned[cell]
+        b = self.assigned[other]
+        if r1 == r2 or a not in self.eligible_sets[r2] or b not in self.eligible_sets[r1]:
+            return False
+        if self.swap_cost(a, b, r1, r2) < 0:
+            self.count[a][r1] -= 1
+            self.count[a][r2] += 1
+            self.count[b][r2] -= 1
+            self.count[b][r1] += 1
+            self.assigned[cell] = b
+            self.assigned[other] = a
+            return True
+        return False
+
+    def improve(self, deadline):
+        filled = list(self.assigned)
+        by_day = {}
+        for cell in filled:
+            by_day.setdefault(cell[0], []).append(cell)
+        iterations = improvements = 0
+        if not filled:
+            return iterations, improvements
+        rand = self.random
+        stall_limit = max(STALL_MIN_ITERATIONS, STALL_FACTOR * len(filled))
+        stalled = 0
+        while stalled < stall_limit:
+            # Vérifier l'horloge par paquets pour limiter le surcoût
+            if iterations % 256 == 0 and time.perf_counter() >= deadline:
+                break
+            iterations += 1
+            cell = filled[rand.randrange(len(filled))]
+            if rand.random() < 0.5:
+                improved = self._try_replace(cell)
+            else:
+                same_day = by_day[cell[0]]
+                improved = self._try_swap(cell, same_day[rand.randrange(len(same_day))])
+            if improved:
+                improvements += 1
+                stalled = 0
+            else:
+                stalled += 1
+        return iterations, improvements
+
+    def run(self, time_budget=DEFAULT_TIME_BUDGET):
+        start = time.perf_counter()
+        self.construct()
+        initial_score = self.score()
+        iterations, improvements = self.improve(start + max(0.0, time_budget))
+
+        problem = self.problem
+        assignments = []
+        unfilled = []
+        for cell in self.cells:
+            d, r = cell
+            n = self.assigned.get(cell)
+            if n is None:
+                unfilled.append((problem.dates[d], problem.rooms[r]))
+            else:
+                assignments.append((problem.dates[d], problem.rooms[r], self.nurse_ids[n]))
+        return ScheduleResult(assignments, unfilled, self.score(), initial_score,
+                              iterations, improvements, time.perf_counter() - start)
+
+
+def auto_fill(problem, time_budget=DEFAULT_TIME_BUDGET, seed=None):
+    """
+    Remplit le problème et retourne un ScheduleResult
+    """
+    return AutoScheduler(problem, seed=seed).run(time_budget)
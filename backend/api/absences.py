@@ -0,0 +1,148 @@
+"""
+Calendrier des absences et disponibilité des infirmiers à une date ou sur une période.
+
+Une absence couvre [start_date, end_date], bornes incluses (migration 0010). Toutes les
+recherches portent sur le chevauchement avec une période [debut, fin] :
+    end_date >= debut AND start_date <= fin
+Les index de la migration commencent par end_date (après infirmier_id pour un seul
+infirmier) : seules les absences non terminées à debut sont lues, jamais l'historique.
+
+Un infirmier est indisponible s'il a une absence chevauchant la période ou si
+listeInfirmier.present vaut 0 (indicateur manuel, sans dates).
+"""
+from datetime import date as Date, timedelta
+
+from label_index import format_label, label_index
+
+# Période maximale d'une requête de disponibilité
+MAX_AVAILABLE_DAYS = 366
+
+ABSENCE_COLUMNS = 'id, infirmier_id, start_date, end_date, reason'
+
+
+class AbsenceError(ValueError):
+    """
+    Absence invalide (dates manquantes ou inversées)
+    """
+
+
+def absence_dict(row):
+    return {
+        'id': row['id'],
+        'infirmier_id': row['infirmier_id'],
+        'from': row['start_date'],
+        'to': row['end_date'],
+        'reason': row['reason'],
+    }
+
+
+def validate_period(debut, fin):
+    """
+    Vérifie une période 'YYYY-MM-DD' et retourne le nombre de jours qu'elle couvre
+    """
+    if not debut or not fin:
+        raise AbsenceError('Les dates de début et de fin sont requises')
+    try:
+        span = (Date.fromisoformat(fin) - Date.fromisoformat(debut)).days
+    except ValueError:
+        raise AbsenceError('Format de date invalide (YYYY-MM-DD attendu)')
+    if span < 0:
+        raise AbsenceError('La date de début doit précéder la date de fin')
+    return span + 1
+
+
+def find_absence(conn, infirmier_id, debut, fin=None):
+    """
+    Première absence de l'infirmier chevauchant [debut, fin] (le seul jour debut si
+    fin est omis), ou None
+    """
+    if infirmier_id is None:
+        return None
+    row = conn.execute(
+        f'SELECT {ABSENCE_COLUMNS} FROM absence '
+        'WHERE infirmier_id = ? AND end_date >= ? AND start_date <= ? '
+        'ORDER BY end_date LIMIT 1',
+        (infirmier_id, debut, fin or debut)
+    ).fetchone()
+    return absence_dict(row) if row else None
+
+
+def absences_between(conn, debut=None, fin=None, infirmier_id=None):
+    """
+    Absences chevauchant [debut, fin] (bornes facultatives), triées par date de début
+    """
+    conditions = []
+    params = []
+    if infirmier_id is not None:
+        conditions.append('infirmier_id = ?')
+        params.append(infirmier_id)
+    if debut:
+        conditions.append('end_date >= ?')
+        params.append(debut)
+    if fin:
+        conditions.append('start_date <= ?')
+        params.append(fin)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    return [
+        absence_dict(row)
+        for row in conn.execute(
+            f'SELECT {ABSENCE_COLUMNS} FROM absence {where} ORDER BY start_date, infirmier_id, id',
+            params
+        )
+    ]
+
+
+def absent_by_date(conn, dates):
+    """
+    {date: {ids des infirmiers absents}} pour des dates 'YYYY-MM-DD' (une seule lecture
+    de la période couverte)
+    """
+    if not dates:
+        return {}
+    wanted = set(dates)
+    absent = {}
+    for absence in absences_between(conn, min(dates), max(dates)):
+        day = max(Date.fromisoformat(absence['from']), Date.fromisoformat(min(dates)))
+        last = min(Date.fromisoformat(absence['to']), Date.fromisoformat(max(dates)))
+        while day <= last:
+            key = day.isoformat()
+            if key in wanted:
+                absent.setdefault(key, set()).add(absence['infirmier_id'])
+            day += timedelta(days=1)
+    return absent
+
+
+def absences_by_label(conn, debut, fin):
+    """
+    {libellé: [[from, to, reason], ...]} des absences chevauchant [debut, fin]
+    (même clé que les placements de /availability)
+    """
+    label_index.ensure_loaded(conn)
+    by_label = {}
+    for absence in absences_between(conn, debut, fin):
+        label = label_index.label_for(absence['infirmier_id'])
+        if label:
+            by_label.setdefault(label, []).append([absence['from'], absence['to'], absence['reason']])
+    return by_label
+
+
+def available_infirmiers(conn, debut, fin=None):
+    """
+    Retourne (available, unavailable) pour [debut, fin] : infirmiers disponibles toute
+    la période, et infirmiers absents au moins un jour ou marqués absents (present = 0)
+    avec leurs absences
+    """
+    absences = {}
+    for absence in absences_between(conn, debut, fin or debut):
+        absences.setdefault(absence['infirmier_id'], []).append(absence)
+    available = []
+    unavailable = []
+    for row in conn.execute('SELECT id, nom, prenom, status, present FROM listeInfirmier ORDER BY id'):
+        entry = {'id': row['id'], 'label': format_label(row['prenom'], row['nom'], row['status'])}
+        if row['present'] == 0 or row['id'] in absences:
+            entry['present'] = row['present'] != 0
+            entry['absences'] = absences.get(row['id'], [])
+            unavailable.append(entry)
+        else:
+            available.append(entry)
+    return available, unavailable
@@ -1,8 +1,8 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import sqlite3
 import os
 import sys
+import logging
 
 # Ajouter le dossier parent au chemin pour pouvoir importer les modèles
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -10,33 +10,81 @@ from models.infirmier import Infirmier
 from models.statistique import Statistique
 from models.emplois_du_temps import EmploisDuTemps
 
+# Racine du projet, pour le paquet `algorithm` (remplissage automatique)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
 # Importer le blueprint des routes
 from routes import api_bp
 
-app = Flask(__name__)
-CORS(app)  # Activer CORS pour toutes les routes
+# Connexions partagées avec le blueprint (pool + PRAGMA)
+import db
+from db import get_db_connection
+from migrations import apply_migrations
+from diagnostics import configure_logging
+from versioning import bump_data_version, conditional
+from journal import compact_journal
+from events import SqliteEventBus, broker
+import metrics
+import sql_trace
+
+# Journalisation (niveaux via LOG_LEVEL / LOG_LEVELS)
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Configuration par défaut (production: pas de mode debug). Surchargeable par
+# create_app(config) ou par les variables d'environnement FLASK_* (ex. FLASK_DEBUG=1).
+DEFAULT_CONFIG = {
+    'DEBUG': False,
+    'TESTING': False,
+    # Diffusion des événements /api/events: 'memory' (un seul processus) ou 'sqlite'
+    # (bus partagé entre les workers de serve.py)
+    'EVENT_BUS': 'memory',
+    # Flux /api/events simultanés par processus (chacun occupe un fil); None: sans limite
+    'EVENTS_MAX_SUBSCRIBERS': None,
+    # Traçage SQL par requête (en-têtes X-SQL-*, détection des N+1); None: actif en mode debug
+    'SQL_TRACE': None,
+}
+
+def create_app(config=None):
+    """
+    Crée l'application Flask (routes d'API, CORS, configuration).
+    La base n'est pas initialisée ici: appeler init_db() une fois, avant les workers.
+    """
+    app = Flask(__name__)
+    app.config.update(DEFAULT_CONFIG)
+    app.config.from_prefixed_env()
+    if config:
+        app.config.update(config)
+    CORS(app)  # Activer CORS pour toutes les routes
+    # Latences, statuts, tailles et temps SQLite par route (GET /api/metrics)
+    metrics.init_app(app)
+    # Instructions SQL de chaque requête en développement (sql_trace.py)
+    sql_trace.init_app(app)
+
+    # Enregistrer le blueprint des routes d'API
+    app.register_blueprint(api_bp, url_prefix='/api')
 
-# Enregistrer le blueprint des routes d'API
-app.register_blueprint(api_bp, url_prefix='/api')
+    app.add_url_rule('/', view_func=index)
+    app.add_url_rule('/api/statistiques', view_func=get_statistiques, methods=['GET'])
+    app.add_url_rule('/api/statistiques/<int:infirmier_id>', view_func=get_statistique_by_infirmier, methods=['GET'])
+    app.add_url_rule('/api/statistiques/<int:infirmier_id>', view_func=update_statistique, methods=['PUT'])
 
-# Chemin de la base de données
-DATABASE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 
-                           'database', 'schedule.db')
+    broker.max_subscribers = app.config['EVENTS_MAX_SUBSCRIBERS']
+    if app.config['EVENT_BUS'] == 'sqlite':
+        broker.attach_bus(SqliteEventBus(broker))
+    return app
 
-# Fonction pour obtenir une connexion à la base de données
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+# Dossier contenant le schéma SQL
+SCHEMA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'database')
 
 # Vérifier si la base de données existe, sinon la créer
 def init_db():
-    if not os.path.exists(DATABASE_PATH):
-        os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
+    if not os.path.exists(db.DATABASE_PATH):
+        os.makedirs(os.path.dirname(db.DATABASE_PATH), exist_ok=True)
         conn = get_db_connection()
         
         # Lire le fichier de schéma SQL
-        schema_path = os.path.join(os.path.dirname(DATABASE_PATH), 'db_schema.sql')
+        schema_path = os.path.join(SCHEMA_DIR, 'db_schema.sql')
         with open(schema_path, 'r') as f:
             schema = f.read()
         
@@ -44,11 +92,20 @@ def init_db():
         conn.executescript(schema)
         conn.commit()
         conn.close()
-        print("Base de données initialisée.")
+        logger.info("Base de données initialisée.")
 
-# Routes API
+    # Appliquer les migrations en attente (index, nouvelles tables...)
+    conn = get_db_connection()
+    try:
+        apply_migrations(conn)
+        # Fusionner les entrées remplacées du journal des modifications
+        with db.transaction(conn):
+            compact_journal(conn)
+    finally:
+        conn.close()
+
+# Routes API (enregistrées par create_app)
 
-@app.route('/')
 def index():
     return jsonify({
         'message': 'API d\'emploi du temps pour infirmiers',
@@ -59,7 +116,7 @@ def index():
 # ont été déplacées vers le blueprint api_bp dans routes.py
 
 # Routes pour les statistiques
-@app.route('/api/statistiques', methods=['GET'])
+@conditional
 def get_statistiques():
     conn = get_db_connection()
     statistiques = conn.execute(
@@ -73,7 +130,7 @@ def get_statistiques():
     
     return jsonify([dict(stat) for stat in statistiques])
 
-@app.route('/api/statistiques/<int:infirmier_id>', methods=['GET'])
+@conditional
 def get_statistique_by_infirmier(infirmier_id):
     conn = get_db_connection()
     statistique = conn.execute(
@@ -92,7 +149,6 @@ def get_statistique_by_infirmier(infirmier_id):
     
     return jsonify(dict(statistique))
 
-@app.route('/api/statistiques/<int:infirmier_id>', methods=['PUT'])
 def update_statistique(infirmier_id):
     conn = get_db_connection()
     statistique = conn.execute('SELECT * FROM statistique WHERE infirmierID = ?', (infirmier_id,)).fetchone()
@@ -121,6 +177,7 @@ def update_statistique(infirmier_id):
         f"UPDATE statistique SET {', '.join(updates)} WHERE infirmierID = ?",
         tuple(values)
     )
+    bump_data_version(conn)
     conn.commit()
     conn.close()
     
@@ -171,6 +228,10 @@ def update_statistiques_from_assignment(assignment_data, existing_date=None):
                 conn.commit()
                 conn.close()
 
+# Application par défaut (python api/app.py, imports existants)
+app = create_app()
+
 if __name__ == '__main__':
+    # Serveur de développement; en production: python api/serve.py
     init_db()
     app.run(debug=True, port=5000)
@@ -0,0 +1,303 @@
+"""
+Chemin d'écriture commun des affectations du planning.
+
+assign_infirmier, reset_assignment, update_salle_state et l'endpoint de lot passent
+tous par apply_assignments() : les jours manquants sont créés en une fois, les cases
+modifiées sont écrites dans la table normalisée assignment (une ligne par case occupée
+ou fermée) et les variations de statistique sont cumulées puis appliquées avec une
+seule requête UPDATE par infirmier (et reportées dans l'agrégat statistique_mensuelle).
+Une affectation à un infirmier absent ce jour-là (absences.py) est refusée ici, pour
+tous les chemins d'écriture : les absences du lot sont lues en une requête.
+
+La vue emploisDuTemps (une ligne par jour, une colonne par salle) reste disponible en
+lecture pour les routes qui renvoient l'ancienne forme JSON.
+"""
+from collections import Counter, OrderedDict
+from datetime import datetime
+
+from absences import absent_by_date, find_absence
+from label_index import label_index
+from stat_rollup import apply_monthly_deltas, month_of
+from versioning import bump_data_version
+
+# Liste des noms de salles pour validation
+SALLE_NAMES = ['salle16', 'salle17', 'salle18', 'salle19', 'salle20', 'salle21',
+              'salle22', 'salle23', 'salle24', 'reveil1', 'reveil2', 'perinduction']
+
+# États de salle qui interdisent une affectation
+CLOSED_STATES = ['close', 'unuse']
+
+# Nombre maximum de paramètres par requête IN (...)
+SQL_CHUNK_SIZE = 500
+
+
+class AssignmentError(ValueError):
+    """
+    Opération d'affectation invalide (date ou salle manquante, salle inconnue...)
+    """
+
+
+# ============================
+# Helpers: statistiques / labels
+# ============================
+
+def get_infirmier_id_from_label(conn, label: str):
+    """Resolve a 'Prenom Nom - Status' label (or 'Prenom Nom') to a nurse id.
+    Uses the in-memory label index; the database is only read to build it once."""
+    label_index.ensure_loaded(conn)
+    return label_index.lookup(label)
+
+def get_label_from_infirmier_id(conn, infirmier_id):
+    """Return the canonical label of a nurse id, or None."""
+    label_index.ensure_loaded(conn)
+    try:
+        return label_index.label_for(int(infirmier_id))
+    except (TypeError, ValueError):
+        return None
+
+def resolve_value(conn, label=None, infirmier_id=None):
+    """Valeur à écrire dans une case: le libellé est prioritaire; pour compatibilité
+    un id d'infirmier est converti en libellé. Vide / None / id 0 => NULL."""
+    if label is not None:
+        return str(label).strip() or None
+    if infirmier_id is not None and str(infirmier_id) != '0':
+        return get_label_from_infirmier_id(conn, infirmier_id)
+    return None
+
+def apply_stat_deltas(conn, deltas):
+    """Applique les variations cumulées {(infirmier_id, salle): delta}:
+    une seule requête UPDATE par infirmier, compteurs bornés à 0."""
+    by_nurse = OrderedDict()
+    for (infirmier_id, salle), delta in deltas.items():
+        if delta:
+            by_nurse.setdefault(infirmier_id, []).append((salle, delta))
+    if not by_nurse:
+        return
+    conn.executemany(
+        'INSERT OR IGNORE INTO statistique (infirmierID) VALUES (?)',
+        [(infirmier_id,) for infirmier_id in by_nurse]
+    )
+    for infirmier_id, rooms in by_nurse.items():
+        assignments = ', '.join(f'{salle} = MAX(COALESCE({salle}, 0) + ?, 0)' for salle, _ in rooms)
+        conn.execute(
+            f'UPDATE statistique SET {assignments} WHERE infirmierID = ?',
+            tuple(delta for _, delta in rooms) + (infirmier_id,)
+        )
+
+
+# ============================
+# Jours et cases du planning
+# ============================
+
+def _chunks(values, size=SQL_CHUNK_SIZE):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+def empty_emploi_row(jour_id, date):
+    """Ligne au format emploisDuTemps (id, date, salles, états) sans affectation."""
+    row = {'id': jour_id, 'date': date}
+    for salle in SALLE_NAMES:
+        row[salle] = None
+        row[f'{salle}_state'] = None
+    return row
+
+def ensure_emploi_rows(conn, dates):
+    """Crée en une requête les jours de planning manquants pour ces dates."""
+    conn.executemany(
+        'INSERT OR IGNORE INTO planning_jour (date) VALUES (?)',
+        [(date,) for date in dict.fromkeys(dates)]
+    )
+
+def load_emploi_rows(conn, dates):
+    """Charge les jours de ces dates au format emploisDuTemps: {date: dict(row)}.
+    Lecture indexée de planning_jour et des seules cases non vides de assignment."""
+    rows = {}
+    for chunk in _chunks(dict.fromkeys(dates)):
+        placeholders = ', '.join('?' for _ in chunk)
+        for cell in conn.execute(
+            f"""
+            SELECT j.id, j.date, a.room, a.label, a.state
+            FROM planning_jour j
+            LEFT JOIN assignment a ON a.date = j.date
+            WHERE j.date IN ({placeholders})
+            """,
+            chunk
+        ):
+            row = rows.get(cell['date'])
+            if row is None:
+                row = rows[cell['date']] = empty_emploi_row(cell['id'], cell['date'])
+            if cell['room']:
+                row[cell['room']] = cell['label']
+                row[f"{cell['room']}_state"] = cell['state']
+    return rows
+
+def write_cells(conn, cells):
+    """Écrit des cases [(date, salle, infirmier_id, label, state)] dans assignment, id déjà
+    résolu par l'appelant: une case sans libellé ni état est supprimée, les autres sont
+    insérées ou mises à jour."""
+    upserts = []
+    deletes = []
+    for date, salle, infirmier_id, label, state in cells:
+        if label is None and state is None:
+            deletes.append((date, salle))
+        else:
+            upserts.append((date, salle, infirmier_id if label else None, label, state))
+    if deletes:
+        conn.executemany('DELETE FROM assignment WHERE date = ? AND room = ?', deletes)
+    if upserts:
+        conn.executemany(
+            """
+            INSERT INTO assignment (date, room, infirmier_id, label, state)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (date, room) DO UPDATE SET
+                infirmier_id = excluded.infirmier_id,
+                label = excluded.label,
+                state = excluded.state
+            """,
+            upserts
+        )
+
+
+# ============================
+# Application des opérations
+# ============================
+
+def validate_operation(op):
+    """Vérifie une opération {date, salle, label?, state?} et retourne (date, salle)."""
+    if not isinstance(op, dict):
+        raise AssignmentError('Opération invalide')
+    date = op.get('date')
+    salle = op.get('salle')
+    if not date or not salle:
+        raise AssignmentError('Date et salle sont requis')
+    if salle not in SALLE_NAMES:
+        raise AssignmentError(f'Nom de salle invalide: {salle}')
+    try:
+        datetime.strptime(date, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise AssignmentError(f'Format de date invalide: {date} (YYYY-MM-DD attendu)')
+    return date, salle
+
+def apply_assignments(conn, operations, atomic=False):
+    """Applique une liste d'opérations d'affectation dans la transaction courante.
+
+    Chaque opération est un dict {date, salle, label, state} où:
+      - label: libellé à écrire (None ou '' pour effacer la case); 'infirmier_id' /
+        'infirmierId' sont acceptés pour compatibilité; absent = case inchangée
+      - state: nouvel état de la salle ('close', 'unuse' ou None); absent = inchangé.
+        Fermer une salle efface la case.
+
+    Une opération qui place un infirmier absent ce jour-là échoue sans rien modifier
+    ({'success': False, 'error', 'absence'}). atomic: si une opération échoue, aucune
+    case n'est écrite (déplacement: la source n'est pas vidée).
+
+    Retourne (results, changes, deltas):
+      - results: un résultat par opération, dans l'ordre
+      - changes: cases effectivement modifiées
+        [{date, salle, old_label, label, old_state, state}]
+      - deltas: variations appliquées à statistique {(infirmier_id, salle): delta}
+    """
+    results = [None] * len(operations)
+    valid = []
+    for index, op in enumerate(operations):
+        try:
+            date, salle = validate_operation(op)
+        except AssignmentError as e:
+            results[index] = {'success': False, 'error': str(e)}
+            continue
+        valid.append((index, date, salle, op))
+
+    if not valid:
+        return results, [], Counter()
+
+    dates = [date for _, date, _, _ in valid]
+    ensure_emploi_rows(conn, dates)
+    rows = load_emploi_rows(conn, dates)
+    original = {date: dict(row) for date, row in rows.items()}
+
+    # Index des libellés vérifié une fois pour tout le lot, absences lues en une fois
+    label_index.ensure_loaded(conn)
+    absent = absent_by_date(conn, dates)
+    resolved = {}  # (date, salle) -> id du libellé écrit
+    deltas = Counter()
+    monthly = Counter()
+    for index, date, salle, op in valid:
+        row = rows[date]
+        state_key = f'{salle}_state'
+
+        if 'state' in op:
+            state = op['state'] if op['state'] in CLOSED_STATES else None
+            if state in CLOSED_STATES:
+                op = dict(op, label=None)
+
+        assigns = 'label' in op or 'infirmier_id' in op or 'infirmierId' in op
+        if assigns:
+            infirmier_id = op.get('infirmier_id') if 'infirmier_id' in op else op.get('infirmierId')
+            value = resolve_value(conn, op.get('label'), infirmier_id)
+            new_id = label_index.lookup(value) if value else None
+            # Infirmier absent ce jour-là: opération refusée, case et état inchangés
+            if new_id is not None and new_id in absent.get(date, ()):
+                results[index] = {
+                    'success': False,
+                    'error': 'Cet infirmier est absent ce jour-là',
+                    'absence': find_absence(conn, new_id, date),
+                }
+                continue
+
+        if 'state' in op:
+            row[state_key] = state
+
+        if assigns:
+            existing = row[salle]
+            if existing != value:
+                if existing:
+                    old_id = label_index.lookup(existing)
+                    if old_id:
+                        deltas[(old_id, salle)] -= 1
+                        monthly[(old_id, salle, month_of(date))] -= 1
+                if new_id:
+                    deltas[(new_id, salle)] += 1
+                    monthly[(new_id, salle, month_of(date))] += 1
+                row[salle] = value
+                resolved[(date, salle)] = new_id
+
+        results[index] = {
+            'success': True,
+            'date': date,
+            'salle': salle,
+            'label': row[salle],
+            'state': row[state_key],
+        }
+
+    if atomic and any(not result['success'] for result in results):
+        return results, [], Counter()
+
+    # Écrire uniquement les cases modifiées
+    changes = []
+    for date, row in rows.items():
+        before = original[date]
+        for salle in SALLE_NAMES:
+            state_key = f'{salle}_state'
+            if row[salle] != before[salle] or row[state_key] != before[state_key]:
+                changes.append({
+                    'date': date,
+                    'salle': salle,
+                    'old_label': before[salle],
+                    'label': row[salle],
+                    'old_state': before[state_key],
+                    'state': row[state_key],
+                })
+    cells = []
+    for c in changes:
+        key = (c['date'], c['salle'])
+        # Id déjà résolu pour un libellé écrit; seul l'état change: index chargé plus haut
+        infirmier_id = resolved[key] if key in resolved else label_index.lookup(c['label'])
+        cells.append((c['date'], c['salle'], infirmier_id, c['label'], c['state']))
+    write_cells(conn, cells)
+
+    apply_stat_deltas(conn, deltas)
+    apply_monthly_deltas(conn, monthly)
+    # Toute opération valide peut créer une ligne ou modifier une case: nouvelle version
+    bump_data_version(conn)
+    return results, changes, Counter({key: delta for key, delta in deltas.items() if delta})
@@ -0,0 +1,91 @@
+"""
+Remplissage automatique du planning: lien entre la base et le moteur `algorithm`.
+
+load_problem() lit en quelques requêtes indexées les infirmiers présents, les
+compteurs de statistique, les cases déjà occupées ou fermées et les absences de la
+période (un infirmier absent un jour y est traité comme déjà affecté) ;
+build_operations() retransforme le résultat en opérations pour apply_assignments(),
+en écartant les cases remplies entre-temps par une autre requête.
+"""
+from datetime import timedelta
+
+from absences import absent_by_date
+from algorithm import SchedulingProblem
+from assignments import SALLE_NAMES
+from label_index import label_index
+
+# Nombre maximum de jours par demande de remplissage
+MAX_AUTO_FILL_DAYS = 366
+
+
+def planning_dates(debut, fin, weekends=False):
+    """Dates 'YYYY-MM-DD' de debut à fin incluses (du lundi au vendredi par défaut)."""
+    dates = []
+    day = debut
+    while day <= fin:
+        if weekends or day.weekday() < 5:
+            dates.append(day.isoformat())
+        day += timedelta(days=1)
+    return dates
+
+def load_occupancy(conn, debut, fin):
+    """Cases existantes de la période: ({(date, salle)}, {date: {ids affectés}})."""
+    taken = set()
+    busy = {}
+    for row in conn.execute(
+        'SELECT date, room, infirmier_id FROM assignment WHERE date BETWEEN ? AND ?',
+        (debut, fin)
+    ):
+        taken.add((row['date'], row['room']))
+        if row['infirmier_id'] is not None:
+            busy.setdefault(row['date'], set()).add(row['infirmier_id'])
+    return taken, busy
+
+def load_problem(conn, dates, status_rooms=None, load_weight=1.0):
+    """Construit le SchedulingProblem des cases vides et ouvertes de ces dates."""
+    nurses = [
+        (row['id'], row['status'])
+        for row in conn.execute(
+            'SELECT id, status FROM listeInfirmier WHERE COALESCE(present, 1) = 1 ORDER BY id'
+        )
+    ]
+    cols = ', '.join(SALLE_NAMES)
+    counts = {}
+    for row in conn.execute(f'SELECT infirmierID, {cols} FROM statistique'):
+        for salle in SALLE_NAMES:
+            if row[salle]:
+                counts[(row['infirmierID'], salle)] = row[salle]
+
+    taken, busy = load_occupancy(conn, dates[0], dates[-1]) if dates else (set(), {})
+    for date, absent in absent_by_date(conn, dates).items():
+        busy.setdefault(date, set()).update(absent)
+    # Une case fermée / inutilisée ou déjà occupée existe dans assignment: elle est conservée
+    open_cells = {
+        date: [salle for salle in SALLE_NAMES if (date, salle) not in taken]
+        for date in dates
+    }
+    return SchedulingProblem(dates, SALLE_NAMES, nurses, counts=counts, open_cells=open_cells,
+                             busy=busy, status_rooms=status_rooms, load_weight=load_weight)
+
+def build_operations(conn, result):
+    """Opérations {date, salle, label} du résultat, à exécuter dans la transaction d'écriture.
+    Retourne (operations, skipped): les cases occupées entre-temps et les infirmiers
+    affectés ailleurs ou déclarés absents le même jour entre-temps sont écartés."""
+    if not result.assignments:
+        return [], 0
+    dates = [date for date, _, _ in result.assignments]
+    taken, busy = load_occupancy(conn, min(dates), max(dates))
+    for date, absent in absent_by_date(conn, dates).items():
+        busy.setdefault(date, set()).update(absent)
+    label_index.ensure_loaded(conn)
+
+    operations = []
+    skipped = 0
+    for date, salle, infirmier_id in result.assignments:
+        label = label_index.label_for(infirmier_id)
+        if label is None or (date, salle) in taken or infirmier_id in busy.get(date, ()):
+            skipped += 1
+            continue
+        busy.setdefault(date, set()).add(infirmier_id)
+        operations.append({'date': date, 'salle': salle, 'label': label})
+    return operations, skipped
@@ -0,0 +1,43 @@
+"""
+Disponibilités d'une période pour valider un glisser-déposer côté client.
+
+Une seule lecture de assignment sur la plage de dates (clé primaire date, room) donne :
+    placements   index inversé libellé -> [[date, salle], ...] : jours où chaque
+                 infirmier est déjà placé (plusieurs salles le même jour = doublon)
+    closed       date -> {salle: état} des salles fermées ou non utilisées
+
+Un libellé peut être déposé dans (date, salle) si la salle n'est pas fermée et si le
+libellé n'est placé dans aucune autre salle ce jour-là (mêmes règles que
+/move-assignment, qui reste seul juge au moment de l'écriture).
+"""
+from assignments import CLOSED_STATES, SALLE_NAMES
+
+# Période maximale d'une requête
+MAX_AVAILABILITY_DAYS = 366
+
+_ROOM_INDEX = {salle: index for index, salle in enumerate(SALLE_NAMES)}
+
+
+def build_availability(conn, debut, fin):
+    """
+    Retourne (placements, closed) pour [debut, fin]
+    """
+    placements = {}
+    closed = {}
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(
+        'SELECT date, room, label, state FROM assignment WHERE date BETWEEN ? AND ? ORDER BY date, room',
+        (debut, fin)
+    )
+    for date, room, label, state in cursor:
+        if label:
+            placements.setdefault(label, []).append([date, room])
+        if state in CLOSED_STATES:
+            closed.setdefault(date, {})[room] = state
+    # Ordre des salles du planning (la première salle d'un doublon est celle signalée)
+    for cells in placements.values():
+        if len(cells) > 1:
+            cells.sort(key=lambda cell: (cell[0], _ROOM_INDEX[cell[1]]))
+    return placements, closed
+
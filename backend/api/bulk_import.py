@@ -0,0 +1,332 @@
+"""
+Import en masse d'infirmiers (roster) et de plannings historiques, en CSV ou JSON.
+
+Tout l'import se fait dans une seule transaction :
+    - les infirmiers sont insérés par executemany (les libellés déjà présents sont ignorés)
+    - les libellés du planning sont résolus en mémoire (un LabelIndex local chargé une
+      fois depuis listeInfirmier, nouveaux infirmiers compris), sans requête par ligne
+    - les jours et les cases sont écrits par executemany, sans entrée de journal par
+      case (journal_suspended) : les clients rechargent après l'import
+    - statistique et statistique_mensuelle reçoivent les variations cumulées par
+      (infirmier, salle) et par mois des cases remplacées et importées, comme
+      apply_assignments : les corrections manuelles des autres compteurs sont conservées.
+      rebuild=True recalcule plutôt tout depuis assignment (rebuild_statistics)
+
+Formats acceptés :
+    infirmiers  nom, prenom, status (J, J1, J1* ou J3), present (1/0, oui/non)
+    planning    long:  date, salle, label, state (une ligne par case)
+                large: date, salle16, salle16_state, ... (une ligne par jour, comme l'export)
+"""
+import csv
+import io
+import json
+from collections import Counter
+from datetime import datetime
+
+from assignments import SALLE_NAMES, CLOSED_STATES, SQL_CHUNK_SIZE, apply_stat_deltas, ensure_emploi_rows
+from journal import journal_suspended
+from label_index import LabelIndex, format_label, normalize_label
+from stat_rollup import apply_monthly_deltas, month_of
+from stats_rebuild import rebuild_statistics
+from versioning import bump_data_version
+
+IMPORT_FORMATS = ('csv', 'json')
+
+# Statuts acceptés par listeInfirmier (contrainte CHECK du schéma)
+VALID_STATUSES = ('J', 'J1', 'J1*', 'J3')
+
+# Nombre maximum d'erreurs détaillées dans le rapport
+MAX_REPORTED_ERRORS = 100
+
+TRUE_VALUES = ('1', 'true', 'oui', 'yes', 'o', 'y')
+FALSE_VALUES = ('0', 'false', 'non', 'no', 'n')
+
+
+class BulkImportError(ValueError):
+    """
+    Import refusé: fichier illisible ou lignes invalides (errors: [{ligne, erreur}])
+    """
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or []
+
+
+# ============================
+# Lecture des fichiers
+# ============================
+
+def parse_records(content, fmt, key=None):
+    """
+    Lit un contenu CSV ou JSON et retourne une liste de dicts. En JSON, une liste
+    d'objets ou un objet contenant cette liste sous la clé `key`.
+    """
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    if fmt not in IMPORT_FORMATS:
+        raise BulkImportError(f'Format non supporté: {fmt} (csv ou json)')
+
+    if fmt == 'json':
+        try:
+            data = json.loads(content) if isinstance(content, str) else content
+        except ValueError as e:
+            raise BulkImportError(f'JSON invalide: {e}')
+        if isinstance(data, dict) and key:
+            data = data.get(key, [])
+        if not isinstance(data, list) or not all(isinstance(record, dict) for record in data):
+            raise BulkImportError('Une liste d\'objets est attendue')
+        return data
+
+    content = content.lstrip('\ufeff')
+    if not content.strip():
+        return []
+    # Séparateur virgule ou point-virgule (export tableur français)
+    first_line = content.split('\n', 1)[0]
+    delimiter = ';' if first_line.count(';') > first_line.count(',') else ','
+    reader = csv.DictReader(io.StringIO(content), delimiter=delimiter)
+    return [
+        {(name or '').strip(): value for name, value in record.items()}
+        for record in reader
+    ]
+
+
+def _text(value):
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def _parse_present(value):
+    text = _text(value)
+    if text is None:
+        return 1
+    if text.lower() in TRUE_VALUES:
+        return 1
+    if text.lower() in FALSE_VALUES:
+        return 0
+    raise ValueError(f'Valeur de présence invalide: {value}')
+
+
+def _parse_date(value):
+    text = _text(value)
+    if text is None:
+        raise ValueError('Date manquante')
+    try:
+        return datetime.strptime(text, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f'Date invalide: {text} (YYYY-MM-DD attendu)')
+
+
+def _parse_state(value):
+    text = _text(value)
+    if text is None:
+        return None
+    if text not in CLOSED_STATES:
+        raise ValueError(f'État de salle invalide: {text}')
+    return text
+
+
+def _record_error(errors, line, message):
+    errors.append({'ligne': line, 'erreur': message})
+
+
+# ============================
+# Validation
+# ============================
+
+def validate_nurses(records, existing_labels):
+    """
+    Vérifie les infirmiers à importer. Retourne (rows, skipped, errors):
+    rows = [(nom, prenom, status, present)], skipped = libellés déjà présents
+    (en base ou plus haut dans le fichier).
+    """
+    rows, skipped, errors = [], [], []
+    seen = set(existing_labels)
+    for line, record in enumerate(records, start=1):
+        nom = _text(record.get('nom'))
+        prenom = _text(record.get('prenom'))
+        if not nom or not prenom:
+            _record_error(errors, line, 'Le nom et prénom sont obligatoires')
+            continue
+        status = _text(record.get('status')) or 'J'
+        if status not in VALID_STATUSES:
+            _record_error(errors, line, f'Statut invalide: {status}')
+            continue
+        try:
+            present = _parse_present(record.get('present'))
+        except ValueError as e:
+            _record_error(errors, line, str(e))
+            continue
+
+        label = normalize_label(format_label(prenom, nom, status))
+        if label in seen:
+            skipped.append(label)
+            continue
+        seen.add(label)
+        rows.append((nom, prenom, status, present))
+    return rows, skipped, errors
+
+
+def _record_cells(record):
+    """
+    Cases [(salle, label, state)] d'une ligne de planning, au format long ou large
+    """
+    if 'salle' in record:
+        return [(_text(record.get('salle')), record.get('label'), record.get('state'))]
+    return [
+        (salle, record.get(salle), record.get(f'{salle}_state'))
+        for salle in SALLE_NAMES
+        if salle in record or f'{salle}_state' in record
+    ]
+
+
+def validate_cells(records, index):
+    """
+    Vérifie les cases du planning et résout les libellés avec l'index en mémoire.
+    Retourne (cells, errors), cells = {(date, salle): (infirmier_id, label, state)}
+    (la dernière ligne d'une même case l'emporte). Les cases vides sont ignorées.
+    """
+    cells, errors = {}, []
+    dates = {}  # date lue -> date normalisée (format long: une ligne par case, dates répétées)
+    for line, record in enumerate(records, start=1):
+        raw_date = record.get('date')
+        try:
+            date = dates.get(raw_date) if isinstance(raw_date, str) else None
+            if date is None:
+                date = _parse_date(raw_date)
+                if isinstance(raw_date, str):
+                    dates[raw_date] = date
+        except ValueError as e:
+            _record_error(errors, line, str(e))
+            continue
+        for salle, label, state in _record_cells(record):
+            if salle not in SALLE_NAMES:
+                _record_error(errors, line, f'Nom de salle invalide: {salle}')
+                continue
+            try:
+                state = _parse_state(state)
+            except ValueError as e:
+                _record_error(errors, line, str(e))
+                continue
+            # Une salle fermée n'a pas d'affectation
+            label = None if state in CLOSED_STATES else _text(label)
+            if label is None and state is None:
+                continue
+            infirmier_id = None
+            if label is not None:
+                infirmier_id = index.lookup(label)
+                if infirmier_id is None:
+                    _record_error(errors, line, f'Infirmier inconnu: {label}')
+                    continue
+            cells[(date, salle)] = (infirmier_id, label, state)
+    return cells, errors
+
+
+# ============================
+# Import
+# ============================
+
+def stat_deltas(conn, cells, dates, replace_days=False):
+    """
+    Variations de statistique de l'import, à calculer avant l'écriture des cases.
+    Retourne (deltas, monthly): {(infirmier_id, salle): delta} et
+    {(infirmier_id, salle, mois): delta}, -1 par affectation remplacée (toutes celles
+    des jours importés si replace_days) et +1 par affectation importée.
+    """
+    deltas = Counter()
+    monthly = Counter()
+    for start in range(0, len(dates), SQL_CHUNK_SIZE):
+        batch = dates[start:start + SQL_CHUNK_SIZE]
+        for date, salle, infirmier_id in conn.execute(
+            f"SELECT date, room, infirmier_id FROM assignment WHERE date IN ({', '.join('?' * len(batch))}) "
+            'AND infirmier_id IS NOT NULL AND label IS NOT NULL',
+            batch
+        ):
+            if replace_days or (date, salle) in cells:
+                deltas[(infirmier_id, salle)] -= 1
+                monthly[(infirmier_id, salle, month_of(date))] -= 1
+    for (date, salle), (infirmier_id, _, _) in cells.items():
+        if infirmier_id is not None:
+            deltas[(infirmier_id, salle)] += 1
+            monthly[(infirmier_id, salle, month_of(date))] += 1
+    return deltas, monthly
+
+
+def run_import(conn, nurses=None, schedule=None, replace_days=False, skip_invalid=False, rebuild=False):
+    """
+    Importe des infirmiers et/ou un planning (listes de dicts, voir parse_records)
+    dans une seule transaction ouverte par l'appelant.
+
+    replace_days: les cases existantes des jours importés sont d'abord effacées
+    skip_invalid: les lignes invalides sont ignorées au lieu de faire échouer l'import
+    rebuild: statistique entièrement recalculée au lieu des variations de l'import
+
+    Retourne le rapport {infirmiers: {inserted, skipped}, planning: {days, cells},
+    error_count, errors}. Lève BulkImportError si des lignes sont invalides et que
+    skip_invalid est faux (l'appelant annule alors la transaction).
+    """
+    errors = []
+
+    # 1. Infirmiers: insertion groupée, libellés existants ignorés
+    existing = conn.execute('SELECT prenom, nom, status FROM listeInfirmier').fetchall()
+    existing_labels = {normalize_label(format_label(row[0], row[1], row[2])) for row in existing}
+    nurse_rows, skipped, nurse_errors = validate_nurses(nurses or [], existing_labels)
+    errors.extend(dict(error, fichier='infirmiers') for error in nurse_errors)
+    if nurse_rows:
+        conn.executemany(
+            'INSERT INTO listeInfirmier (nom, prenom, status, present) VALUES (?, ?, ?, ?)',
+            nurse_rows
+        )
+
+    # 2. Planning: libellés résolus en mémoire (index local, nouveaux infirmiers compris)
+    cells = {}
+    if schedule:
+        index = LabelIndex()
+        index.load(conn)
+        cells, cell_errors = validate_cells(schedule, index)
+        errors.extend(dict(error, fichier='planning') for error in cell_errors)
+
+    if errors and not skip_invalid:
+        raise BulkImportError(f'{len(errors)} ligne(s) invalide(s), import annulé', errors)
+
+    dates = sorted({date for date, _ in cells})
+    if cells:
+        # Cases non journalisées une à une: les clients rechargent après l'import
+        with journal_suspended(conn):
+            ensure_emploi_rows(conn, dates)
+            if not rebuild:
+                deltas, monthly = stat_deltas(conn, cells, dates, replace_days)
+            if replace_days:
+                conn.executemany('DELETE FROM assignment WHERE date = ?', [(date,) for date in dates])
+            conn.executemany(
+                """
+                INSERT INTO assignment (date, room, infirmier_id, label, state)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (date, room) DO UPDATE SET
+                    infirmier_id = excluded.infirmier_id,
+                    label = excluded.label,
+                    state = excluded.state
+                """,
+                [
+                    (date, salle, infirmier_id, label, state)
+                    for (date, salle), (infirmier_id, label, state) in sorted(cells.items())
+                ]
+            )
+            # 3. Statistiques: variations cumulées (une requête par infirmier touché)
+            if rebuild:
+                rebuild_statistics(conn)
+            else:
+                apply_stat_deltas(conn, deltas)
+                apply_monthly_deltas(conn, monthly)
+    if nurse_rows and not (cells and rebuild):
+        conn.execute(
+            'INSERT OR IGNORE INTO statistique (infirmierID) SELECT id FROM listeInfirmier'
+        )
+    if nurse_rows or cells:
+        bump_data_version(conn)
+
+    return {
+        'infirmiers': {'inserted': len(nurse_rows), 'skipped': len(skipped)},
+        'planning': {'days': len(dates), 'cells': len(cells)},
+        'error_count': len(errors),
+        'errors': errors[:MAX_REPORTED_ERRORS],
+    }
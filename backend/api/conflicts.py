@@ -0,0 +1,220 @@
+"""
+Détection des conflits du planning, tenue à jour à partir du journal des modifications.
+
+Types de conflit (une case = une affectation date/salle) :
+    double_booking    un même infirmier placé dans plusieurs salles le même jour
+    absent_assigned   infirmier marqué absent (present = 0) encore affecté
+    absent            infirmier affecté un jour couvert par une de ses absences datées
+    closed_room       libellé dans une salle fermée ou non utilisée (close, unuse)
+    unknown_label     libellé ne correspondant plus à aucun infirmier de listeInfirmier
+
+Les conflits d'un jour ne dépendent que des cases de ce jour, de listeInfirmier et
+des absences couvrant ce jour : l'ensemble est tenu par jour. Construit une fois par un parcours de assignment, il est
+ensuite mis à jour depuis change_journal (alimenté par trigger : tous les chemins
+d'écriture et tous les processus). Avant chaque lecture, refresh() applique les
+entrées postérieures au dernier numéro traité en ne réévaluant que :
+    - les jours des cases modifiées (entité cell, clé date|salle) ;
+    - pour un infirmier ajouté, modifié ou supprimé, les jours où il est affecté
+      (index idx_assignment_infirmier) et les jours dont un libellé est inconnu ou
+      résolu sans infirmier_id correspondant (écrit hors API, avant l'infirmier) ;
+    - pour une absence ajoutée, modifiée ou supprimée (entité absence, clé
+      infirmier_id|début|fin), les jours de la période où l'infirmier est affecté.
+Sans écriture depuis la lecture précédente, refresh() ne lit que l'état du journal.
+Journal tronqué ou suspendu (import en masse), base réinitialisée : reconstruction.
+"""
+import threading
+from itertools import groupby
+from operator import itemgetter
+
+from absences import absent_by_date
+from assignments import CLOSED_STATES, SALLE_NAMES
+from journal import get_journal_state
+from label_index import label_index, normalize_label
+
+CONFLICT_TYPES = ('double_booking', 'absent_assigned', 'absent', 'closed_room', 'unknown_label')
+
+# Valeurs liées par clause IN (jours ou infirmiers réévalués)
+IN_BATCH_SIZE = 500
+
+_ROOM_INDEX = {salle: index for index, salle in enumerate(SALLE_NAMES)}
+
+
+def _batches(values, size=IN_BATCH_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _placeholders(values):
+    return ', '.join('?' * len(values))
+
+
+def day_conflicts(date, cells, present, absent=frozenset()):
+    """
+    Conflits d'un jour. cells: [(salle, libellé, infirmier_id, état)] des cases occupées;
+    present: {id infirmier: present}; absent: ids des infirmiers absents ce jour-là.
+    Ordre des salles du planning, doublons en fin.
+    Retourne (conflits, unlinked): unlinked si un libellé est inconnu ou n'est pas
+    résolu vers l'infirmier_id enregistré dans sa case.
+    """
+    conflicts = []
+    unlinked = False
+    rooms_by_nurse = {}
+    for room, label, stored_id, state in sorted(cells, key=lambda cell: _ROOM_INDEX.get(cell[0], len(_ROOM_INDEX))):
+        infirmier_id = label_index.lookup(label)
+        unlinked = unlinked or infirmier_id is None or infirmier_id != stored_id
+        if infirmier_id is None:
+            conflicts.append({'type': 'unknown_label', 'date': date, 'room': room, 'label': label,
+                              'infirmier_id': None})
+        else:
+            if present.get(infirmier_id) == 0:
+                conflicts.append({'type': 'absent_assigned', 'date': date, 'room': room, 'label': label,
+                                  'infirmier_id': infirmier_id})
+            if infirmier_id in absent:
+                conflicts.append({'type': 'absent', 'date': date, 'room': room, 'label': label,
+                                  'infirmier_id': infirmier_id})
+        if state in CLOSED_STATES:
+            conflicts.append({'type': 'closed_room', 'date': date, 'room': room, 'label': label,
+                              'infirmier_id': infirmier_id, 'state': state})
+        # Libellé inconnu: doublon sur le libellé lui-même
+        key = infirmier_id if infirmier_id is not None else normalize_label(label)
+        rooms_by_nurse.setdefault(key, (label, infirmier_id, []))[2].append(room)
+    for label, infirmier_id, rooms in rooms_by_nurse.values():
+        if len(rooms) > 1:
+            conflicts.append({'type': 'double_booking', 'date': date, 'rooms': rooms, 'label': label,
+                              'infirmier_id': infirmier_id})
+    return conflicts, unlinked
+
+
+class ConflictIndex:
+    """
+    Conflits par jour, synchronisés sur change_journal
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seq = None      # dernier numéro du journal appliqué (None: à construire)
+        self._by_date = {}    # date -> [conflits]
+        self._present = {}    # id infirmier -> present
+        self._unlinked = set()  # jours à réévaluer à chaque modification d'infirmier
+
+    def invalidate(self):
+        with self._lock:
+            self._seq = None
+
+    def refresh(self, conn):
+        """
+        Applique les modifications du journal depuis l'appel précédent (à appeler
+        dans une transaction de lecture). Retourne le numéro du journal atteint.
+        """
+        with self._lock:
+            seq, floor_seq = get_journal_state(conn)
+            if self._seq is None or self._seq < floor_seq or self._seq > seq:
+                self._rebuild(conn)
+            elif seq > self._seq:
+                self._apply_changes(conn, self._seq)
+            self._seq = seq
+            return seq
+
+    def conflicts(self, debut=None, fin=None, types=None):
+        """
+        Conflits de [debut, fin] (bornes facultatives), filtrés sur types
+        """
+        with self._lock:
+            dates = sorted(date for date in self._by_date
+                           if (debut is None or date >= debut) and (fin is None or date <= fin))
+            return [conflict for date in dates for conflict in self._by_date[date]
+                    if types is None or conflict['type'] in types]
+
+    @staticmethod
+    def _read_present(conn):
+        return {row[0]: row[1] for row in conn.execute('SELECT id, present FROM listeInfirmier')}
+
+    def _rebuild(self, conn):
+        label_index.ensure_loaded(conn)
+        self._present = self._read_present(conn)
+        absent = absent_by_date(conn, [
+            row[0] for row in conn.execute('SELECT DISTINCT date FROM assignment WHERE label IS NOT NULL')
+        ])
+        by_date = {}
+        unlinked_dates = set()
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(
+            'SELECT date, room, label, infirmier_id, state FROM assignment WHERE label IS NOT NULL ORDER BY date'
+        )
+        for date, cells in groupby(cursor, key=itemgetter(0)):
+            conflicts, unlinked = day_conflicts(date, [cell[1:] for cell in cells], self._present,
+                                                absent.get(date, frozenset()))
+            if conflicts:
+                by_date[date] = conflicts
+            if unlinked:
+                unlinked_dates.add(date)
+        cursor.close()
+        self._by_date = by_date
+        self._unlinked = unlinked_dates
+
+    def _apply_changes(self, conn, since):
+        dates = set()
+        infirmier_ids = []
+        absences = []
+        rows = conn.execute(
+            "SELECT DISTINCT entity, entity_key FROM change_journal "
+            "WHERE seq > ? AND entity IN ('cell', 'infirmier', 'absence')",
+            (since,)
+        ).fetchall()
+        for entity, key in rows:
+            if entity == 'cell':
+                dates.add(key.split('|', 1)[0])
+            elif entity == 'infirmier':
+                infirmier_ids.append(int(key))
+            else:
+                infirmier_id, debut, fin = key.split('|')
+                absences.append((int(infirmier_id), debut, fin))
+
+        label_index.ensure_loaded(conn)
+        if infirmier_ids:
+            self._present = self._read_present(conn)
+            # Un ajout ou un renommage peut changer la résolution de ces libellés
+            dates.update(self._unlinked)
+            for batch in _batches(infirmier_ids):
+                dates.update(row[0] for row in conn.execute(
+                    f'SELECT DISTINCT date FROM assignment WHERE infirmier_id IN ({_placeholders(batch)})',
+                    batch
+                ))
+        for infirmier_id, debut, fin in absences:
+            # Jours de la période où l'infirmier est affecté (index idx_assignment_infirmier)
+            dates.update(row[0] for row in conn.execute(
+                'SELECT DISTINCT date FROM assignment WHERE infirmier_id = ? AND date BETWEEN ? AND ?',
+                (infirmier_id, debut, fin)
+            ))
+            dates.update(date for date in self._unlinked if debut <= date <= fin)
+        self._evaluate(conn, dates)
+
+    def _evaluate(self, conn, dates):
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        for batch in _batches(sorted(dates)):
+            absent = absent_by_date(conn, batch)
+            cells_by_date = {date: [] for date in batch}
+            cursor.execute(
+                f'SELECT date, room, label, infirmier_id, state FROM assignment '
+                f'WHERE date IN ({_placeholders(batch)}) AND label IS NOT NULL',
+                batch
+            )
+            for date, *cell in cursor:
+                cells_by_date[date].append(cell)
+            for date, cells in cells_by_date.items():
+                conflicts, unlinked = day_conflicts(date, cells, self._present, absent.get(date, frozenset()))
+                if conflicts:
+                    self._by_date[date] = conflicts
+                else:
+                    self._by_date.pop(date, None)
+                if unlinked:
+                    self._unlinked.add(date)
+                else:
+                    self._unlinked.discard(date)
+        cursor.close()
+
+
+# Conflits partagés par tout le processus
+conflict_index = ConflictIndex()
@@ -0,0 +1,301 @@
+"""
+Gestion partagée des connexions SQLite pour l'API.
+
+Toutes les routes (app.py et le blueprint api_bp) passent par get_db_connection().
+Les connexions sont conservées dans un pool et réutilisées d'une requête à l'autre :
+conn.close() rend la connexion au pool au lieu de la fermer réellement, ce qui évite
+de rouvrir le fichier, recharger le schéma et réchauffer le cache de pages à chaque appel.
+
+Une connexion SQLite ne doit pas être utilisée de part et d'autre d'un fork : un
+processus enfant (workers de serve.py) repart d'un pool vide. Les connexions héritées
+ne sont jamais fermées dans l'enfant (la fermeture pourrait relâcher les verrous ou
+supprimer le fichier WAL encore utilisé par le parent).
+
+Le temps passé dans SQLite (exécution, lecture des lignes, COMMIT) est cumulé par fil :
+db_time() permet aux métriques de l'attribuer à la requête en cours.
+
+Réglages (variables d'environnement) :
+    DATABASE_PATH          chemin du fichier SQLite
+    SQLITE_POOL_SIZE       nombre de connexions inactives conservées (0 = pas de réutilisation)
+    SQLITE_JOURNAL_MODE    mode de journal (WAL par défaut)
+    SQLITE_SYNCHRONOUS     OFF / NORMAL / FULL (NORMAL par défaut, sûr en WAL)
+    SQLITE_CACHE_SIZE      PRAGMA cache_size (négatif = KiB)
+    SQLITE_MMAP_SIZE       PRAGMA mmap_size en octets
+    SQLITE_BUSY_TIMEOUT    attente maximale (ms) quand la base est verrouillée
+    SQLITE_FOREIGN_KEYS    contrôle des clés étrangères (ON par défaut)
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+# Chemin de la base de données
+DATABASE_PATH = os.environ.get('DATABASE_PATH') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'database', 'schedule.db')
+
+# Réglages par défaut des PRAGMA appliqués à chaque nouvelle connexion
+DEFAULT_SETTINGS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -16000)),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 64 * 1024 * 1024)),
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+    'foreign_keys': os.environ.get('SQLITE_FOREIGN_KEYS', 'ON'),
+}
+
+DEFAULT_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 8))
+
+# Fonctions appelées avec chaque nouvelle connexion (ex. set_trace_callback des benchmarks)
+_connect_hooks = []
+
+
+def add_connect_hook(hook):
+    """
+    Enregistre hook(conn), appelé à l'ouverture de chaque nouvelle connexion du pool.
+    Les connexions déjà ouvertes ne sont pas concernées (voir configure()).
+    """
+    if hook not in _connect_hooks:
+        _connect_hooks.append(hook)
+
+
+def remove_connect_hook(hook):
+    if hook in _connect_hooks:
+        _connect_hooks.remove(hook)
+
+
+class _DbTime(threading.local):
+    seconds = 0.0
+
+
+_db_time = _DbTime()
+
+
+def db_time():
+    """
+    Temps cumulé (secondes) passé dans SQLite par le fil courant
+    """
+    return _db_time.seconds
+
+
+class TimedCursor(sqlite3.Cursor):
+    """
+    Curseur qui cumule le temps d'exécution et de lecture des lignes (db_time())
+    """
+    def execute(self, *args):
+        start = perf_counter()
+        try:
+            return super().execute(*args)
+        finally:
+            _db_time.seconds += perf_counter() - start
+
+    def executemany(self, *args):
+        start = perf_counter()
+        try:
+            return super().executemany(*args)
+        finally:
+            _db_time.seconds += perf_counter() - start
+
+    def executescript(self, *args):
+        start = perf_counter()
+        try:
+            return super().executescript(*args)
+        finally:
+            _db_time.seconds += perf_counter() - start
+
+    def fetchone(self):
+        start = perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            _db_time.seconds += perf_counter() - start
+
+    def fetchmany(self, *args):
+        start = perf_counter()
+        try:
+            return super().fetchmany(*args)
+        finally:
+            _db_time.seconds += perf_counter() - start
+
+    def fetchall(self):
+        start = perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            _db_time.seconds += perf_counter() - start
+
+    def __next__(self):
+        start = perf_counter()
+        try:
+            return super().__next__()
+        finally:
+            _db_time.seconds += perf_counter() - start
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Connexion SQLite qui retourne dans son pool lors de close()
+    """
+    _pool = None
+
+    # Raccourcis execute* passés par un TimedCursor (le temps SQLite est mesuré)
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+    def executemany(self, *args):
+        return self.cursor().executemany(*args)
+
+    def executescript(self, *args):
+        return self.cursor().executescript(*args)
+
+    def commit(self):
+        start = perf_counter()
+        try:
+            super().commit()
+        finally:
+            _db_time.seconds += perf_counter() - start
+
+    def close(self):
+        pool = self._pool
+        if pool is None:
+            super().close()
+        else:
+            pool.release(self)
+
+    def close_physically(self):
+        """
+        Ferme réellement la connexion (utilisé par le pool)
+        """
+        self._pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """
+    Pool de connexions SQLite configurées avec les PRAGMA de performance
+    """
+    def __init__(self, path, size=DEFAULT_POOL_SIZE, settings=None):
+        self.path = path
+        self.size = size
+        self.settings = dict(DEFAULT_SETTINGS)
+        if settings:
+            self.settings.update(settings)
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.settings['busy_timeout'] / 1000.0,
+            check_same_thread=False,
+            factory=PooledConnection,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {int(self.settings['busy_timeout'])}")
+        conn.execute(f"PRAGMA journal_mode = {self.settings['journal_mode']}")
+        conn.execute(f"PRAGMA synchronous = {self.settings['synchronous']}")
+        conn.execute(f"PRAGMA cache_size = {int(self.settings['cache_size'])}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.settings['mmap_size'])}")
+        conn.execute(f"PRAGMA foreign_keys = {self.settings['foreign_keys']}")
+        conn._pool = self
+        for hook in _connect_hooks:
+            hook(conn)
+        return conn
+
+    def acquire(self):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._connect()
+        return conn
+
+    def release(self, conn):
+        # Une transaction laissée ouverte ne doit pas fuir vers la requête suivante
+        if conn.in_transaction:
+            conn.rollback()
+        conn.row_factory = sqlite3.Row
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close_physically()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close_physically()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DATABASE_PATH)
+    return _pool
+
+
+def configure(path=None, pool_size=None, **settings):
+    """
+    Reconfigure le pool (chemin, taille, PRAGMA). Les connexions existantes sont fermées.
+    """
+    global _pool, DATABASE_PATH
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        if path is not None:
+            DATABASE_PATH = path
+        _pool = ConnectionPool(
+            DATABASE_PATH,
+            size=DEFAULT_POOL_SIZE if pool_size is None else pool_size,
+            settings=settings,
+        )
+    return _pool
+
+
+# Pools hérités lors d'un fork: gardés référencés pour ne jamais être fermés dans l'enfant
+_inherited_pools = []
+
+
+def _reset_after_fork():
+    global _pool, _pool_lock
+    _pool_lock = threading.Lock()
+    inherited = _pool
+    if inherited is not None:
+        _inherited_pools.append(inherited)
+        # Mêmes réglages (configure()), sans les connexions du parent
+        _pool = ConnectionPool(inherited.path, size=inherited.size, settings=inherited.settings)
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# Fonction pour obtenir une connexion à la base de données
+def get_db_connection():
+    return get_pool().acquire()
+
+
+@contextmanager
+def transaction(conn, immediate=True):
+    """
+    Exécute un bloc dans une transaction explicite (BEGIN IMMEDIATE par défaut, pour
+    prendre le verrou d'écriture dès le début) : COMMIT en sortie, ROLLBACK sur exception.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
@@ -0,0 +1,80 @@
+"""
+Journalisation et diagnostics de l'API.
+
+Chaque module utilise son propre logger (logging.getLogger(__name__)). Les niveaux se
+règlent par variables d'environnement :
+    LOG_LEVEL             niveau global (INFO par défaut)
+    LOG_LEVELS            niveaux par module, ex. "routes=DEBUG,db=WARNING"
+    STATS_SNAPSHOT_RATE   proportion (0.0 à 1.0) des écritures qui journalisent un
+                          instantané de la table statistique (0 par défaut: aucune I/O)
+
+Les instantanés sont émis au niveau DEBUG sur le logger "diagnostics.stats".
+"""
+import logging
+import os
+import random
+
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(name)s] %(message)s'
+
+stats_logger = logging.getLogger('diagnostics.stats')
+
+_configured = False
+_snapshot_rate = 0.0
+
+
+def parse_module_levels(value):
+    """
+    Transforme "routes=DEBUG,db=WARNING" en {'routes': 'DEBUG', 'db': 'WARNING'}
+    """
+    levels = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            if name.strip() and level.strip():
+                levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level=None, module_levels=None, snapshot_rate=None):
+    """
+    Configure la journalisation de l'application (une seule fois sauf paramètres explicites)
+    """
+    global _configured, _snapshot_rate
+    explicit = level is not None or module_levels is not None or snapshot_rate is not None
+    if _configured and not explicit:
+        return
+
+    level = (level or os.environ.get('LOG_LEVEL', 'INFO')).upper()
+    if module_levels is None:
+        module_levels = parse_module_levels(os.environ.get('LOG_LEVELS'))
+    if snapshot_rate is None:
+        snapshot_rate = float(os.environ.get('STATS_SNAPSHOT_RATE', 0) or 0)
+
+    root = logging.getLogger()
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+    root.setLevel(level)
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _snapshot_rate = max(0.0, min(1.0, snapshot_rate))
+    if _snapshot_rate and not stats_logger.isEnabledFor(logging.DEBUG):
+        stats_logger.setLevel(logging.DEBUG)
+    _configured = True
+
+
+def maybe_log_stats_snapshot(conn):
+    """
+    Journalise la table statistique complète pour une fraction des écritures.
+    Ne fait aucune requête tant que le mode instantané n'est pas activé.
+    """
+    if not _snapshot_rate or random.random() >= _snapshot_rate:
+        return
+    if not stats_logger.isEnabledFor(logging.DEBUG):
+        return
+    rows = conn.execute('SELECT * FROM statistique').fetchall()
+    stats_logger.debug('Instantané statistique (%d lignes)', len(rows))
+    for row in rows:
+        stats_logger.debug('%s', dict(row))
@@ -0,0 +1,288 @@
+"""
+Diffusion des modifications du planning en temps réel (Server-Sent Events).
+
+Les routes d'écriture publient, après COMMIT, des événements compacts sur le broker
+partagé ; GET /api/events les transmet à chaque client abonné.
+
+Le broker ne garde pas de file par abonné : un seul tampon circulaire numéroté est
+partagé par tous, et les abonnés inactifs attendent sur une même Condition. Publier
+coûte O(1) quel que soit le nombre d'abonnés ; chaque abonné relit le tampon à partir
+du dernier numéro reçu (en-tête Last-Event-ID lors d'une reconnexion). Un abonné
+trop en retard (événements sortis du tampon) reçoit un événement "resync".
+
+Chaque abonné occupe un fil du serveur WSGI tant qu'il est connecté : max_subscribers
+(serve.py : moins que --threads) borne le nombre de flux par processus pour laisser des
+fils aux autres routes ; au-delà, subscribe() refuse et GET /api/events répond 503.
+
+Plusieurs processus serveur (serve.py --workers N) : chaque processus a son propre
+broker. Avec un bus partagé (SqliteEventBus, table event_bus), publier insère
+l'événement en base et un fil de relecture par processus le transmet à ses abonnés :
+les numéros sont communs à tous les processus.
+
+Types d'événements :
+    cells       cases modifiées, doublons des jours touchés, compteurs de statistique
+    infirmier   infirmier créé, modifié ou supprimé
+    stats       statistiques recalculées en bloc
+    resync      le client doit recharger ses données
+"""
+import bisect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from db import get_db_connection, transaction
+
+# Nombre d'événements conservés pour les reconnexions
+DEFAULT_CAPACITY = 1000
+
+# Intervalle des commentaires de maintien de connexion (secondes)
+HEARTBEAT_SECONDS = 15
+
+# Délai de reconnexion conseillé aux clients (millisecondes)
+RETRY_MS = 3000
+
+# Intervalle de relecture du bus partagé quand il est vide (secondes)
+BUS_POLL_SECONDS = 0.2
+
+# Lignes conservées dans event_bus (au moins la capacité du tampon)
+BUS_RETENTION = DEFAULT_CAPACITY
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(seq, event_type, payload):
+    """
+    Sérialise un événement au format text/event-stream
+    """
+    return f'id: {seq}\nevent: {event_type}\ndata: {payload}\n\n'
+
+
+class EventBroker:
+    """
+    Diffusion des événements à tous les abonnés via un tampon circulaire partagé
+    """
+    def __init__(self, capacity=DEFAULT_CAPACITY, max_subscribers=None):
+        self._capacity = capacity
+        self.max_subscribers = max_subscribers  # None: sans limite
+        self._bus = None
+        self.reset()
+
+    def reset(self, last_seq=0):
+        """
+        Vide le tampon (nouveau processus après fork, ou démarrage du bus partagé)
+        """
+        self._events = deque(maxlen=self._capacity)
+        self._seq = last_seq
+        self._cond = threading.Condition()
+        self._subscribers = 0
+        self._closed = False
+
+    @property
+    def last_seq(self):
+        return self._seq
+
+    @property
+    def subscribers(self):
+        return self._subscribers
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def attach_bus(self, bus):
+        """
+        Publie désormais via un bus partagé entre processus (voir SqliteEventBus)
+        """
+        self._bus = bus
+
+    def publish(self, event_type, data):
+        """
+        Ajoute un événement au tampon et réveille les abonnés. Retourne son numéro.
+        """
+        payload = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+        if self._bus is not None:
+            # Diffusé aux abonnés de ce processus par le fil de relecture du bus
+            return self._bus.publish(event_type, payload)
+        with self._cond:
+            self._seq += 1
+            self._events.append((self._seq, event_type, payload))
+            self._cond.notify_all()
+            return self._seq
+
+    def deliver(self, events):
+        """
+        Ajoute des événements déjà numérotés [(seq, type, payload)] (bus partagé)
+        """
+        with self._cond:
+            for seq, event_type, payload in events:
+                if seq > self._seq:
+                    self._events.append((seq, event_type, payload))
+                    self._seq = seq
+            self._cond.notify_all()
+
+    def close(self):
+        """
+        Termine les flux en cours (arrêt du serveur): les abonnés se reconnecteront
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def events_after(self, last_seq):
+        """
+        Retourne (événements de numéro > last_seq, trop_en_retard)
+        """
+        with self._cond:
+            if not self._events or self._seq <= last_seq:
+                return [], False
+            oldest = self._events[0][0]
+            if last_seq < oldest - 1:
+                return [], True
+            events = list(self._events)
+            if events[-1][0] - oldest == len(events) - 1:
+                # Numéros consécutifs: position directe dans le tampon
+                return events[last_seq - oldest + 1:], False
+            # Bus partagé: un numéro peut manquer (insertion annulée)
+            return events[bisect.bisect_right([event[0] for event in events], last_seq):], False
+
+    def wait(self, last_seq, timeout):
+        """
+        Attend un événement de numéro > last_seq (au plus timeout secondes)
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > last_seq or self._closed, timeout)
+        return self.events_after(last_seq)
+
+    def subscribe(self):
+        """
+        Réserve une place d'abonné. Retourne la fonction qui la libère (plusieurs appels
+        possibles), ou None si max_subscribers abonnés sont déjà connectés.
+        """
+        cond = self._cond
+        with cond:
+            if self.max_subscribers is not None and self._subscribers >= self.max_subscribers:
+                return None
+            self._subscribers += 1
+        return self._releaser(cond)
+
+    def _releaser(self, cond):
+        released = []
+
+        def release():
+            with cond:
+                # Après reset() (fork), le compteur de l'ancien tampon n'existe plus
+                if not released and cond is self._cond:
+                    self._subscribers -= 1
+                released.append(True)
+        return release
+
+    def stream(self, last_seq=None, heartbeat=HEARTBEAT_SECONDS, release=None):
+        """
+        Générateur text/event-stream pour un abonné. Sans last_seq, seuls les
+        événements publiés après l'abonnement sont transmis. release: place réservée
+        par subscribe() (réservée ici sinon, sans limite), libérée à la fin du flux.
+        """
+        if self._bus is not None:
+            self._bus.start()
+        if release is None:
+            with self._cond:
+                self._subscribers += 1
+            release = self._releaser(self._cond)
+        with self._cond:
+            if last_seq is None or last_seq > self._seq:
+                last_seq = self._seq
+        try:
+            yield f'retry: {RETRY_MS}\n\n'
+            while not self._closed:
+                events, missed = self.wait(last_seq, heartbeat)
+                if missed:
+                    last_seq = self._seq
+                    yield format_sse(last_seq, 'resync', json.dumps({'last_seq': last_seq}))
+                    continue
+                if not events:
+                    # Commentaire de maintien: détecte aussi les clients déconnectés
+                    yield f': ping {int(time.time())}\n\n'
+                    continue
+                for seq, event_type, payload in events:
+                    yield format_sse(seq, event_type, payload)
+                last_seq = events[-1][0]
+        finally:
+            release()
+
+
+class SqliteEventBus:
+    """
+    Bus d'événements partagé entre processus: publication dans la table event_bus,
+    relecture par un fil par processus qui alimente le broker local
+    """
+    def __init__(self, broker, poll_interval=BUS_POLL_SECONDS, retention=BUS_RETENTION):
+        self._broker = broker
+        self.poll_interval = poll_interval
+        self.retention = max(retention, DEFAULT_CAPACITY)
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def publish(self, event_type, payload):
+        self.start()
+        conn = get_db_connection()
+        try:
+            with transaction(conn):
+                seq = conn.execute(
+                    'INSERT INTO event_bus (event_type, payload) VALUES (?, ?)', (event_type, payload)
+                ).lastrowid
+                if seq % 100 == 0:
+                    conn.execute('DELETE FROM event_bus WHERE seq <= ?', (seq - self.retention,))
+        finally:
+            conn.close()
+        return seq
+
+    def start(self):
+        """
+        Démarre la relecture dans ce processus (une fois par processus, après fork
+        compris), à partir du dernier événement publié
+        """
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            conn = get_db_connection()
+            try:
+                last_seq = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM event_bus').fetchone()[0]
+            finally:
+                conn.close()
+            self._broker.reset(last_seq)
+            thread = threading.Thread(target=self._run, args=(last_seq,), name='event-bus', daemon=True)
+            thread.start()
+            self._pid = os.getpid()
+
+    def _run(self, last_seq):
+        while not self._broker.closed:
+            try:
+                conn = get_db_connection()
+                try:
+                    rows = conn.execute(
+                        'SELECT seq, event_type, payload FROM event_bus WHERE seq > ? ORDER BY seq LIMIT ?',
+                        (last_seq, DEFAULT_CAPACITY)
+                    ).fetchall()
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                logger.exception('Lecture du bus d\'événements impossible')
+                rows = []
+            if rows:
+                self._broker.deliver([tuple(row) for row in rows])
+                last_seq = rows[-1][0]
+            else:
+                time.sleep(self.poll_interval)
+
+
+# Broker partagé par tout le processus
+broker = EventBroker()
+
+# Un processus enfant repart d'un tampon vide (verrous et abonnés du parent non hérités)
+os.register_at_fork(after_in_child=broker.reset)
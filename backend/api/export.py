@@ -0,0 +1,73 @@
+"""
+Export du planning en flux (CSV ou NDJSON) sur une période quelconque.
+
+Les lignes sont lues par paquets sur un curseur SQLite (parcours de la clé primaire
+date, room de assignment) et envoyées au fur et à mesure par un générateur : la
+mémoire utilisée ne dépend pas de la longueur de la période. La lecture se fait dans
+une transaction de lecture (instantané cohérent) ; en WAL elle ne bloque pas les
+écritures.
+"""
+import csv
+import io
+import json
+
+# Lignes lues par paquet (et écrites par morceau de réponse)
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+EXPORT_COLUMNS = ['date', 'salle', 'infirmier_id', 'nom', 'prenom', 'status', 'label', 'state']
+
+EXPORT_QUERY = """
+    SELECT a.date, a.room, a.infirmier_id, i.nom, i.prenom, i.status, a.label, a.state
+    FROM assignment a
+    LEFT JOIN listeInfirmier i ON i.id = a.infirmier_id
+    WHERE a.date BETWEEN ? AND ?
+    ORDER BY a.date, a.room
+"""
+
+
+def _csv_chunks(rows_batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in rows_batches:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _ndjson_chunks(rows_batches):
+    for rows in rows_batches:
+        yield ''.join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + '\n'
+            for row in rows
+        )
+
+
+def export_planning(conn, debut, fin, export_format='csv', batch_size=EXPORT_BATCH_SIZE):
+    """
+    Générateur des morceaux de l'export de [debut, fin]. La connexion reste ouverte
+    pendant le flux: l'appelant la ferme quand la réponse est terminée.
+    """
+    def batches():
+        cursor = conn.cursor()
+        # Pas de conversion en sqlite3.Row: des tuples suffisent et coûtent moins cher
+        cursor.row_factory = None
+        cursor.execute(EXPORT_QUERY, (debut, fin))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+
+    # Instantané cohérent pour toute la durée de l'export (annulé au retour au pool)
+    conn.execute('BEGIN')
+    chunks = _csv_chunks(batches()) if export_format == 'csv' else _ndjson_chunks(batches())
+    yield from chunks
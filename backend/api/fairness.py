@@ -0,0 +1,168 @@
+"""
+Analyse d'équité de la répartition des salles (matrice infirmiers × salles).
+
+Les compteurs (statistique, ou une période via l'agrégat mensuel) sont chargés dans
+une matrice NumPy ; toutes les mesures sont calculées par opérations vectorisées :
+    - entropie de rotation par infirmier (0 = toujours la même salle, 1 = rotation parfaite)
+    - écart à la part équitable: un infirmier qui a fait T gardes devrait en avoir fait
+      T × (part de la salle dans le total) dans chaque salle
+    - indice de Gini par salle et sur la charge totale
+    - échanges suggérés: A cède une garde en salle X à B, B cède une garde en salle Y
+      à A (charges inchangées), classés par réduction de la somme des écarts au carré
+"""
+import numpy as np
+
+from assignments import SALLE_NAMES
+from stat_rollup import range_counts
+
+# Nombre d'échanges suggérés par défaut
+DEFAULT_SWAP_LIMIT = 10
+
+
+def load_matrix(conn, debut=None, fin=None):
+    """
+    Retourne (ids, labels, matrice) : une ligne par infirmier, une colonne par salle.
+    Sans période, les compteurs de statistique ; sinon les comptes de [debut, fin].
+    """
+    cols = ', '.join(f'COALESCE(s.{salle}, 0)' for salle in SALLE_NAMES)
+    rows = conn.execute(
+        f"""
+        SELECT i.id, i.prenom, i.nom, i.status, {cols}
+        FROM listeInfirmier i
+        LEFT JOIN statistique s ON s.infirmierID = i.id
+        ORDER BY i.prenom, i.nom
+        """
+    ).fetchall()
+    ids = [row[0] for row in rows]
+    labels = [f'{row[1]} {row[2]} - {row[3]}' for row in rows]
+
+    if debut is None and fin is None:
+        matrix = np.array([tuple(row)[4:] for row in rows], dtype=np.float64).reshape(len(rows), len(SALLE_NAMES))
+    else:
+        matrix = np.zeros((len(rows), len(SALLE_NAMES)), dtype=np.float64)
+        index_of_nurse = {nurse_id: n for n, nurse_id in enumerate(ids)}
+        index_of_room = {salle: r for r, salle in enumerate(SALLE_NAMES)}
+        for (nurse_id, salle), count in range_counts(conn, debut, fin).items():
+            n = index_of_nurse.get(nurse_id)
+            if n is not None and salle in index_of_room:
+                matrix[n, index_of_room[salle]] = count
+    return ids, labels, matrix
+
+
+def rotation_entropy(matrix):
+    """Entropie normalisée (0 à 1) de la répartition de chaque infirmier sur les salles."""
+    totals = matrix.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = np.where(totals > 0, matrix / totals, 0.0)
+        terms = np.where(p > 0, p * np.log(p), 0.0)
+    # 0.0 - x plutôt que -x: une seule salle donne 0.0 et non -0.0 dans le JSON
+    return 0.0 - terms.sum(axis=1) / np.log(matrix.shape[1])
+
+
+def fair_share_deviation(matrix):
+    """Écart (gardes réelles - gardes attendues) pour chaque (infirmier, salle)."""
+    grand_total = matrix.sum()
+    if grand_total == 0:
+        return np.zeros_like(matrix)
+    room_share = matrix.sum(axis=0) / grand_total
+    expected = matrix.sum(axis=1, keepdims=True) * room_share
+    return matrix - expected
+
+
+def gini(values, axis=0):
+    """Indice de Gini (0 = égalité parfaite) le long d'un axe (non vide)."""
+    values = np.sort(np.asarray(values, dtype=np.float64), axis=axis)
+    n = values.shape[axis]
+    shape = [1] * values.ndim
+    shape[axis] = n
+    ranks = np.arange(1, n + 1, dtype=np.float64).reshape(shape)
+    sums = values.sum(axis=axis)
+    weighted = (ranks * values).sum(axis=axis)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = np.where(sums > 0, (2 * weighted) / (n * sums) - (n + 1) / n, 0.0)
+    return result
+
+
+def suggest_swaps(matrix, deviation, limit=DEFAULT_SWAP_LIMIT):
+    """
+    Meilleur échange pour chaque paire de salles X < Y: A (qui a une garde en X)
+    la cède à B, B cède à A une garde en Y. Gain = baisse de la somme des écarts au carré:
+        2 × (D[A,X] - D[A,Y] + D[B,Y] - D[B,X]) - 4
+    Retourne [(gain, A, B, X, Y)] triés par gain décroissant (gains positifs uniquement).
+    """
+    nurses, rooms = matrix.shape
+    if nurses < 2:
+        return []
+    # diff[n, x, y] = D[n, x] - D[n, y], candidats A: au moins une garde en X
+    diff = deviation[:, :, None] - deviation[:, None, :]
+    giver = np.where((matrix > 0)[:, :, None], diff, -np.inf)
+    best_a = giver.argmax(axis=0)             # [x, y]
+    best_a_value = giver.max(axis=0)
+    # B pour (X, Y) = meilleur donneur de Y vers X
+    best_b = best_a.T
+    best_b_value = best_a_value.T
+    gains = 2 * (best_a_value + best_b_value) - 4
+    gains[best_a == best_b] = -np.inf
+    # (Y, X) est le même échange que (X, Y), A et B inversés: une seule moitié (et
+    # pas la diagonale) est classée
+    gains[np.tril_indices(rooms)] = -np.inf
+
+    order = np.argsort(gains, axis=None)[::-1]
+    swaps = []
+    for flat in order[:limit]:
+        x, y = divmod(int(flat), rooms)
+        gain = gains[x, y]
+        if not np.isfinite(gain) or gain <= 0:
+            break
+        swaps.append((float(gain), int(best_a[x, y]), int(best_b[x, y]), x, y))
+    return swaps
+
+
+def fairness_report(conn, debut=None, fin=None, swap_limit=DEFAULT_SWAP_LIMIT, detail=False):
+    """
+    Rapport complet, au format JSON de /api/statistiques/fairness.
+    Les écarts par salle de chaque infirmier ne sont inclus qu'avec detail=True.
+    """
+    ids, labels, matrix = load_matrix(conn, debut, fin)
+    totals = matrix.sum(axis=1)
+    entropy = rotation_entropy(matrix) if len(ids) else np.zeros(0)
+    deviation = fair_share_deviation(matrix)
+    # Part des gardes à déplacer pour atteindre la part équitable
+    with np.errstate(divide='ignore', invalid='ignore'):
+        imbalance = np.where(totals > 0, np.abs(deviation).sum(axis=1) / (2 * totals), 0.0)
+    room_gini = gini(matrix, axis=0) if len(ids) else np.zeros(len(SALLE_NAMES))
+
+    # Arrondis et conversions vectorisés (tolist) plutôt que valeur par valeur
+    columns = zip(ids, labels, totals.astype(np.int64).tolist(),
+                  np.round(entropy, 4).tolist(), np.round(imbalance, 4).tolist())
+    nurses = [
+        {'id': nurse_id, 'label': label, 'total': total, 'entropy': ent, 'imbalance': imb}
+        for nurse_id, label, total, ent, imb in columns
+    ]
+    if detail:
+        for nurse, values in zip(nurses, np.round(deviation, 2).tolist()):
+            nurse['deviation'] = values
+
+    swaps = [
+        {
+            'from': {'id': ids[a], 'label': labels[a]},
+            'to': {'id': ids[b], 'label': labels[b]},
+            'give_room': SALLE_NAMES[x],
+            'take_room': SALLE_NAMES[y],
+            'gain': round(gain, 2),
+        }
+        for gain, a, b, x, y in suggest_swaps(matrix, deviation, swap_limit)
+    ]
+    active = totals > 0
+    return {
+        'rooms': SALLE_NAMES,
+        'nurses': nurses,
+        'room_gini': np.round(np.atleast_1d(room_gini), 4).tolist(),
+        'summary': {
+            'total': int(totals.sum()),
+            'load_gini': round(float(gini(totals)), 4) if len(ids) else 0.0,
+            'mean_entropy': round(float(entropy[active].mean()), 4) if active.any() else 0.0,
+            'mean_imbalance': round(float(imbalance[active].mean()), 4) if active.any() else 0.0,
+        },
+        'swaps': swaps,
+    }
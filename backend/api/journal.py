@@ -0,0 +1,143 @@
+"""
+Lecture et compaction du journal des modifications (synchronisation par delta).
+
+Le journal change_journal est alimenté par les triggers de la migration 0007 sur
+assignment, statistique et listeInfirmier, et de la migration 0012 sur absence (lu
+par conflicts.py, absent de la réponse de /changes). Un client garde le dernier numéro reçu
+(seq) et demande /api/changes?since=<seq> : seules les entités modifiées depuis
+lui sont renvoyées, dans leur dernier état.
+
+Compaction :
+    - fusion: une entrée remplacée par une entrée plus récente de la même entité est
+      supprimée (sans effet pour les clients: la plus récente porte l'état final)
+    - troncature: au-delà de la rétention, les plus anciennes entrées sont supprimées
+      et floor_seq avance; un client plus ancien que floor_seq doit tout recharger
+
+Écritures en masse (import) : la journalisation des cases est suspendue le temps du
+bloc journal_suspended(), puis floor_seq passe au-delà du dernier numéro.
+"""
+import json
+from contextlib import contextmanager
+
+from assignments import SALLE_NAMES
+
+# Nombre maximum d'entrées lues par appel de /changes
+DEFAULT_CHANGES_LIMIT = 5000
+
+
+def get_journal_state(conn):
+    """
+    Retourne (dernier numéro, floor_seq)
+    """
+    row = conn.execute(
+        """
+        SELECT COALESCE((SELECT MAX(seq) FROM change_journal), 0) AS last_seq, floor_seq
+        FROM journal_state WHERE id = 1
+        """
+    ).fetchone()
+    if row is None:
+        return 0, 0
+    # Journal vide après troncature: le dernier numéro connu est au moins floor_seq
+    return max(row['last_seq'], row['floor_seq']), row['floor_seq']
+
+
+def read_changes(conn, since, limit=DEFAULT_CHANGES_LIMIT):
+    """
+    Modifications de numéro > since, fusionnées par entité (dernier état gagnant).
+    Retourne None si le client doit tout recharger, sinon
+    {last_seq, more, cells: [...], stats: [...], infirmiers: [...]}.
+    """
+    last_seq, floor_seq = get_journal_state(conn)
+    # Trop en retard (entrées tronquées) ou numéro inconnu (base réinitialisée)
+    if since < floor_seq or since > last_seq:
+        return None
+
+    rows = conn.execute(
+        'SELECT seq, entity, entity_key, op, data FROM change_journal '
+        'WHERE seq > ? ORDER BY seq LIMIT ?',
+        (since, limit + 1)
+    ).fetchall()
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest = {}
+    for row in rows:
+        latest[(row['entity'], row['entity_key'])] = row
+    cells, stats, infirmiers = [], [], []
+    for (entity, _), row in latest.items():
+        data = json.loads(row['data'])
+        if entity == 'cell':
+            cells.append(data)
+        elif entity == 'stat':
+            if row['op'] == 'delete':
+                stats.append({'id': data['id'], 'deleted': True})
+            else:
+                stats.append({'id': data['id'], 'data': [data[salle] for salle in SALLE_NAMES]})
+        elif entity == 'infirmier':
+            if row['op'] == 'delete':
+                data['deleted'] = True
+            infirmiers.append(data)
+
+    return {
+        'last_seq': rows[-1]['seq'] if rows else since,
+        'more': more,
+        'cells': cells,
+        'stats': stats,
+        'infirmiers': infirmiers,
+    }
+
+
+def compact_journal(conn, retention=None):
+    """
+    Fusionne les entrées remplacées puis tronque au-delà de la rétention
+    (dans la transaction courante). Retourne {merged, truncated, floor_seq}.
+    """
+    if retention is not None:
+        conn.execute('UPDATE journal_state SET retention = ? WHERE id = 1', (int(retention),))
+
+    merged = conn.execute(
+        """
+        DELETE FROM change_journal
+        WHERE seq < (
+            SELECT MAX(j.seq) FROM change_journal j
+            WHERE j.entity = change_journal.entity AND j.entity_key = change_journal.entity_key
+        )
+        """
+    ).rowcount
+
+    conn.execute(
+        """
+        UPDATE journal_state
+        SET floor_seq = MAX(floor_seq, COALESCE((SELECT MAX(seq) FROM change_journal), 0) - retention)
+        WHERE id = 1
+        """
+    )
+    truncated = conn.execute(
+        'DELETE FROM change_journal WHERE seq <= (SELECT floor_seq FROM journal_state WHERE id = 1)'
+    ).rowcount
+    floor_seq = conn.execute('SELECT floor_seq FROM journal_state WHERE id = 1').fetchone()[0]
+    return {'merged': merged, 'truncated': truncated, 'floor_seq': floor_seq}
+
+
+@contextmanager
+def journal_suspended(conn):
+    """
+    Suspend la journalisation des cases le temps d'une écriture en masse (dans la
+    transaction courante). En sortie, floor_seq dépasse le dernier numéro attribué:
+    tout client, même à jour, reçoit resync_required au prochain /changes.
+    """
+    conn.execute('UPDATE journal_state SET suspended = 1 WHERE id = 1')
+    try:
+        yield conn
+    finally:
+        conn.execute('UPDATE journal_state SET suspended = 0 WHERE id = 1')
+    last_seq, _ = get_journal_state(conn)
+    floor_seq = last_seq + 1
+    conn.execute('UPDATE journal_state SET floor_seq = ? WHERE id = 1', (floor_seq,))
+    conn.execute('DELETE FROM change_journal WHERE seq <= ?', (floor_seq,))
+    # Les prochains numéros (AUTOINCREMENT) doivent rester au-delà de floor_seq
+    updated = conn.execute(
+        "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'change_journal'", (floor_seq,)
+    ).rowcount
+    if not updated:
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('change_journal', ?)", (floor_seq,))
@@ -0,0 +1,171 @@
+"""
+Index en mémoire libellé -> id infirmier (et id -> libellé).
+
+Les cases du planning stockent le libellé "Prenom Nom - Status". Plutôt que de
+découper ce libellé et d'interroger listeInfirmier à chaque affectation, l'index
+est construit une fois depuis listeInfirmier puis tenu à jour par les routes
+d'ajout, de modification et de suppression d'infirmier.
+
+La résolution se fait sur le libellé complet (espaces normalisés) : les prénoms
+composés ou les noms contenant des tirets sont donc résolus correctement.
+
+Avec plusieurs processus serveur (ou un script d'import lancé à côté), un autre
+processus peut modifier listeInfirmier : l'index retient le compteur
+cache_version.listeInfirmier (incrémenté par trigger) de son chargement et se
+reconstruit dès qu'il a changé. Les routes d'infirmier transmettent à upsert() /
+remove() le compteur lu dans leur transaction d'écriture : l'index mis à jour sur place
+le retient s'il suit directement le sien (aucune autre écriture entre-temps), sinon la
+prochaine vérification le reconstruit.
+"""
+import sqlite3
+import threading
+
+
+def format_label(prenom, nom, status=None):
+    """
+    Construit le libellé canonique d'un infirmier
+    """
+    name = f"{prenom} {nom}".strip()
+    return f"{name} - {status}" if status else name
+
+
+def normalize_label(label):
+    """
+    Normalise un libellé pour la recherche (espaces superflus supprimés)
+    """
+    if not label:
+        return None
+    return ' '.join(str(label).split()) or None
+
+
+class LabelIndex:
+    """
+    Correspondance bidirectionnelle libellé <-> id infirmier
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._version = None   # cache_version de listeInfirmier au chargement
+        self._by_label = {}   # libellé complet normalisé -> id
+        self._by_name = {}    # "Prenom Nom" normalisé -> [ids] (libellé sans statut)
+        self._by_id = {}      # id -> (libellé complet, "Prenom Nom")
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    @staticmethod
+    def read_version(conn):
+        """
+        Compteur de modifications de listeInfirmier (None avant la migration 0009)
+        """
+        try:
+            row = conn.execute(
+                "SELECT version FROM cache_version WHERE name = 'listeInfirmier'"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return row[0] if row else None
+
+    def load(self, conn, version=None):
+        """
+        (Re)construit l'index depuis la table listeInfirmier
+        """
+        if version is None:
+            version = self.read_version(conn)
+        rows = conn.execute('SELECT id, prenom, nom, status FROM listeInfirmier ORDER BY id').fetchall()
+        with self._lock:
+            self._by_label = {}
+            self._by_name = {}
+            self._by_id = {}
+            for row in rows:
+                self._add(row['id'], row['prenom'], row['nom'], row['status'])
+            self._version = version
+            self._loaded = True
+
+    def ensure_loaded(self, conn):
+        """
+        Charge l'index s'il ne l'est pas, ou le recharge si listeInfirmier a été
+        modifiée ailleurs depuis (une lecture de clé primaire par appel)
+        """
+        version = self.read_version(conn)
+        if not self._loaded or version != self._version:
+            self.load(conn, version)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = False
+
+    def _add(self, infirmier_id, prenom, nom, status):
+        label = normalize_label(format_label(prenom, nom, status))
+        name = normalize_label(format_label(prenom, nom))
+        self._by_id[infirmier_id] = (label, name)
+        # En cas d'homonymes, le plus ancien id reste prioritaire (comme l'ancien LIMIT 1)
+        self._by_label.setdefault(label, infirmier_id)
+        ids = self._by_name.setdefault(name, [])
+        ids.append(infirmier_id)
+        ids.sort()
+
+    def _remove(self, infirmier_id):
+        entry = self._by_id.pop(infirmier_id, None)
+        if entry is None:
+            return
+        label, name = entry
+        if self._by_label.get(label) == infirmier_id:
+            del self._by_label[label]
+            # Rétablir un éventuel homonyme restant
+            for other_id, (other_label, _) in sorted(self._by_id.items()):
+                if other_label == label:
+                    self._by_label[label] = other_id
+                    break
+        ids = self._by_name.get(name)
+        if ids and infirmier_id in ids:
+            ids.remove(infirmier_id)
+            if not ids:
+                del self._by_name[name]
+
+    def _advance(self, version):
+        # Une seule ligne écrite par la route: le compteur avance d'exactement 1
+        if version is not None and self._version is not None and version == self._version + 1:
+            self._version = version
+
+    def upsert(self, infirmier_id, prenom, nom, status, version=None):
+        """
+        Ajoute ou met à jour un infirmier. version: cache_version lu dans la
+        transaction qui a écrit cette ligne (avant COMMIT)
+        """
+        with self._lock:
+            self._remove(infirmier_id)
+            self._add(infirmier_id, prenom, nom, status)
+            self._advance(version)
+
+    def remove(self, infirmier_id, version=None):
+        with self._lock:
+            self._remove(infirmier_id)
+            self._advance(version)
+
+    def lookup(self, label):
+        """
+        Retourne l'id de l'infirmier correspondant au libellé, ou None
+        """
+        key = normalize_label(label)
+        if key is None:
+            return None
+        infirmier_id = self._by_label.get(key)
+        if infirmier_id is None:
+            # Libellé sans statut: "Prenom Nom"
+            ids = self._by_name.get(key)
+            if ids:
+                infirmier_id = ids[0]
+        return infirmier_id
+
+    def label_for(self, infirmier_id):
+        """
+        Retourne le libellé canonique d'un infirmier, ou None
+        """
+        entry = self._by_id.get(infirmier_id)
+        return entry[0] if entry else None
+
+
+# Index partagé par tout le processus
+label_index = LabelIndex()
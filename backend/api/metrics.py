@@ -0,0 +1,277 @@
+"""
+Métriques des requêtes HTTP au format Prometheus (GET /api/metrics).
+
+Pour chaque route (règle Flask, ex. /api/infirmiers/<int:id>) et méthode :
+    http_requests_total               nombre de requêtes par code de statut
+    http_request_duration_seconds     histogramme des latences (jusqu'à l'envoi des
+                                      en-têtes pour les réponses en flux)
+    http_request_db_seconds           histogramme du temps passé dans SQLite (db_time())
+    http_request_size_bytes           histogramme des tailles de corps de requête
+    http_response_size_bytes         histogramme des tailles de réponse (hors flux)
+
+Coût minimal pour rester actif en permanence : chaque fil cumule ses propres séries
+(aucun verrou sur le chemin d'une requête) ; les séries de tous les fils ne sont
+fusionnées qu'à la lecture de /api/metrics. Les séries d'un fil terminé sont reportées
+dans un cumul commun.
+
+Plusieurs processus (serve.py) : si METRICS_DIR est défini, chaque processus y écrit
+périodiquement un instantané de ses séries, et /api/metrics additionne ceux de tous
+les processus (à METRICS_FLUSH_SECONDS près pour les autres processus).
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, request
+
+from db import db_time
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Bornes des histogrammes (secondes, octets)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)
+
+# Intervalle d'écriture des instantanés dans METRICS_DIR (secondes)
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Latence des requêtes HTTP', LATENCY_BUCKETS),
+    'http_request_db_seconds': ('Temps passé dans SQLite par requête', LATENCY_BUCKETS),
+    'http_request_size_bytes': ('Taille du corps des requêtes', SIZE_BUCKETS),
+    'http_response_size_bytes': ('Taille des réponses (hors réponses en flux)', SIZE_BUCKETS),
+}
+COUNTERS = {
+    'http_requests_total': 'Nombre de requêtes HTTP par route, méthode et code de statut',
+}
+
+
+def _merge(target, series):
+    """
+    Ajoute des séries {(métrique, labels): [valeurs]} à target
+    """
+    for key, values in series:
+        current = target.get(key)
+        if current is None:
+            target[key] = list(values)
+        else:
+            for i, value in enumerate(values):
+                current[i] += value
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_number(value):
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+class MetricsRegistry:
+    """
+    Séries cumulées par fil: {(métrique, labels): [valeurs]}. Histogramme: comptes
+    par intervalle (un de plus que de bornes), puis somme et nombre d'observations.
+    """
+    LABELS = ('route', 'method')
+
+    def __init__(self, metrics_dir=None):
+        self.metrics_dir = metrics_dir
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stores = []    # [(fil, séries)]
+        self._retired = {}   # séries des fils terminés
+        self._flusher_pid = None
+
+    def _thread_store(self):
+        store = getattr(self._local, 'store', None)
+        if store is None:
+            store = self._local.store = {}
+            with self._lock:
+                self._collect_finished()
+                self._stores.append((threading.current_thread(), store))
+        return store
+
+    def _collect_finished(self):
+        alive = []
+        for thread, store in self._stores:
+            if thread.is_alive():
+                alive.append((thread, store))
+            else:
+                _merge(self._retired, list(store.items()))
+        self._stores = alive
+
+    def _observe(self, store, metric, labels, value):
+        buckets = HISTOGRAMS[metric][1]
+        key = (metric, labels)
+        values = store.get(key)
+        if values is None:
+            values = store[key] = [0] * (len(buckets) + 1) + [0.0, 0]
+        values[bisect_left(buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def record(self, route, method, status, seconds, db_seconds, request_bytes, response_bytes):
+        """
+        Enregistre une requête (appelé par le fil qui l'a traitée)
+        """
+        store = self._thread_store()
+        labels = (route, method)
+        key = ('http_requests_total', labels + (str(status),))
+        values = store.get(key)
+        if values is None:
+            store[key] = [1]
+        else:
+            values[0] += 1
+        self._observe(store, 'http_request_duration_seconds', labels, seconds)
+        self._observe(store, 'http_request_db_seconds', labels, db_seconds)
+        self._observe(store, 'http_request_size_bytes', labels, request_bytes)
+        if response_bytes is not None:
+            self._observe(store, 'http_response_size_bytes', labels, response_bytes)
+        if self.metrics_dir and self._flusher_pid != os.getpid():
+            self._start_flusher()
+
+    def snapshot(self):
+        """
+        Séries de ce processus, tous fils confondus
+        """
+        with self._lock:
+            self._collect_finished()
+            totals = {}
+            _merge(totals, list(self._retired.items()))
+            for _, store in self._stores:
+                # Copie atomique (GIL): le fil propriétaire peut écrire pendant la lecture
+                _merge(totals, list(store.items()))
+        return totals
+
+    # Plusieurs processus: instantanés dans metrics_dir
+
+    def _snapshot_path(self, pid):
+        return os.path.join(self.metrics_dir, f'metrics_{pid}.json')
+
+    def flush(self):
+        """
+        Écrit l'instantané de ce processus dans metrics_dir (remplacement atomique)
+        """
+        path = self._snapshot_path(os.getpid())
+        data = [[metric, list(labels), values] for (metric, labels), values in self.snapshot().items()]
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        os.makedirs(self.metrics_dir, exist_ok=True)
+
+        def run():
+            while True:
+                time.sleep(METRICS_FLUSH_SECONDS)
+                try:
+                    self.flush()
+                except OSError:
+                    pass
+
+        threading.Thread(target=run, name='metrics-flush', daemon=True).start()
+
+    def collect(self):
+        """
+        Séries de tous les processus (instantanés de metrics_dir) et de celui-ci
+        """
+        totals = self.snapshot()
+        if not self.metrics_dir or not os.path.isdir(self.metrics_dir):
+            return totals
+        own = os.path.basename(self._snapshot_path(os.getpid()))
+        for filename in os.listdir(self.metrics_dir):
+            if not filename.endswith('.json') or filename == own:
+                continue
+            try:
+                with open(os.path.join(self.metrics_dir, filename)) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            _merge(totals, [((metric, tuple(labels)), values) for metric, labels, values in data])
+        return totals
+
+    def render(self, gauges=None):
+        """
+        Texte au format d'exposition Prometheus. gauges: {nom: (aide, valeur)}
+        """
+        series = self.collect()
+        lines = []
+        for metric, help_text in COUNTERS.items():
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} counter')
+            for (name, labels), values in sorted(series.items()):
+                if name == metric:
+                    lines.append(f'{metric}{_format_labels(self.LABELS + ("status",), labels)} {values[0]}')
+        for metric, (help_text, buckets) in HISTOGRAMS.items():
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} histogram')
+            for (name, labels), values in sorted(series.items()):
+                if name != metric:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), values):
+                    cumulative += count
+                    le = 'le="{}"'.format(bound if bound == '+Inf' else _format_number(bound))
+                    lines.append(f'{metric}_bucket{_format_labels(self.LABELS, labels, le)} {cumulative}')
+                lines.append(f'{metric}_sum{_format_labels(self.LABELS, labels)} {_format_number(values[-2])}')
+                lines.append(f'{metric}_count{_format_labels(self.LABELS, labels)} {values[-1]}')
+        for metric, (help_text, value) in (gauges or {}).items():
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} gauge')
+            lines.append(f'{metric} {_format_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# Registre du processus (METRICS_DIR: agrégation entre processus)
+registry = MetricsRegistry(os.environ.get('METRICS_DIR') or None)
+
+
+def init_app(app):
+    """
+    Mesure chaque requête de l'application (hooks before/after_request)
+    """
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_db_start = db_time()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            registry.record(
+                route,
+                request.method,
+                response.status_code,
+                time.perf_counter() - start,
+                db_time() - g.pop('metrics_db_start', 0.0),
+                request.content_length or 0,
+                None if response.is_streamed else response.calculate_content_length(),
+            )
+        return response
+
+    @app.teardown_request
+    def record_failure(error):
+        # Exception non gérée: after_request n'a pas été appelé
+        start = g.pop('metrics_start', None)
+        if error is not None and start is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            registry.record(route, request.method, 500, time.perf_counter() - start,
+                            db_time() - g.pop('metrics_db_start', 0.0), request.content_length or 0, None)
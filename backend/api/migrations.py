@@ -0,0 +1,104 @@
+"""
+Moteur de migrations versionnées du schéma SQLite.
+
+Les migrations sont des fichiers `database/migrations/NNNN_description.sql` appliqués
+dans l'ordre de leur numéro. La table `schema_version` garde la trace des versions
+déjà appliquées ; chaque migration s'exécute dans sa propre transaction.
+
+Une migration peut aussi être un module `NNNN_description.py` dont la fonction
+build_sql() retourne le script à exécuter : SQL généré depuis le code (ex. une
+colonne par salle de SALLE_NAMES), appliqué de la même façon qu'un fichier .sql.
+"""
+import importlib.util
+import os
+import re
+import sqlite3
+import logging
+
+# Dossier contenant les fichiers de migration
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'database', 'migrations')
+
+MIGRATION_FILE_RE = re.compile(r'^(\d+)_([\w-]+)\.(?:sql|py)$')
+
+logger = logging.getLogger(__name__)
+
+
+def list_migrations(migrations_dir=MIGRATIONS_DIR):
+    """
+    Retourne la liste triée des migrations disponibles: [(version, nom, chemin), ...]
+    """
+    migrations = []
+    for filename in os.listdir(migrations_dir):
+        match = MIGRATION_FILE_RE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(migrations_dir, filename)))
+    migrations.sort()
+    return migrations
+
+
+def read_migration(path):
+    """
+    Script SQL d'une migration: contenu du fichier .sql, ou build_sql() du module .py
+    """
+    if path.endswith('.py'):
+        spec = importlib.util.spec_from_file_location(
+            f'migration_{os.path.splitext(os.path.basename(path))[0]}', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module.build_sql()
+    with open(path, 'r') as f:
+        return f.read()
+
+
+def ensure_version_table(conn):
+    conn.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        '''
+    )
+    conn.commit()
+
+
+def get_current_version(conn):
+    ensure_version_table(conn)
+    row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(conn, migrations_dir=MIGRATIONS_DIR):
+    """
+    Applique toutes les migrations dont la version est supérieure à la version courante.
+    Retourne la liste des versions appliquées.
+    """
+    current = get_current_version(conn)
+    applied = []
+    for version, name, path in list_migrations(migrations_dir):
+        if version <= current:
+            continue
+        sql = read_migration(path)
+        # La ligne schema_version est insérée en premier: si un autre processus
+        # applique la même migration en parallèle, l'insertion échoue et on passe.
+        script = (
+            'BEGIN IMMEDIATE;\n'
+            f"INSERT INTO schema_version (version, name) VALUES ({version}, '{name}');\n"
+            f'{sql}\n'
+            'COMMIT;'
+        )
+        try:
+            conn.executescript(script)
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            continue
+        except sqlite3.Error:
+            conn.rollback()
+            logger.exception('Échec de la migration %04d_%s', version, name)
+            raise
+        logger.info('Migration appliquée: %04d_%s', version, name)
+        applied.append(version)
+    return applied
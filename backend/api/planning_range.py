@@ -0,0 +1,134 @@
+"""
+Lecture du planning sur une longue période (mois, année) par pages de jours.
+
+Pagination par clé sur la date : une page commence après la dernière date de la page
+précédente (?after=), en parcourant la clé primaire (date, room) de assignment. Le
+coût d'une page ne dépend donc pas de sa position dans la période, et une écriture
+entre deux pages ne décale pas les suivantes (contrairement à un OFFSET).
+
+Seuls les jours ayant au moins une case occupée ou fermée sont transmis, et seules
+leurs cases non vides. Deux formes de réponse :
+    lignes     {"date": ..., "labels": {salle: libellé}, "states": {salle: état}}
+    colonnes   ["date", [n° de libellé par salle], [état par salle] ou null] : l'ordre
+               des salles est donné une seule fois ("rooms"), chaque libellé aussi
+               ("labels", en fin de réponse, numéroté dans l'ordre d'apparition)
+
+La réponse JSON est produite en flux à partir du curseur SQLite, dans une transaction
+de lecture (instantané cohérent, "seq" du journal lu dans le même instantané).
+"""
+import json
+from itertools import groupby
+from operator import itemgetter
+
+from assignments import SALLE_NAMES
+from journal import get_journal_state
+
+# Jours par page: par défaut une demi-année, au plus une année complète
+DEFAULT_PAGE_DAYS = 186
+MAX_PAGE_DAYS = 366
+
+# Cases lues par paquet sur le curseur, jours envoyés par morceau de réponse
+RANGE_BATCH_SIZE = 1000
+CHUNK_DAYS = 31
+
+RANGE_QUERY = """
+    SELECT date, room, label, state
+    FROM assignment
+    WHERE date {lower} ? AND date <= ?
+    ORDER BY date, room
+"""
+
+_ROOM_INDEX = {salle: index for index, salle in enumerate(SALLE_NAMES)}
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def _fetch_rows(cursor, batch_size):
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def _row_day(date, cells):
+    labels = {}
+    states = {}
+    for room, label, state in cells:
+        if label is not None:
+            labels[room] = label
+        if state is not None:
+            states[room] = state
+    return {'date': date, 'labels': labels, 'states': states}
+
+
+def _column_day(date, cells, label_ids):
+    labels = [None] * len(SALLE_NAMES)
+    states = None
+    for room, label, state in cells:
+        index = _ROOM_INDEX[room]
+        if label is not None:
+            label_id = label_ids.get(label)
+            if label_id is None:
+                label_id = label_ids[label] = len(label_ids)
+            labels[index] = label_id
+        if state is not None:
+            if states is None:
+                states = [None] * len(SALLE_NAMES)
+            states[index] = state
+    return [date, labels, states]
+
+
+def read_planning_range(conn, debut, fin, after=None, limit=DEFAULT_PAGE_DAYS, columns=False,
+                        batch_size=RANGE_BATCH_SIZE):
+    """
+    Générateur des morceaux JSON d'une page de [debut, fin] commençant après la date
+    after. "next" vaut la dernière date de la page s'il reste des jours, sinon null.
+    La connexion reste ouverte pendant le flux: l'appelant la ferme à la fin.
+    """
+    if after and after >= debut:
+        lower, start = '>', after
+    else:
+        lower, start = '>=', debut
+    label_ids = {}
+    if columns:
+        build_day = lambda date, cells: _column_day(date, cells, label_ids)
+    else:
+        build_day = _row_day
+
+    # Instantané cohérent pour toute la page (annulé au retour au pool)
+    conn.execute('BEGIN')
+    seq, _ = get_journal_state(conn)
+    header = {'from': debut, 'to': fin, 'after': after, 'limit': limit, 'seq': seq}
+    if columns:
+        header['rooms'] = SALLE_NAMES
+    yield _dumps(header)[:-1] + ',"days":['
+
+    cursor = conn.cursor()
+    # Tuples plutôt que sqlite3.Row
+    cursor.row_factory = None
+    cursor.execute(RANGE_QUERY.format(lower=lower), (start, fin))
+
+    count = 0
+    last_date = next_after = None
+    chunk = []
+    for date, cells in groupby(_fetch_rows(cursor, batch_size), key=itemgetter(0)):
+        if count == limit:
+            # Un jour au-delà de la page: la suivante commence après last_date
+            next_after = last_date
+            break
+        chunk.append(_dumps(build_day(date, [cell[1:] for cell in cells])))
+        count += 1
+        last_date = date
+        if len(chunk) == CHUNK_DAYS:
+            yield (',' if count > len(chunk) else '') + ','.join(chunk)
+            chunk = []
+    cursor.close()
+    if chunk:
+        yield (',' if count > len(chunk) else '') + ','.join(chunk)
+    footer = {'count': count, 'next': next_after}
+    if columns:
+        footer['labels'] = list(label_ids)
+    yield '],' + _dumps(footer)[1:]
@@ -0,0 +1,119 @@
+"""
+SQL de la vue de compatibilité emploisDuTemps, générée depuis SALLE_NAMES.
+
+Le planning est stocké dans assignment (une ligne par case, migration 0005). La vue
+emploisDuTemps garde l'ancienne forme (une ligne par jour, une colonne par salle et
+une colonne <salle>_state) et ses triggers INSTEAD OF permettent encore aux scripts
+d'y écrire en SQL. Vue et triggers sont produits ici pour chaque salle de SALLE_NAMES :
+ajouter ou retirer une salle = modifier SALLE_NAMES puis ajouter une migration Python
+qui appelle recreate_view_sql() (comme 0011).
+
+Le libellé écrit dans une case est résolu vers listeInfirmier comme dans label_index :
+libellé complet "Prenom Nom - Status", sinon "Prenom Nom" (plus petit id en cas
+d'homonymes).
+"""
+from assignments import SALLE_NAMES
+
+
+def resolve_id_sql(expr):
+    """
+    Expression SQL de l'id infirmier correspondant au libellé expr (ou NULL)
+    """
+    return (
+        "COALESCE(\n"
+        "            (SELECT MIN(i.id) FROM listeInfirmier i\n"
+        "             WHERE i.prenom || ' ' || i.nom || COALESCE(' - ' || NULLIF(i.status, ''), '') "
+        f"= TRIM({expr})),\n"
+        f"            (SELECT MIN(i.id) FROM listeInfirmier i WHERE i.prenom || ' ' || i.nom = TRIM({expr})))"
+    )
+
+
+def copy_legacy_rows_sql(rooms=SALLE_NAMES):
+    """
+    Reprise des cases de l'ancienne table large emploisDuTemps dans assignment
+    """
+    selects = [
+        f"SELECT e.date, '{room}', {resolve_id_sql(f'e.{room}')},\n"
+        f"       NULLIF(TRIM(e.{room}), ''), e.{room}_state\n"
+        f"FROM emploisDuTemps e WHERE NULLIF(TRIM(e.{room}), '') IS NOT NULL OR e.{room}_state IS NOT NULL"
+        for room in rooms
+    ]
+    return (
+        'INSERT OR IGNORE INTO assignment (date, room, infirmier_id, label, state)\n'
+        + '\nUNION ALL\n'.join(selects) + ';\n'
+    )
+
+
+def view_sql(rooms=SALLE_NAMES):
+    columns = [f"    MAX(CASE WHEN a.room = '{room}' THEN a.label END) AS {room}" for room in rooms]
+    columns += [f"    MAX(CASE WHEN a.room = '{room}' THEN a.state END) AS {room}_state" for room in rooms]
+    return (
+        '-- Vue de compatibilité: mêmes colonnes que l\'ancienne table\n'
+        'CREATE VIEW emploisDuTemps AS\n'
+        'SELECT\n'
+        '    j.id,\n'
+        '    j.date,\n'
+        + ',\n'.join(columns) + '\n'
+        'FROM planning_jour j\n'
+        'LEFT JOIN assignment a ON a.date = j.date\n'
+        'GROUP BY j.id, j.date;\n'
+    )
+
+
+def _write_cells_sql(rooms):
+    """
+    Corps de trigger: chaque salle de NEW est effacée (vide) ou écrite (upsert)
+    """
+    statements = []
+    for room in rooms:
+        statements.append(
+            f"    DELETE FROM assignment WHERE date = NEW.date AND room = '{room}'\n"
+            f"        AND NULLIF(TRIM(NEW.{room}), '') IS NULL AND NEW.{room}_state IS NULL;\n"
+            '    INSERT INTO assignment (date, room, infirmier_id, label, state)\n'
+            f"    SELECT NEW.date, '{room}', {resolve_id_sql(f'NEW.{room}')},\n"
+            f"           NULLIF(TRIM(NEW.{room}), ''), NEW.{room}_state\n"
+            f"    WHERE NULLIF(TRIM(NEW.{room}), '') IS NOT NULL OR NEW.{room}_state IS NOT NULL\n"
+            '    ON CONFLICT (date, room) DO UPDATE SET\n'
+            '        infirmier_id = excluded.infirmier_id, label = excluded.label, state = excluded.state;\n'
+        )
+    return ''.join(statements)
+
+
+def triggers_sql(rooms=SALLE_NAMES):
+    return (
+        '-- Écritures SQL sur la vue (compatibilité des scripts)\n'
+        'CREATE TRIGGER emploisDuTemps_insert INSTEAD OF INSERT ON emploisDuTemps\n'
+        'BEGIN\n'
+        '    INSERT OR IGNORE INTO planning_jour (id, date) VALUES (NEW.id, NEW.date);\n'
+        + _write_cells_sql(rooms) +
+        'END;\n'
+        '\n'
+        # Les cases sont rattachées à la date du jour: un changement de date ou d'id
+        # laisserait les affectations sur l'ancien jour, il est refusé
+        'CREATE TRIGGER emploisDuTemps_update INSTEAD OF UPDATE ON emploisDuTemps\n'
+        'BEGIN\n'
+        "    SELECT RAISE(ABORT, 'emploisDuTemps: date et id d''un jour non modifiables (supprimer puis insérer)')\n"
+        '    WHERE NEW.date IS NOT OLD.date OR NEW.id IS NOT OLD.id;\n'
+        + _write_cells_sql(rooms) +
+        'END;\n'
+        '\n'
+        'CREATE TRIGGER emploisDuTemps_delete INSTEAD OF DELETE ON emploisDuTemps\n'
+        'BEGIN\n'
+        '    DELETE FROM assignment WHERE date = OLD.date;\n'
+        '    DELETE FROM planning_jour WHERE id = OLD.id;\n'
+        'END;\n'
+    )
+
+
+def recreate_view_sql(rooms=SALLE_NAMES):
+    """
+    Remplace la vue emploisDuTemps et ses triggers (après un changement de salles)
+    """
+    return (
+        'DROP TRIGGER IF EXISTS emploisDuTemps_insert;\n'
+        'DROP TRIGGER IF EXISTS emploisDuTemps_update;\n'
+        'DROP TRIGGER IF EXISTS emploisDuTemps_delete;\n'
+        'DROP VIEW IF EXISTS emploisDuTemps;\n'
+        '\n'
+        + view_sql(rooms) + '\n' + triggers_sql(rooms)
+    )
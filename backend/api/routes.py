@@ -1,7 +1,52 @@
-from flask import Blueprint, request, jsonify
-import sqlite3
-import os
+from flask import Blueprint, Response, current_app, request, jsonify
 from datetime import datetime, timedelta
+import logging
+
+# Connexions partagées (pool + PRAGMA)
+from db import get_db_connection, transaction
+# Index en mémoire libellé <-> id infirmier
+from label_index import label_index
+from diagnostics import maybe_log_stats_snapshot
+# Chemin d'écriture commun des affectations
+from assignments import (
+    SALLE_NAMES, CLOSED_STATES, apply_assignments, get_infirmier_id_from_label, get_label_from_infirmier_id,
+    load_emploi_rows
+)
+from label_index import normalize_label
+# Version des données (ETag / GET conditionnels)
+from versioning import bump_data_version, conditional
+# Recalcul ensembliste de statistique
+from stats_rebuild import rebuild_statistics, verify_statistics
+# Statistiques par période (agrégat mensuel)
+from stat_rollup import range_counts
+# Remplissage automatique du planning (moteur dans algorithm/)
+from algorithm import DEFAULT_TIME_BUDGET, auto_fill
+from auto_fill import MAX_AUTO_FILL_DAYS, planning_dates, load_problem, build_operations
+# Analyse d'équité (NumPy)
+from fairness import DEFAULT_SWAP_LIMIT, fairness_report
+# Diffusion des modifications (Server-Sent Events)
+from events import RETRY_MS, broker
+# Journal des modifications (synchronisation par delta)
+from journal import DEFAULT_CHANGES_LIMIT, get_journal_state, read_changes, compact_journal
+# Export en flux (CSV / NDJSON)
+from export import EXPORT_FORMATS, export_planning
+# Disponibilités d'une période (validation des dépôts côté client)
+from availability import MAX_AVAILABILITY_DAYS, build_availability
+# Conflits du planning (ensemble tenu à jour depuis le journal)
+from conflicts import CONFLICT_TYPES, conflict_index
+# Calendrier des absences (recherche par intervalle de dates)
+from absences import (
+    MAX_AVAILABLE_DAYS, AbsenceError, absences_between, absences_by_label, available_infirmiers, find_absence,
+    validate_period
+)
+# Planning d'une longue période par pages (pagination par date)
+from planning_range import DEFAULT_PAGE_DAYS, MAX_PAGE_DAYS, read_planning_range
+# Métriques des requêtes (format Prometheus)
+from metrics import PROMETHEUS_CONTENT_TYPE, registry as metrics_registry
+# Traçage SQL par requête (développement)
+import sql_trace
+# Import en masse (infirmiers, plannings historiques)
+from bulk_import import MAX_REPORTED_ERRORS, BulkImportError, parse_records, run_import
 
 # Importer les modèles
 from models.infirmier import Infirmier
@@ -11,91 +56,109 @@ from models.emplois_du_temps import EmploisDuTemps
 # Création du Blueprint pour les routes d'API
 api_bp = Blueprint('api', __name__)
 
-# Liste des noms de salles pour validation
-SALLE_NAMES = ['salle16', 'salle17', 'salle18', 'salle19', 'salle20', 'salle21', 
-              'salle22', 'salle23', 'salle24', 'reveil1', 'reveil2', 'perinduction']
+logger = logging.getLogger(__name__)
 
 # États valides pour les salles
 VALID_STATES = ['close', 'unuse', None]
 
-# Chemin de la base de données
-DATABASE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 
-                           'database', 'schedule.db')
-
-# Fonction pour obtenir une connexion à la base de données
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
-
 # ============================
-# Helpers: statistiques / labels
+# Helpers: lecture planning / statistiques
 # ============================
 
-def parse_label(label: str):
-    """Parse a label of the form 'Prenom Nom - Status' and return (prenom, nom, status or None).
-    Be tolerant to extra spaces and optional ' - Status'."""
-    if not label:
-        return None, None, None
-    parts = label.split('-')
-    left = parts[0].strip()
-    status = parts[1].strip() if len(parts) > 1 else None
-    # Split left into prenom and nom by last space (to be a bit more tolerant)
-    if ' ' in left:
-        prenom = left.split(' ')[0].strip()
-        nom = ' '.join(left.split(' ')[1:]).strip()
-    else:
-        # Fallback if we cannot split properly
-        prenom = left.strip()
-        nom = ''
-    return prenom, nom, status
-
-def get_infirmier_id_from_label(conn, label: str):
-    prenom, nom, status = parse_label(label)
-    if not prenom:
-        return None
-    if status:
-        row = conn.execute(
-            'SELECT id FROM listeInfirmier WHERE prenom = ? AND nom = ? AND status = ? LIMIT 1',
-            (prenom, nom, status)
-        ).fetchone()
-    else:
-        row = conn.execute(
-            'SELECT id FROM listeInfirmier WHERE prenom = ? AND nom = ? LIMIT 1',
-            (prenom, nom)
-        ).fetchone()
-    return row['id'] if row else None
+def build_labels_and_doublons(emploi):
+    """Return ({salle: label}, [salles sharing a label]) for one emploisDuTemps row."""
+    # Avec le nouveau modèle, les colonnes de salle contiennent directement
+    # le libellé texte ("Prenom Nom - Status").
+    labels = {}
+    label_count = {}
+    doublons = []
 
-def ensure_stat_row(conn, infirmier_id: int):
-    if not infirmier_id:
-        return
-    row = conn.execute('SELECT id FROM statistique WHERE infirmierID = ?', (infirmier_id,)).fetchone()
-    if not row:
-        conn.execute('INSERT INTO statistique (infirmierID) VALUES (?)', (infirmier_id,))
+    for field in SALLE_NAMES:
+        label = emploi[field]
+        if label:
+            labels[field] = label
+            if label in label_count:
+                label_count[label].append(field)
+            else:
+                label_count[label] = [field]
 
-def increment_stat(conn, infirmier_id: int, salle: str):
-    if not infirmier_id or not salle:
-        return
-    ensure_stat_row(conn, infirmier_id)
-    conn.execute(f'UPDATE statistique SET {salle} = COALESCE({salle}, 0) + 1 WHERE infirmierID = ?', (infirmier_id,))
-    print_stat_table(conn)
+    # Identifier les salles avec le même libellé (doublons visuels)
+    for _, salles in label_count.items():
+        if len(salles) > 1:
+            doublons.extend(salles)
 
-def decrement_stat(conn, infirmier_id: int, salle: str):
-    if not infirmier_id or not salle:
+    return labels, doublons
+
+def build_stat_datasets(conn, infirmier_ids=None, counts=None):
+    """Stats rows in the shape used by stats.js: [{id, label, data: [count per room]}].
+    Restricted to the given nurse ids when provided. When counts {(id, room): n} is
+    given (statistics over a date range), it replaces the all-time statistique counters."""
+    rooms = SALLE_NAMES
+    # Join nurses with stats; if no stats row, coalesce to 0
+    cols = ', '.join([f"COALESCE(s.{r}, 0) AS {r}" for r in rooms])
+    where = ''
+    params = ()
+    if infirmier_ids is not None:
+        infirmier_ids = list(infirmier_ids)
+        if not infirmier_ids:
+            return []
+        where = f"WHERE i.id IN ({', '.join('?' for _ in infirmier_ids)})"
+        params = tuple(infirmier_ids)
+    query = f"""
+        SELECT i.id, i.prenom, i.nom, i.status, {cols}
+        FROM listeInfirmier i
+        LEFT JOIN statistique s ON s.infirmierID = i.id
+        {where}
+        ORDER BY i.prenom, i.nom
+    """
+    datasets = []
+    for row in conn.execute(query, params).fetchall():
+        label = f"{row['prenom']} {row['nom']} - {row['status']}"
+        if counts is None:
+            data = [row[r] for r in rooms]
+        else:
+            data = [counts.get((row['id'], r), 0) for r in rooms]
+        datasets.append({
+            'id': row['id'],
+            'label': label,
+            'data': data
+        })
+    return datasets
+
+def publish_cell_changes(conn, changes, deltas):
+    """Publish committed cell changes on /events: changed cells, duplicates of the
+    touched days and the affected stat counters (delta and new value)."""
+    if not changes:
         return
-    ensure_stat_row(conn, infirmier_id)
-    conn.execute(f'UPDATE statistique SET {salle} = CASE WHEN {salle} > 0 THEN {salle} - 1 ELSE 0 END WHERE infirmierID = ?', (infirmier_id,))
-    print_stat_table(conn)
+    rows = load_emploi_rows(conn, {c['date'] for c in changes})
+    stats = []
+    if deltas:
+        datasets = {d['id']: d for d in build_stat_datasets(conn, {infirmier_id for infirmier_id, _ in deltas})}
+        for (infirmier_id, salle), delta in deltas.items():
+            dataset = datasets.get(infirmier_id)
+            stats.append({
+                'id': infirmier_id,
+                'salle': salle,
+                'delta': delta,
+                'value': dataset['data'][SALLE_NAMES.index(salle)] if dataset else None
+            })
+    broker.publish('cells', {
+        'cells': [
+            {'date': c['date'], 'salle': c['salle'], 'label': c['label'], 'state': c['state']}
+            for c in changes
+        ],
+        'doublons': {date: build_labels_and_doublons(row)[1] for date, row in rows.items()},
+        'stats': stats
+    })
 
-def print_stat_table(conn):
-    rows = conn.execute('SELECT * FROM statistique').fetchall()
-    print('[STATISTIQUE] Table complète:')
-    for r in rows:
-        print(dict(r))
+def publish_infirmier_change(action, infirmier):
+    """Publish a nurse creation / update / deletion on /events."""
+    broker.publish('infirmier', {'action': action, 'infirmier': infirmier})
 
 # Route pour récupérer tous les infirmiers
 @api_bp.route('/infirmiers', methods=['GET'])
 @api_bp.route('/infirmiers/', methods=['GET'])
+@conditional
 def get_infirmiers():
     try:
         conn = get_db_connection()
@@ -116,34 +179,30 @@ def get_infirmiers():
 # ============================
 
 @api_bp.route('/statistiques', methods=['GET'])
+@conditional
 def get_statistiques():
+    # Période optionnelle ?from=YYYY-MM-DD&to=YYYY-MM-DD (bornes incluses)
+    debut_str = request.args.get('from')
+    fin_str = request.args.get('to')
     try:
-        conn = get_db_connection()
+        debut = datetime.strptime(debut_str, '%Y-%m-%d').date() if debut_str else None
+        fin = datetime.strptime(fin_str, '%Y-%m-%d').date() if fin_str else None
+    except ValueError:
+        return jsonify({'error': 'Format de date invalide (YYYY-MM-DD attendu)'}), 400
+    if debut and fin and debut > fin:
+        return jsonify({'error': 'La date de début doit précéder la date de fin'}), 400
 
-        rooms = SALLE_NAMES
-        # Join nurses with stats; if no stats row, coalesce to 0
-        cols = ', '.join([f"COALESCE(s.{r}, 0) AS {r}" for r in rooms])
-        query = f"""
-            SELECT i.id, i.prenom, i.nom, i.status, {cols}
-            FROM listeInfirmier i
-            LEFT JOIN statistique s ON s.infirmierID = i.id
-            ORDER BY i.prenom, i.nom
-        """
-        rows = conn.execute(query).fetchall()
+    try:
+        conn = get_db_connection()
+        if debut is None and fin is None:
+            datasets = build_stat_datasets(conn)
+        else:
+            # Mois complets depuis statistique_mensuelle, mois partiels depuis assignment
+            datasets = build_stat_datasets(conn, counts=range_counts(conn, debut, fin))
         conn.close()
 
-        datasets = []
-        for row in rows:
-            label = f"{row['prenom']} {row['nom']} - {row['status']}"
-            data = [row[r] for r in rooms]
-            datasets.append({
-                'id': row['id'],
-                'label': label,
-                'data': data
-            })
-
         return jsonify({
-            'rooms': rooms,
+            'rooms': SALLE_NAMES,
             'datasets': datasets
         })
     except Exception as e:
@@ -151,8 +210,37 @@ def get_statistiques():
             conn.close()
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/statistiques/fairness', methods=['GET'])
+@conditional
+def get_statistiques_fairness():
+    # Période optionnelle ?from=&to= (comme /statistiques), nombre d'échanges ?swaps=,
+    # écarts par salle de chaque infirmier avec ?detail=1
+    debut_str = request.args.get('from')
+    fin_str = request.args.get('to')
+    try:
+        debut = datetime.strptime(debut_str, '%Y-%m-%d').date() if debut_str else None
+        fin = datetime.strptime(fin_str, '%Y-%m-%d').date() if fin_str else None
+    except ValueError:
+        return jsonify({'error': 'Format de date invalide (YYYY-MM-DD attendu)'}), 400
+    if debut and fin and debut > fin:
+        return jsonify({'error': 'La date de début doit précéder la date de fin'}), 400
+    swap_limit = request.args.get('swaps', DEFAULT_SWAP_LIMIT, type=int)
+    detail = request.args.get('detail', '0').lower() in ('1', 'true', 'yes')
+
+    try:
+        conn = get_db_connection()
+        report = fairness_report(conn, debut, fin, swap_limit=max(0, min(swap_limit, 100)), detail=detail)
+        conn.close()
+
+        return jsonify(report)
+    except Exception as e:
+        if 'conn' in locals() and conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
 # Route pour récupérer un infirmier par son ID
 @api_bp.route('/infirmiers/<int:id>', methods=['GET'])
+@conditional
 def get_infirmier(id):
     try:
         conn = get_db_connection()
@@ -168,6 +256,31 @@ def get_infirmier(id):
             conn.close()
         return jsonify({'error': str(e)}), 500
 
+# Route pour récupérer les affectations d'un infirmier (recherche indexée par infirmier)
+@api_bp.route('/infirmiers/<int:id>/affectations', methods=['GET'])
+@conditional
+def get_infirmier_affectations(id):
+    try:
+        debut = request.args.get('debut', '0000-01-01')
+        fin = request.args.get('fin', '9999-12-31')
+        
+        conn = get_db_connection()
+        rows = conn.execute(
+            'SELECT date, room, label FROM assignment '
+            'WHERE infirmier_id = ? AND date BETWEEN ? AND ? ORDER BY date, room',
+            (id, debut, fin)
+        ).fetchall()
+        conn.close()
+        
+        return jsonify({
+            'infirmier_id': id,
+            'affectations': [{'date': r['date'], 'salle': r['room'], 'label': r['label']} for r in rows]
+        })
+    except Exception as e:
+        if 'conn' in locals() and conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
 # Route pour supprimer un infirmier par son ID
 @api_bp.route('/infirmiers/<int:id>', methods=['DELETE'])
 def delete_infirmier(id):
@@ -185,9 +298,14 @@ def delete_infirmier(id):
         
         # Puis supprimer l'infirmier
         conn.execute('DELETE FROM listeInfirmier WHERE id = ?', (id,))
+        bump_data_version(conn)
+        # Compteur de listeInfirmier de cette écriture, lu avant COMMIT
+        version = label_index.read_version(conn)
         
         conn.commit()
+        label_index.remove(id, version=version)
         conn.close()
+        publish_infirmier_change('deleted', {'id': id})
         
         return jsonify({'success': True, 'message': 'Infirmier supprimé avec succès'})
     except Exception as e:
@@ -199,7 +317,7 @@ def delete_infirmier(id):
 @api_bp.route('/infirmiers/<int:id>', methods=['PUT'])
 def update_infirmier(id):
     try:
-        print(f"DEBUG: PUT /infirmiers/{id} appelé avec data: {request.json}")
+        logger.debug('PUT /infirmiers/%s appelé avec data: %s', id, request.json)
         if not request.json:
             return jsonify({'error': 'Données de mise à jour manquantes'}), 400
         
@@ -222,12 +340,18 @@ def update_infirmier(id):
             'UPDATE listeInfirmier SET nom = ?, prenom = ?, status = ?, present = ? WHERE id = ?',
             (nom, prenom, status, present, id)
         )
+        bump_data_version(conn)
+        # Compteur de listeInfirmier de cette écriture, lu avant COMMIT
+        version = label_index.read_version(conn)
         
         conn.commit()
         
         # Récupérer l'infirmier mis à jour
         infirmier_updated = conn.execute('SELECT * FROM listeInfirmier WHERE id = ?', (id,)).fetchone()
+        label_index.upsert(id, infirmier_updated['prenom'], infirmier_updated['nom'], infirmier_updated['status'],
+                           version=version)
         conn.close()
+        publish_infirmier_change('updated', dict(infirmier_updated))
         
         return jsonify(dict(infirmier_updated))
     except Exception as e:
@@ -239,7 +363,7 @@ def update_infirmier(id):
 @api_bp.route('/infirmiers', methods=['POST'])
 def add_infirmier():
     try:
-        print(f"DEBUG: POST /infirmiers appelé avec data: {request.json}")
+        logger.debug('POST /infirmiers appelé avec data: %s', request.json)
         if not request.json or 'nom' not in request.json or 'prenom' not in request.json:
             return jsonify({'error': 'Le nom et prénom sont obligatoires'}), 400
         
@@ -254,6 +378,8 @@ def add_infirmier():
             'INSERT INTO listeInfirmier (nom, prenom, status, present) VALUES (?, ?, ?, ?)',
             (nom, prenom, status, present)
         )
+        # Compteur de listeInfirmier de cette écriture, lu avant COMMIT
+        version = label_index.read_version(conn)
         conn.commit()
         id = cursor.lastrowid
         
@@ -262,11 +388,14 @@ def add_infirmier():
             'INSERT INTO statistique (infirmierID) VALUES (?)',
             (id,)
         )
+        bump_data_version(conn)
         conn.commit()
         
         # Récupérer l'infirmier nouvellement créé
         infirmier = conn.execute('SELECT * FROM listeInfirmier WHERE id = ?', (id,)).fetchone()
+        label_index.upsert(id, infirmier['prenom'], infirmier['nom'], infirmier['status'], version=version)
         conn.close()
+        publish_infirmier_change('created', dict(infirmier))
         
         return jsonify(dict(infirmier)), 201
     except Exception as e:
@@ -274,8 +403,124 @@ def add_infirmier():
             conn.close()
         return jsonify({'error': str(e)}), 500
 
+# ============================
+# Absences (congés, formation...) et disponibilités
+# ============================
+
+# Route pour lister les absences, sur une période (?from=&to=) et/ou d'un infirmier (?infirmier_id=)
+@api_bp.route('/absences', methods=['GET'])
+@conditional
+def get_absences():
+    debut = request.args.get('from') or None
+    fin = request.args.get('to') or None
+    infirmier_id = request.args.get('infirmier_id', type=int)
+    
+    try:
+        if debut and fin:
+            validate_period(debut, fin)
+        conn = get_db_connection()
+        absences = absences_between(conn, debut, fin, infirmier_id)
+        conn.close()
+        return jsonify(absences)
+    except AbsenceError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        if 'conn' in locals() and conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
+# Route pour déclarer une absence {infirmier_id, from, to, reason}
+@api_bp.route('/absences', methods=['POST'])
+def add_absence():
+    data = request.get_json(silent=True) or {}
+    infirmier_id = data.get('infirmier_id')
+    debut = data.get('from')
+    fin = data.get('to') or debut
+    
+    if not infirmier_id:
+        return jsonify({'error': "L'infirmier est requis"}), 400
+    try:
+        validate_period(debut, fin)
+    except AbsenceError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        conn = get_db_connection()
+        
+        with transaction(conn):
+            infirmier = conn.execute('SELECT id FROM listeInfirmier WHERE id = ?', (infirmier_id,)).fetchone()
+            if infirmier is not None:
+                cursor = conn.execute(
+                    'INSERT INTO absence (infirmier_id, start_date, end_date, reason) VALUES (?, ?, ?, ?)',
+                    (infirmier_id, debut, fin, data.get('reason'))
+                )
+                absence_id = cursor.lastrowid
+                bump_data_version(conn)
+        if infirmier is None:
+            conn.close()
+            return jsonify({'error': 'Infirmier non trouvé'}), 404
+        
+        absence = {'id': absence_id, 'infirmier_id': infirmier_id, 'from': debut, 'to': fin,
+                   'reason': data.get('reason')}
+        conn.close()
+        return jsonify(absence), 201
+    except Exception as e:
+        if 'conn' in locals() and conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
+# Route pour supprimer une absence
+@api_bp.route('/absences/<int:id>', methods=['DELETE'])
+def delete_absence(id):
+    try:
+        conn = get_db_connection()
+        
+        with transaction(conn):
+            deleted = conn.execute('DELETE FROM absence WHERE id = ?', (id,)).rowcount
+            if deleted:
+                bump_data_version(conn)
+        conn.close()
+        
+        if not deleted:
+            return jsonify({'error': 'Absence non trouvée'}), 404
+        return jsonify({'success': True, 'message': 'Absence supprimée avec succès'})
+    except Exception as e:
+        if 'conn' in locals() and conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
+# Route pour savoir qui est disponible à une date (?date=) ou sur toute une période (?from=&to=)
+@api_bp.route('/infirmiers/disponibles', methods=['GET'])
+@conditional
+def get_available_infirmiers():
+    debut = request.args.get('date') or request.args.get('from')
+    fin = request.args.get('to') or debut
+    
+    try:
+        if validate_period(debut, fin) > MAX_AVAILABLE_DAYS:
+            return jsonify({'error': f'Période limitée à {MAX_AVAILABLE_DAYS} jours'}), 400
+    except AbsenceError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        conn = get_db_connection()
+        available, unavailable = available_infirmiers(conn, debut, fin)
+        conn.close()
+        
+        return jsonify({
+            'from': debut,
+            'to': fin,
+            'available': available,
+            'unavailable': unavailable
+        })
+    except Exception as e:
+        if 'conn' in locals() and conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
 # Route pour récupérer les emplois du temps d'une semaine
 @api_bp.route('/emplois-du-temps/semaine', methods=['GET'])
+@conditional
 def get_emplois_du_temps_semaine():
     try:
         debut = request.args.get('debut')
@@ -294,28 +539,7 @@ def get_emplois_du_temps_semaine():
         
         for emploi in emplois:
             emploi_dict = dict(emploi)
-
-            # Avec le nouveau modèle, les colonnes de salle contiennent directement
-            # le libellé texte ("Prenom Nom - Status").
-            labels = {}
-            label_count = {}
-            doublons = []
-
-            for field in ['salle16', 'salle17', 'salle18', 'salle19', 'salle20', 'salle21',
-                          'salle22', 'salle23', 'salle24', 'reveil1', 'reveil2', 'perinduction']:
-                label = emploi[field]
-                if label:
-                    labels[field] = label
-                    if label in label_count:
-                        label_count[label].append(field)
-                    else:
-                        label_count[label] = [field]
-
-            # Identifier les salles avec le même libellé (doublons visuels)
-            for _, salles in label_count.items():
-                if len(salles) > 1:
-                    doublons.extend(salles)
-
+            labels, doublons = build_labels_and_doublons(emploi)
             emploi_dict['labels'] = labels
             emploi_dict['doublons'] = doublons
             result.append(emploi_dict)
@@ -328,6 +552,164 @@ def get_emplois_du_temps_semaine():
             conn.close()
         return jsonify({'error': str(e)}), 500
 
+# Route regroupant tout ce qu'il faut pour afficher une semaine: libellés, doublons,
+# états des salles et, sur demande (?stats=1), la matrice des statistiques
+@api_bp.route('/planning/week', methods=['GET'])
+@conditional
+def get_planning_week():
+    try:
+        debut = request.args.get('debut')
+        fin = request.args.get('fin')
+        include_stats = request.args.get('stats', '0').lower() in ('1', 'true', 'yes')
+        
+        if not debut or not fin:
+            return jsonify({'error': 'Les dates de début et de fin sont requises'}), 400
+        
+        conn = get_db_connection()
+        # Numéro du journal lu avant les données: /changes?since=seq ne peut rien manquer
+        seq, _ = get_journal_state(conn)
+        # Une seule requête sur la plage de dates (index unique sur date)
+        emplois = conn.execute(
+            'SELECT * FROM emploisDuTemps WHERE date BETWEEN ? AND ? ORDER BY date',
+            (debut, fin)
+        ).fetchall()
+        
+        days = []
+        for emploi in emplois:
+            labels, doublons = build_labels_and_doublons(emploi)
+            days.append({
+                'date': emploi['date'],
+                'labels': labels,
+                'doublons': doublons,
+                'states': {salle: emploi[f'{salle}_state'] for salle in SALLE_NAMES}
+            })
+        
+        result = {
+            'debut': debut,
+            'fin': fin,
+            'seq': seq,
+            'rooms': SALLE_NAMES,
+            'days': days
+        }
+        if include_stats:
+            result['stats'] = {
+                'rooms': SALLE_NAMES,
+                'datasets': build_stat_datasets(conn)
+            }
+        conn.close()
+        
+        return jsonify(result)
+    except Exception as e:
+        if 'conn' in locals() and conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
+# Route pour lire le planning d'un mois ou d'une année par pages de jours:
+# ?from=&to=&limit=&after=<champ next de la page précédente>&columns=1
+@api_bp.route('/planning', methods=['GET'])
+@conditional
+def get_planning_range():
+    debut = request.args.get('from') or '0000-01-01'
+    fin = request.args.get('to') or '9999-12-31'
+    after = request.args.get('after') or None
+    columns = request.args.get('columns', '0').lower() in ('1', 'true', 'yes')
+    
+    for value in (request.args.get('from'), request.args.get('to'), after):
+        if value:
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                return jsonify({'error': 'Format de date invalide (YYYY-MM-DD attendu)'}), 400
+    if debut > fin:
+        return jsonify({'error': 'La date de début doit précéder la date de fin'}), 400
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_DAYS))
+    except ValueError:
+        return jsonify({'error': 'limit doit être un entier'}), 400
+    if not 1 <= limit <= MAX_PAGE_DAYS:
+        return jsonify({'error': f'limit doit être compris entre 1 et {MAX_PAGE_DAYS}'}), 400
+    
+    conn = get_db_connection()
+    response = Response(
+        read_planning_range(conn, debut, fin, after, limit, columns),
+        content_type='application/json'
+    )
+    # Connexion rendue au pool quand le flux est terminé (ou le client déconnecté)
+    response.call_on_close(conn.close)
+    return response
+
+# Route pour remplir automatiquement les cases vides d'une période
+@api_bp.route('/planning/auto-fill', methods=['POST'])
+def auto_fill_planning():
+    data = request.get_json(silent=True) or {}
+    try:
+        debut = datetime.strptime(str(data.get('debut')), '%Y-%m-%d').date()
+        fin = datetime.strptime(str(data.get('fin')), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Les dates de début et de fin (YYYY-MM-DD) sont requises'}), 400
+    if debut > fin:
+        return jsonify({'error': 'La date de début doit précéder la date de fin'}), 400
+    if (fin - debut).days >= MAX_AUTO_FILL_DAYS:
+        return jsonify({'error': f'Période limitée à {MAX_AUTO_FILL_DAYS} jours'}), 400
+    
+    # Budget de temps de la recherche locale, borné à 30 s
+    try:
+        time_budget = float(data.get('time_budget_ms', DEFAULT_TIME_BUDGET * 1000)) / 1000
+    except (TypeError, ValueError):
+        return jsonify({'error': 'time_budget_ms invalide'}), 400
+    time_budget = max(0.0, min(time_budget, 30.0))
+    
+    # Salles autorisées par statut, ex. {"J3": ["reveil1", "reveil2"]}: obligatoire, le
+    # moteur admettrait sinon tous les statuts dans toutes les salles
+    status_rooms = data.get('status_rooms')
+    if not status_rooms:
+        return jsonify({'error': 'status_rooms requis (salles autorisées par statut)'}), 400
+    if not isinstance(status_rooms, dict) or any(
+        not isinstance(rooms, list) or any(room not in SALLE_NAMES for room in rooms)
+        for rooms in status_rooms.values()
+    ):
+        return jsonify({'error': 'status_rooms invalide'}), 400
+    
+    dry_run = bool(data.get('dry_run'))
+    dates = planning_dates(debut, fin, weekends=bool(data.get('weekends')))
+    
+    try:
+        conn = get_db_connection()
+        problem = load_problem(conn, dates, status_rooms=status_rooms)
+        # Calcul hors transaction: le verrou d'écriture n'est pris que pour écrire
+        result = auto_fill(problem, time_budget=time_budget, seed=data.get('seed'))
+        
+        applied = 0
+        skipped = 0
+        if not dry_run:
+            changes, deltas = [], {}
+            with transaction(conn):
+                operations, skipped = build_operations(conn, result)
+                if operations:
+                    results, changes, deltas = apply_assignments(conn, operations)
+                    applied = sum(1 for r in results if r['success'])
+            publish_cell_changes(conn, changes, deltas)
+            maybe_log_stats_snapshot(conn)
+        conn.close()
+        
+        logger.info('Remplissage automatique %s -> %s: %d cases, %d non remplies, %d itérations',
+                    debut, fin, len(result.assignments), len(result.unfilled), result.iterations)
+        response = result.to_dict()
+        response.update({
+            'success': True,
+            'debut': debut.isoformat(),
+            'fin': fin.isoformat(),
+            'dry_run': dry_run,
+            'applied': applied,
+            'skipped': skipped
+        })
+        return jsonify(response)
+        
+    except Exception as e:
+        if 'conn' in locals() and conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
 # Route pour assigner un infirmier (par libellé) à une salle pour une date spécifique
 @api_bp.route('/assign-infirmier', methods=['POST'])
 def assign_infirmier():
@@ -342,79 +724,156 @@ def assign_infirmier():
     label = data.get('label')
     infirmier_id = data.get('infirmier_id') if 'infirmier_id' in data else data.get('infirmierId')
     
-    print(f"DEBUG: Assignation - date: {date}, salle: {salle}, infirmier_id: {infirmier_id}")
+    logger.debug('Assignation - date: %s, salle: %s, label: %s, infirmier_id: %s', date, salle, label, infirmier_id)
     
     # Vérifier que toutes les données nécessaires sont présentes
     if not date or not salle:
         return jsonify({'error': 'Date et salle sont requis'}), 400
+    if salle not in SALLE_NAMES:
+        return jsonify({'error': f'Nom de salle invalide: {salle}'}), 400
     
     try:
         conn = get_db_connection()
         
-        # Vérifier si l'emploi du temps pour cette date existe
-        emploi = conn.execute('SELECT * FROM emploisDuTemps WHERE date = ?', (date,)).fetchone()
+        # Création de la ligne du jour si besoin, écriture de la case et mise à jour
+        # des statistiques (ancien libellé décrémenté, nouveau incrémenté)
+        with transaction(conn):
+            results, changes, deltas = apply_assignments(conn, [{
+                'date': date,
+                'salle': salle,
+                'label': label,
+                'infirmier_id': infirmier_id,
+            }])
+        # Refus de apply_assignments (infirmier absent ce jour-là, date invalide)
+        if not results[0]['success']:
+            conn.close()
+            status = 409 if 'absence' in results[0] else 400
+            return jsonify({key: value for key, value in results[0].items() if key != 'success'}), status
+        publish_cell_changes(conn, changes, deltas)
+        maybe_log_stats_snapshot(conn)
+        conn.close()
         
-        if not emploi:
-            # Si l'emploi du temps n'existe pas, le créer
-            cursor = conn.cursor()
-            fields = ['date'] + SALLE_NAMES + [f'{s}_state' for s in SALLE_NAMES]
-            values = [date] + [None for _ in range(len(SALLE_NAMES) * 2)]
-            placeholders = ', '.join(['?' for _ in range(len(fields))])
-            
-            cursor.execute(
-                f"INSERT INTO emploisDuTemps ({', '.join(fields)}) VALUES ({placeholders})",
-                tuple(values)
-            )
-            conn.commit()
-            emploi = conn.execute('SELECT * FROM emploisDuTemps WHERE date = ?', (date,)).fetchone()
-        
-        # Déterminer la valeur à écrire (label prioritaire). Si label vide/None => NULL
-        cursor = conn.cursor()
-        value = None
-        if label is not None:
-            value = label.strip() or None
-        elif infirmier_id is not None:
-            # Compat: si on reçoit encore un ID, on le transforme en libellé en recherchant dans listeInfirmier
-            if str(infirmier_id) != '0':
-                inf = conn.execute('SELECT nom, prenom, status FROM listeInfirmier WHERE id = ?', (infirmier_id,)).fetchone()
-                if inf:
-                    value = f"{inf['prenom']} {inf['nom']} - {inf['status']}"
-                else:
-                    value = None
-            else:
-                value = None
-        # Statistiques selon les cas
-        existing = emploi[salle] if emploi else None
-        if value is None:
-            # Cas: on veut effacer l'affectation via assign-infirmier
-            if existing:
-                old_id = get_infirmier_id_from_label(conn, existing)
-                if old_id:
-                    decrement_stat(conn, old_id, salle)
-            cursor.execute(f"UPDATE emploisDuTemps SET {salle} = NULL WHERE date = ?", (date,))
-        else:
-            # Cas: on assigne un nouveau label
-            # Si on remplace une valeur différente, décrémenter l'ancienne
-            if existing and existing != value:
-                old_id = get_infirmier_id_from_label(conn, existing)
-                if old_id:
-                    decrement_stat(conn, old_id, salle)
-            # Mettre à jour la valeur
-            cursor.execute(f"UPDATE emploisDuTemps SET {salle} = ? WHERE date = ?", (value, date))
-            # Incrémenter la nouvelle statistique
-            new_id = get_infirmier_id_from_label(conn, value)
-            if new_id:
-                increment_stat(conn, new_id, salle)
+        return jsonify({
+            'success': True,
+            'date': date,
+            'salle': salle,
+            'label': results[0]['label']
+        })
+        
+    except Exception as e:
+        if 'conn' in locals() and conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
 
-        conn.commit()
+# Route pour appliquer un lot d'affectations dans une seule transaction
+@api_bp.route('/assignments/batch', methods=['POST'])
+def batch_assignments():
+    data = request.json
+    # Accepte {"operations": [...]} ou directement une liste d'opérations {date, salle, label}
+    operations = data.get('operations') if isinstance(data, dict) else data
+    if not isinstance(operations, list):
+        return jsonify({'error': 'Liste d\'opérations requise'}), 400
+    
+    try:
+        conn = get_db_connection()
+        
+        with transaction(conn):
+            results, changes, deltas = apply_assignments(conn, operations)
+        publish_cell_changes(conn, changes, deltas)
+        maybe_log_stats_snapshot(conn)
+        conn.close()
+        
+        return jsonify({
+            'success': all(result['success'] for result in results),
+            'applied': sum(1 for result in results if result['success']),
+            'changed': len(changes),
+            'results': results
+        })
+        
+    except Exception as e:
+        if 'conn' in locals() and conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
 
+# Route pour déplacer un libellé d'une case à une autre en une seule transaction
+@api_bp.route('/move-assignment', methods=['POST'])
+def move_assignment():
+    data = request.json or {}
+    source_date = data.get('source_date')
+    source_salle = data.get('source_salle')
+    target_date = data.get('target_date')
+    target_salle = data.get('target_salle')
+    # Libellé attendu dans la case source (optionnel, détecte une case modifiée entre-temps)
+    expected_label = data.get('label')
+    
+    if not source_date or not source_salle or not target_date or not target_salle:
+        return jsonify({'error': 'Cases source et cible requises'}), 400
+    for salle in (source_salle, target_salle):
+        if salle not in SALLE_NAMES:
+            return jsonify({'error': f'Nom de salle invalide: {salle}'}), 400
+    
+    if (source_date, source_salle) == (target_date, target_salle):
+        return jsonify({'success': True, 'cells': [], 'doublons': {}, 'stats': []})
+    
+    try:
+        conn = get_db_connection()
+        error = None
+        
+        # Vérification de disponibilité, retrait de la source, affectation de la cible
+        # et statistiques: tout dans une seule transaction BEGIN IMMEDIATE
+        with transaction(conn):
+            rows = load_emploi_rows(conn, [source_date, target_date])
+            source_row = rows.get(source_date)
+            label = source_row[source_salle] if source_row else None
+            target_row = rows.get(target_date)
+            
+            if not label:
+                error = (404, {'error': 'Aucune affectation trouvée dans la case source'})
+            elif expected_label and normalize_label(expected_label) != normalize_label(label):
+                error = (409, {'error': 'La case source a été modifiée', 'label': label})
+            elif target_row and target_row[f'{target_salle}_state'] in CLOSED_STATES:
+                error = (409, {'error': 'La salle cible est fermée ou non utilisée'})
+            elif target_row:
+                for field in SALLE_NAMES:
+                    if target_date == source_date and field == source_salle:
+                        continue
+                    if field != target_salle and target_row[field] == label:
+                        error = (409, {
+                            'error': f'Cet infirmier est déjà assigné à la salle {field} ce jour-là',
+                            'assigned_room': field
+                        })
+                        break
+            
+            if error is None:
+                # atomic: cible refusée (infirmier absent ce jour-là) => source conservée
+                results, changes, deltas = apply_assignments(conn, [
+                    {'date': source_date, 'salle': source_salle, 'label': None},
+                    {'date': target_date, 'salle': target_salle, 'label': label},
+                ], atomic=True)
+                failed = next((result for result in results if not result['success']), None)
+                if failed is not None:
+                    error = (409 if 'absence' in failed else 400,
+                             {key: value for key, value in failed.items() if key != 'success'})
+        
+        if error is not None:
+            conn.close()
+            return jsonify(error[1]), error[0]
+        
+        publish_cell_changes(conn, changes, deltas)
+        # Ne renvoyer que les cases et lignes de statistiques modifiées
+        updated_rows = load_emploi_rows(conn, [source_date, target_date])
+        stats = build_stat_datasets(conn, {infirmier_id for infirmier_id, _ in deltas})
+        maybe_log_stats_snapshot(conn)
         conn.close()
         
         return jsonify({
             'success': True,
-            'date': date,
-            'salle': salle,
-            'label': value
+            'cells': [
+                {'date': c['date'], 'salle': c['salle'], 'label': c['label'], 'state': c['state']}
+                for c in changes
+            ],
+            'doublons': {date: build_labels_and_doublons(row)[1] for date, row in updated_rows.items()},
+            'stats': stats
         })
         
     except Exception as e:
@@ -431,26 +890,28 @@ def reset_assignment():
     date = request.json['date']
     salle = request.json['salle']
     
+    if salle not in SALLE_NAMES:
+        return jsonify({'error': f'Nom de salle invalide: {salle}'}), 400
+    
     try:
         conn = get_db_connection()
         
-        # Récupérer l'affectation actuelle
-        emploi = conn.execute('SELECT * FROM emploisDuTemps WHERE date = ?', (date,)).fetchone()
-
-        if not emploi or not emploi[salle]:
+        with transaction(conn):
+            # Récupérer l'affectation actuelle
+            emploi = conn.execute(
+                'SELECT label FROM assignment WHERE date = ? AND room = ?', (date, salle)
+            ).fetchone()
+            found = bool(emploi and emploi['label'])
+            
+            # Réinitialiser l'affectation (la statistique de l'ancien libellé est décrémentée)
+            if found:
+                _, changes, deltas = apply_assignments(conn, [{'date': date, 'salle': salle, 'label': None}])
+        
+        if not found:
             conn.close()
             return jsonify({'error': 'Aucune affectation trouvée'}), 404
-
-        # Avant de réinitialiser, décrémenter la statistique associée à l'ancien label
-        old_label = emploi[salle]
-        old_id = get_infirmier_id_from_label(conn, old_label)
-        if old_id:
-            decrement_stat(conn, old_id, salle)
-
-        # Réinitialiser l'affectation
-        conn.execute(f'UPDATE emploisDuTemps SET {salle} = NULL WHERE date = ?', (date,))
-        
-        conn.commit()
+        publish_cell_changes(conn, changes, deltas)
+        maybe_log_stats_snapshot(conn)
         conn.close()
         
         return jsonify({
@@ -459,7 +920,7 @@ def reset_assignment():
         })
         
     except Exception as e:
-        if conn:
+        if 'conn' in locals() and conn:
             conn.close()
         return jsonify({'error': str(e)}), 500
 
@@ -480,41 +941,12 @@ def update_salle_state():
     try:
         conn = get_db_connection()
         
-        # Vérifier si l'emploi du temps existe pour cette date
-        emploi = conn.execute('SELECT * FROM emploisDuTemps WHERE date = ?', (date,)).fetchone()
-        
-        if not emploi:
-            # Si l'emploi du temps n'existe pas, le créer
-            cursor = conn.cursor()
-            fields = ['date'] + SALLE_NAMES + [f'{s}_state' for s in SALLE_NAMES]
-            values = [date] + [None for _ in range(len(SALLE_NAMES) * 2)]
-            placeholders = ', '.join(['?' for _ in range(len(fields))])
-            
-            cursor.execute(
-                f"INSERT INTO emploisDuTemps ({', '.join(fields)}) VALUES ({placeholders})",
-                tuple(values)
-            )
-            conn.commit()
-        
-        # Mettre à jour l'état de la salle
-        cursor = conn.cursor()
-        cursor.execute(
-            f"UPDATE emploisDuTemps SET {salle}_state = ? WHERE date = ?",
-            (state, date)
-        )
-
-        # Si l'état est 'close' ou 'unuse', on doit retirer l'infirmier de cette salle
-        if state in ['close', 'unuse']:
-            # Si un label est présent, décrémenter les stats avant d'effacer
-            emploi_before = conn.execute('SELECT * FROM emploisDuTemps WHERE date = ?', (date,)).fetchone()
-            if emploi_before and emploi_before[salle]:
-                old_label = emploi_before[salle]
-                old_id = get_infirmier_id_from_label(conn, old_label)
-                if old_id:
-                    decrement_stat(conn, old_id, salle)
-            cursor.execute(f"UPDATE emploisDuTemps SET {salle} = NULL WHERE date = ?", (date,))
-        
-        conn.commit()
+        # Mettre à jour l'état de la salle; si l'état est 'close' ou 'unuse',
+        # l'infirmier est retiré de cette salle et ses statistiques décrémentées
+        with transaction(conn):
+            _, changes, deltas = apply_assignments(conn, [{'date': date, 'salle': salle, 'state': state}])
+        publish_cell_changes(conn, changes, deltas)
+        maybe_log_stats_snapshot(conn)
         
         # Récupérer l'emploi du temps mis à jour
         emploi_updated = conn.execute('SELECT * FROM emploisDuTemps WHERE date = ?', (date,)).fetchone()
@@ -535,6 +967,7 @@ def update_salle_state():
 
 # Route pour récupérer les états des salles pour une date spécifique
 @api_bp.route('/salle-states/<string:date>', methods=['GET'])
+@conditional
 def get_salle_states(date):
     try:
         conn = get_db_connection()
@@ -565,6 +998,98 @@ def get_salle_states(date):
             conn.close()
         return jsonify({'error': str(e)}), 500
 
+# Route renvoyant en une lecture les disponibilités d'une période (jours où chaque libellé
+# est placé, salles fermées): le planning valide ensuite les dépôts sans aller-retour
+@api_bp.route('/availability', methods=['GET'])
+@conditional
+def get_availability():
+    debut = request.args.get('from')
+    fin = request.args.get('to')
+    
+    if not debut or not fin:
+        return jsonify({'error': 'Les dates de début et de fin sont requises'}), 400
+    try:
+        span = (datetime.strptime(fin, '%Y-%m-%d') - datetime.strptime(debut, '%Y-%m-%d')).days
+    except ValueError:
+        return jsonify({'error': 'Format de date invalide (YYYY-MM-DD attendu)'}), 400
+    if span < 0:
+        return jsonify({'error': 'La date de début doit précéder la date de fin'}), 400
+    if span >= MAX_AVAILABILITY_DAYS:
+        return jsonify({'error': f'Période limitée à {MAX_AVAILABILITY_DAYS} jours'}), 400
+    
+    try:
+        conn = get_db_connection()
+        # Numéro du journal lu dans le même instantané: /changes?since=seq complète la matrice
+        conn.execute('BEGIN')
+        seq, _ = get_journal_state(conn)
+        placements, closed = build_availability(conn, debut, fin)
+        absences = absences_by_label(conn, debut, fin)
+        conn.close()
+        
+        return jsonify({
+            'from': debut,
+            'to': fin,
+            'seq': seq,
+            'rooms': SALLE_NAMES,
+            'placements': placements,
+            'closed': closed,
+            'absences': absences
+        })
+    except Exception as e:
+        if 'conn' in locals() and conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
+# Route listant les conflits du planning (doublons, absents affectés, salles fermées,
+# libellés inconnus), sur tout le planning ou sur ?from=&to=, filtrés par ?type=a,b
+@api_bp.route('/conflicts', methods=['GET'])
+@conditional
+def get_conflicts():
+    debut = request.args.get('from') or None
+    fin = request.args.get('to') or None
+    types = request.args.get('type')
+    
+    try:
+        for value in (debut, fin):
+            if value is not None:
+                datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': 'Format de date invalide (YYYY-MM-DD attendu)'}), 400
+    if debut and fin and debut > fin:
+        return jsonify({'error': 'La date de début doit précéder la date de fin'}), 400
+    if types:
+        types = set(types.split(','))
+        unknown = types.difference(CONFLICT_TYPES)
+        if unknown:
+            return jsonify({'error': f"Types de conflit inconnus: {', '.join(sorted(unknown))} "
+                                     f"(disponibles: {', '.join(CONFLICT_TYPES)})"}), 400
+    else:
+        types = None
+    
+    try:
+        conn = get_db_connection()
+        # Mise à jour depuis le journal dans un instantané cohérent
+        conn.execute('BEGIN')
+        seq = conflict_index.refresh(conn)
+        conn.close()
+        
+        conflicts = conflict_index.conflicts(debut, fin, types)
+        counts = dict.fromkeys(CONFLICT_TYPES, 0)
+        for conflict in conflicts:
+            counts[conflict['type']] += 1
+        return jsonify({
+            'from': debut,
+            'to': fin,
+            'seq': seq,
+            'count': len(conflicts),
+            'counts': counts,
+            'conflicts': conflicts
+        })
+    except Exception as e:
+        if 'conn' in locals() and conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
 # Route pour vérifier si un libellé est déjà assigné à une date spécifique
 @api_bp.route('/check-nurse-availability', methods=['GET', 'POST'])
 def check_nurse_availability():
@@ -579,53 +1104,285 @@ def check_nurse_availability():
         label = request.json.get('label')
         if label is None and 'infirmierId' in request.json:
             # Compat: on peut convertir un ID en label si besoin
-            with get_db_connection() as conn:
-                inf = conn.execute('SELECT nom, prenom, status FROM listeInfirmier WHERE id = ?', (request.json['infirmierId'],)).fetchone()
-                label = f"{inf['prenom']} {inf['nom']} - {inf['status']}" if inf else None
+            conn = get_db_connection()
+            label = get_label_from_infirmier_id(conn, request.json['infirmierId'])
+            conn.close()
         date = request.json['date']
         current_room = request.json.get('sourceSalle', None)
     
     try:
         conn = get_db_connection()
         
-        # Vérifier si l'emploi du temps existe pour cette date
-        emploi = conn.execute('SELECT * FROM emploisDuTemps WHERE date = ?', (date,)).fetchone()
+        # Seules les cases occupées ou fermées de cette date existent (clé primaire date, room)
+        cells = conn.execute(
+            'SELECT room, label, state FROM assignment WHERE date = ?', (date,)
+        ).fetchall()
+        # Absence déclarée ce jour-là (recherche indexée sur les absences de l'infirmier)
+        absence = find_absence(conn, get_infirmier_id_from_label(conn, label), date) if label else None
+        conn.close()
         
-        if not emploi:
-            conn.close()
+        if not cells:
             # Si pas d'emploi du temps pour cette date, l'infirmier est disponible partout
             return jsonify({
-                'available': True,
+                'available': absence is None,
                 'assigned_room': None,
-                'sallesOccupees': []
+                'sallesOccupees': [],
+                'absence': absence
             })
         
-        # Vérifier dans quelle salle ce libellé est affecté ce jour-là
+        # Vérifier dans quelle salle ce libellé est affecté ce jour-là (ordre des salles conservé)
+        by_room = {cell['room']: cell for cell in cells}
         assigned_room = None
         for field in SALLE_NAMES:
-            if emploi[field] and label and str(emploi[field]) == str(label):
+            cell = by_room.get(field)
+            if cell and cell['label'] and label and str(cell['label']) == str(label):
                 assigned_room = field
                 break
         
         # Vérifier les salles fermées ou non utilisées
-        salles_non_disponibles = []
-        for field in SALLE_NAMES:
-            if emploi[f'{field}_state'] in ['close', 'unuse']:
-                salles_non_disponibles.append(field)
-        
-        conn.close()
+        salles_non_disponibles = [
+            field for field in SALLE_NAMES
+            if field in by_room and by_room[field]['state'] in CLOSED_STATES
+        ]
         
         # Si le libellé n'est affecté nulle part ou s'il est affecté dans la salle actuelle (déplacement)
-        available = assigned_room is None or assigned_room == current_room
+        available = (assigned_room is None or assigned_room == current_room) and absence is None
         
         return jsonify({
             'available': available,
             'assigned_room': assigned_room,
             'sallesOccupees': [assigned_room] if assigned_room and assigned_room != current_room else [],
-            'sallesFermees': salles_non_disponibles
+            'sallesFermees': salles_non_disponibles,
+            'absence': absence
+        })
+        
+    except Exception as e:
+        if 'conn' in locals() and conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
+# Route d'administration: recalcul complet de la table statistique depuis les affectations
+@api_bp.route('/admin/statistiques/rebuild', methods=['POST'])
+def rebuild_statistiques():
+    # ?verify=1 (ou {"verify": true}) : rapport des écarts sans écriture
+    data = request.get_json(silent=True) or {}
+    verify = request.args.get('verify', '').lower() in ('1', 'true', 'yes') or bool(data.get('verify'))
+    
+    try:
+        conn = get_db_connection()
+        
+        if verify:
+            drifts = verify_statistics(conn)
+            conn.close()
+            return jsonify({
+                'success': True,
+                'verify': True,
+                'drift_count': len(drifts),
+                'infirmiers': len({drift['infirmier_id'] for drift in drifts}),
+                'drifts': drifts
+            })
+        
+        with transaction(conn):
+            drifts = verify_statistics(conn)
+            updated = rebuild_statistics(conn)
+            bump_data_version(conn)
+        conn.close()
+        broker.publish('stats', {'action': 'rebuilt', 'corrected': len(drifts)})
+        
+        logger.info('Statistiques recalculées: %d lignes, %d écarts corrigés', updated, len(drifts))
+        return jsonify({
+            'success': True,
+            'verify': False,
+            'updated': updated,
+            'corrected': len(drifts)
         })
         
     except Exception as e:
         if 'conn' in locals() and conn:
             conn.close()
         return jsonify({'error': str(e)}), 500
+
+# Métriques des requêtes par route au format Prometheus
+@api_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    gauges = {
+        'sse_subscribers': ('Abonnés /api/events connectés à ce processus', broker.subscribers),
+    }
+    return Response(metrics_registry.render(gauges), content_type=PROMETHEUS_CONTENT_TYPE)
+
+# Dernières traces SQL (instructions, durées, appelants, répétitions); mode debug ou SQL_TRACE
+@api_bp.route('/debug/sql-trace', methods=['GET'])
+def get_sql_traces():
+    if not sql_trace.is_enabled(current_app):
+        return jsonify({'error': 'Traçage SQL désactivé (mode debug ou SQL_TRACE requis)'}), 404
+    traces = list(sql_trace.recent_traces)
+    if request.args.get('repeated') == '1':
+        traces = [trace for trace in traces if trace['repeated']]
+    return jsonify({'traces': traces[::-1]})
+
+# Flux Server-Sent Events des modifications (cases, statistiques, infirmiers)
+@api_bp.route('/events', methods=['GET'])
+def stream_events():
+    # Reprise après reconnexion: Last-Event-ID (envoyé par EventSource) ou ?since=
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        last_seq = int(last_id) if last_id else None
+    except ValueError:
+        last_seq = None
+    
+    # Chaque flux occupe un fil du serveur: au-delà de la limite, le client réessaiera
+    release = broker.subscribe()
+    if release is None:
+        response = jsonify({'error': 'Trop de flux /api/events ouverts, réessayer plus tard'})
+        response.headers['Retry-After'] = str(RETRY_MS // 1000)
+        return response, 503
+    
+    response = Response(
+        broker.stream(last_seq, release=release),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Place libérée même si le flux n'a jamais été parcouru (client parti aussitôt)
+    response.call_on_close(release)
+    return response
+
+# Route de synchronisation par delta: entités modifiées depuis un numéro du journal
+@api_bp.route('/changes', methods=['GET'])
+def get_changes():
+    since = request.args.get('since', type=int)
+    limit = max(1, min(request.args.get('limit', DEFAULT_CHANGES_LIMIT, type=int), DEFAULT_CHANGES_LIMIT))
+    
+    try:
+        conn = get_db_connection()
+        
+        # Sans ?since=, seul le numéro courant est renvoyé (point de départ du client)
+        if since is None:
+            last_seq, _ = get_journal_state(conn)
+            conn.close()
+            return jsonify({'last_seq': last_seq})
+        
+        changes = read_changes(conn, since, limit)
+        if changes is None:
+            last_seq, _ = get_journal_state(conn)
+            conn.close()
+            return jsonify({'resync_required': True, 'last_seq': last_seq})
+        
+        # Doublons recalculés pour les jours touchés
+        dates = {cell['date'] for cell in changes['cells']}
+        rows = load_emploi_rows(conn, dates) if dates else {}
+        conn.close()
+        
+        changes['resync_required'] = False
+        changes['doublons'] = {date: build_labels_and_doublons(row)[1] for date, row in rows.items()}
+        return jsonify(changes)
+        
+    except Exception as e:
+        if 'conn' in locals() and conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
+# Route d'administration: compaction du journal des modifications
+@api_bp.route('/admin/journal/compact', methods=['POST'])
+def compact_changes():
+    data = request.get_json(silent=True) or {}
+    retention = data.get('retention')
+    if retention is not None and (not isinstance(retention, int) or retention < 0):
+        return jsonify({'error': 'retention invalide'}), 400
+    
+    try:
+        conn = get_db_connection()
+        with transaction(conn):
+            result = compact_journal(conn, retention)
+        conn.close()
+        
+        logger.info('Journal compacté: %(merged)d fusionnées, %(truncated)d tronquées', result)
+        return jsonify(dict(result, success=True))
+        
+    except Exception as e:
+        if 'conn' in locals() and conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
+# Route d'export du planning en flux (CSV ou NDJSON), mémoire constante
+@api_bp.route('/export/planning', methods=['GET'])
+def export_planning_route():
+    debut = request.args.get('from') or '0000-01-01'
+    fin = request.args.get('to') or '9999-12-31'
+    export_format = request.args.get('format', 'csv').lower()
+    
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Format non supporté: {export_format} (csv ou ndjson)'}), 400
+    for value in (request.args.get('from'), request.args.get('to')):
+        if value:
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                return jsonify({'error': 'Format de date invalide (YYYY-MM-DD attendu)'}), 400
+    if debut > fin:
+        return jsonify({'error': 'La date de début doit précéder la date de fin'}), 400
+    
+    conn = get_db_connection()
+    filename = f"planning_{request.args.get('from') or 'debut'}_{request.args.get('to') or 'fin'}.{export_format}"
+    response = Response(
+        export_planning(conn, debut, fin, export_format),
+        content_type=EXPORT_FORMATS[export_format],
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+    # Connexion rendue au pool quand le flux est terminé (ou le client déconnecté)
+    response.call_on_close(conn.close)
+    return response
+
+# Route d'import en masse: infirmiers et/ou planning historique en une transaction
+@api_bp.route('/import', methods=['POST'])
+def bulk_import():
+    # JSON: {"infirmiers": [...], "planning": [...], "replace_days": bool, "skip_invalid": bool}
+    # CSV (ou JSON brut): corps du fichier avec ?type=infirmiers|planning
+    # ?rebuild=1: statistique recalculée entièrement au lieu des variations de l'import
+    flag = lambda name: request.args.get(name, '').lower() in ('1', 'true', 'yes')
+    try:
+        if request.args.get('type'):
+            kind = request.args.get('type')
+            if kind not in ('infirmiers', 'planning'):
+                return jsonify({'error': f'Type d\'import invalide: {kind} (infirmiers ou planning)'}), 400
+            import_format = request.args.get('format') or ('json' if request.is_json else 'csv')
+            records = parse_records(request.get_data(), import_format.lower(), key=kind)
+            nurses, schedule = (records, None) if kind == 'infirmiers' else (None, records)
+            replace_days, skip_invalid = flag('replace_days'), flag('skip_invalid')
+        else:
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
+                return jsonify({'error': 'Corps JSON {infirmiers, planning} ou ?type= requis'}), 400
+            nurses = parse_records(data.get('infirmiers') or [], 'json')
+            schedule = parse_records(data.get('planning') or [], 'json')
+            replace_days = bool(data.get('replace_days')) or flag('replace_days')
+            skip_invalid = bool(data.get('skip_invalid')) or flag('skip_invalid')
+    except BulkImportError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        conn = get_db_connection()
+        with transaction(conn):
+            report = run_import(conn, nurses, schedule, replace_days=replace_days, skip_invalid=skip_invalid,
+                                rebuild=flag('rebuild'))
+        conn.close()
+        
+        # Nouveaux infirmiers et cases importées: index et clients rechargés
+        label_index.invalidate()
+        if report['infirmiers']['inserted'] or report['planning']['cells']:
+            broker.publish('resync', {'reason': 'import'})
+        
+        logger.info('Import: %d infirmiers, %d cases sur %d jours',
+                    report['infirmiers']['inserted'], report['planning']['cells'], report['planning']['days'])
+        return jsonify(dict(report, success=True))
+        
+    except BulkImportError as e:
+        if 'conn' in locals() and conn:
+            conn.close()
+        return jsonify({'error': str(e), 'error_count': len(e.errors), 'errors': e.errors[:MAX_REPORTED_ERRORS]}), 400
+    except Exception as e:
+        if 'conn' in locals() and conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,161 @@
+"""
+Point d'entrée de production de l'API (gunicorn, plusieurs processus et fils).
+
+    python api/serve.py --workers 4 --threads 8 --port 5000
+
+Le processus maître initialise la base (schéma, migrations) une seule fois, puis les
+workers sont créés par fork (application préchargée). Chaque worker repart d'un pool
+de connexions vide (db.py) ; l'index des libellés se recharge quand un autre processus
+modifie les infirmiers (label_index.py) et les événements /api/events passent par le
+bus partagé event_bus (events.py) dès qu'il y a plus d'un worker ; /api/metrics
+additionne les instantanés de tous les workers (METRICS_DIR, metrics.py).
+
+Les écritures concurrentes de plusieurs processus reposent sur SQLite : mode WAL
+(lecteurs jamais bloqués), transactions d'écriture BEGIN IMMEDIATE et attente
+busy_timeout quand un autre processus tient le verrou d'écriture.
+
+Arrêt propre (SIGTERM) : les flux SSE sont fermés (les clients se reconnectent
+ailleurs), les requêtes en cours ont --graceful-timeout secondes pour se terminer.
+
+Réglages (options ou variables d'environnement) :
+    --host / SERVE_HOST                 adresse d'écoute (127.0.0.1)
+    --port / PORT                       port (5000)
+    --workers / SERVE_WORKERS           processus (nombre de cœurs, 4 au plus)
+    --threads / SERVE_THREADS           fils par processus (8); chaque client /api/events
+                                        occupe un fil tant qu'il est connecté
+    --max-event-streams / SERVE_MAX_EVENT_STREAMS  flux /api/events par processus
+                                        (--threads - 2, au moins 1); au-delà: 503, le
+                                        client réessaie, les autres routes gardent des fils
+    --graceful-timeout / SERVE_GRACEFUL_TIMEOUT   délai d'arrêt propre (30 s)
+    --busy-timeout / SQLITE_BUSY_TIMEOUT          attente du verrou d'écriture (ms)
+"""
+import argparse
+import logging
+import os
+import shutil
+import signal
+import sys
+import tempfile
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:  # gunicorn n'existe pas sous Windows
+    BaseApplication = None
+
+import db
+from app import create_app, init_db
+from conflicts import conflict_index
+from events import broker
+from label_index import label_index
+from metrics import registry as metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Attente par défaut du verrou d'écriture avec plusieurs processus (ms)
+DEFAULT_BUSY_TIMEOUT = 10000
+
+
+def default_workers():
+    return max(1, min(os.cpu_count() or 1, 4))
+
+
+def post_fork(server, worker):
+    # Pool de connexions remis à zéro par db.py; index rechargés à la première requête
+    label_index.invalidate()
+    conflict_index.invalidate()
+
+
+def post_worker_init(worker):
+    # SIGTERM: fermer d'abord les flux SSE, sinon l'arrêt attendrait graceful_timeout
+    handle_exit = worker.handle_exit
+
+    def close_streams_and_exit(sig, frame):
+        broker.close()
+        handle_exit(sig, frame)
+
+    signal.signal(signal.SIGTERM, close_streams_and_exit)
+
+
+def worker_exit(server, worker):
+    broker.close()
+    db.get_pool().close_all()
+
+
+class ProductionServer(BaseApplication or object):
+    """
+    Application gunicorn configurée depuis le code (sans fichier de configuration)
+    """
+    def __init__(self, application, options):
+        self.application = application
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serveur de production de l'API")
+    parser.add_argument('--host', default=os.environ.get('SERVE_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('SERVE_WORKERS', default_workers())))
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('SERVE_THREADS', 8)))
+    parser.add_argument('--max-event-streams', type=int,
+                        default=int(os.environ.get('SERVE_MAX_EVENT_STREAMS', 0)) or None)
+    parser.add_argument('--graceful-timeout', type=int,
+                        default=int(os.environ.get('SERVE_GRACEFUL_TIMEOUT', 30)))
+    parser.add_argument('--busy-timeout', type=int,
+                        default=int(os.environ.get('SQLITE_BUSY_TIMEOUT', DEFAULT_BUSY_TIMEOUT)))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if BaseApplication is None:
+        logger.error("gunicorn n'est pas installé (pip install gunicorn); "
+                     "en développement: python api/app.py")
+        return 1
+
+    # Réglages SQLite communs à tous les processus, base initialisée une seule fois
+    db.configure(busy_timeout=args.busy_timeout, journal_mode='WAL')
+    init_db()
+    # Aucune connexion ouverte au moment du fork
+    db.get_pool().close_all()
+
+    max_streams = args.max_event_streams or max(1, args.threads - 2)
+    app = create_app({
+        'EVENT_BUS': 'sqlite' if args.workers > 1 else 'memory',
+        'EVENTS_MAX_SUBSCRIBERS': max_streams,
+    })
+    # Métriques additionnées entre workers (dossier temporaire supprimé à l'arrêt)
+    metrics_dir = None
+    if args.workers > 1 and not metrics_registry.metrics_dir:
+        metrics_dir = metrics_registry.metrics_dir = tempfile.mkdtemp(prefix='metrics_')
+    options = {
+        'bind': f'{args.host}:{args.port}',
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread',
+        'preload_app': True,
+        'graceful_timeout': args.graceful_timeout,
+        'post_fork': post_fork,
+        'post_worker_init': post_worker_init,
+        'worker_exit': worker_exit,
+        'accesslog': '-',
+    }
+    logger.info('Démarrage: %d worker(s) × %d fil(s) (%d flux /api/events) sur %s',
+                args.workers, args.threads, max_streams, options['bind'])
+    try:
+        ProductionServer(app, options).run()
+    finally:
+        if metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""
+Traçage des instructions SQL par requête (développement) et détection des N+1.
+
+Actif en mode debug (python api/app.py) ou avec SQL_TRACE=True dans la configuration
+(FLASK_SQL_TRACE=1). Chaque requête enregistre ses instructions (texte avec les valeurs
+liées, via set_trace_callback), leur durée et l'endroit du code qui les a lancées, puis :
+    - ajoute les en-têtes X-SQL-Queries, X-SQL-Time-Ms et X-SQL-Repeated à la réponse ;
+    - journalise un avertissement pour les instructions répétées : même texte exécuté
+      plusieurs fois, ou même forme (valeurs remplacées par ?) au moins
+      SQL_TRACE_REPEAT_THRESHOLD fois, typiquement une requête par salle ou par jour ;
+    - conserve les SQL_TRACE_RECENT dernières traces (GET /api/debug/sql-trace).
+
+Durée d'une instruction : temps SQLite (db_time()) écoulé jusqu'à l'instruction suivante
+du même fil, lecture des lignes comprise. Les étapes des triggers sont rattachées à
+l'instruction qui les déclenche, et les lignes d'un executemany (ou les instructions
+d'un executescript) comptent pour un seul appel (rows). Réponses en flux : seules les instructions exécutées avant l'envoi des
+en-têtes sont tracées.
+
+Sans traçage actif, aucun callback n'est installé sur les connexions (coût nul).
+"""
+import logging
+import os
+import re
+import sys
+import threading
+from collections import deque
+
+from flask import g, request
+
+import db
+from db import db_time
+
+logger = logging.getLogger(__name__)
+
+# Nombre d'exécutions d'une même forme d'instruction à partir duquel elle est signalée
+REPEAT_THRESHOLD = int(os.environ.get('SQL_TRACE_REPEAT_THRESHOLD', 3))
+# Traces des dernières requêtes conservées en mémoire
+RECENT_TRACES = int(os.environ.get('SQL_TRACE_RECENT', 50))
+
+# Contrôle de transaction: jamais signalé comme répétition
+TRANSACTION_KEYWORDS = ('BEGIN', 'COMMIT', 'END', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'PRAGMA')
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|\bNULL\b", re.IGNORECASE)
+_VALUE_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACES = re.compile(r'\s+')
+
+# Appelants d'une instruction: fichiers du projet, hors db.py et ce module
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CALL_SITE_DEPTH = 3
+_INTERNAL_FILES = {__file__, db.__file__}
+
+recent_traces = deque(maxlen=RECENT_TRACES)
+
+
+def normalize(sql):
+    """
+    Forme d'une instruction: valeurs remplacées par ?, listes IN (...) réduites
+    """
+    shape = _LITERALS.sub('?', sql)
+    shape = _VALUE_LISTS.sub('(?, ...)', shape)
+    return _SPACES.sub(' ', shape).strip()
+
+
+def _call_site():
+    """
+    Pile d'appel dans le code du projet, de l'appelant le plus proche vers la route
+    (au plus CALL_SITE_DEPTH niveaux), ex. "label_index.py:60 read_version < ..."
+    """
+    frames = []
+    frame = sys._getframe(2)
+    while frame is not None and len(frames) < CALL_SITE_DEPTH:
+        filename = frame.f_code.co_filename
+        if (filename not in _INTERNAL_FILES and filename.startswith(PROJECT_DIR)
+                and 'site-packages' not in filename):
+            frames.append(f'{os.path.basename(filename)}:{frame.f_lineno} {frame.f_code.co_name}')
+        frame = frame.f_back
+    return ' < '.join(frames) or None
+
+
+class QueryTrace:
+    """
+    Instructions exécutées par un fil entre start() et stop()
+    """
+    def __init__(self, call_sites=True):
+        self.call_sites = call_sites
+        self.statements = []   # [{'sql', 'site', 'ms', 'rows', 'trigger_steps'}]
+        self.events = 0        # appels du callback, étapes des triggers comprises
+        self.db_seconds = 0.0
+        self._marks = []
+        self._db_start = db_time()
+
+    def add(self, sql, site, mark):
+        self.events += 1
+        # Aucun temps SQLite écoulé depuis l'instruction précédente: même appel execute*.
+        # Même texte = étape de trigger; sinon ligne suivante d'un executemany.
+        if self.statements and self._marks[-1] == mark:
+            previous = self.statements[-1]
+            if previous['sql'] == sql:
+                previous['trigger_steps'] += 1
+            else:
+                previous['rows'] += 1
+            return
+        self.statements.append({'sql': sql, 'site': site, 'ms': 0.0, 'rows': 1, 'trigger_steps': 0})
+        self._marks.append(mark)
+
+    def finish(self):
+        end = db_time()
+        bounds = self._marks[1:] + [end]
+        for statement, mark, next_mark in zip(self.statements, self._marks, bounds):
+            statement['ms'] = round((next_mark - mark) * 1000, 3)
+        self.db_seconds = end - self._db_start
+
+    @property
+    def query_count(self):
+        return len(self.statements)
+
+    def repeated(self, threshold=REPEAT_THRESHOLD):
+        """
+        Instructions répétées: [{'sql' (forme), 'count', 'distinct', 'ms', 'sites'}]
+        """
+        groups = {}
+        for statement in self.statements:
+            if statement['sql'].lstrip().upper().startswith(TRANSACTION_KEYWORDS):
+                continue
+            group = groups.setdefault(normalize(statement['sql']), {'texts': set(), 'count': 0, 'ms': 0.0, 'sites': set()})
+            group['texts'].add(statement['sql'])
+            group['count'] += 1
+            group['ms'] += statement['ms']
+            if statement['site']:
+                group['sites'].add(statement['site'])
+        flagged = []
+        for shape, group in groups.items():
+            distinct = len(group['texts'])
+            if group['count'] >= threshold or distinct < group['count']:
+                flagged.append({
+                    'sql': shape,
+                    'count': group['count'],
+                    'distinct': distinct,
+                    'ms': round(group['ms'], 3),
+                    'sites': sorted(group['sites']),
+                })
+        flagged.sort(key=lambda item: -item['count'])
+        return flagged
+
+    def to_dict(self):
+        return {
+            'query_count': self.query_count,
+            'db_ms': round(self.db_seconds * 1000, 3),
+            'repeated': self.repeated(),
+            'statements': self.statements,
+        }
+
+
+# Traces actives du fil courant (plusieurs si imbriquées, ex. banc + application)
+_local = threading.local()
+
+
+def _on_statement(sql):
+    traces = getattr(_local, 'traces', None)
+    if not traces:
+        return
+    # Pile d'appel relevée seulement si une trace la demande (coûteux)
+    site = _call_site() if any(trace.call_sites for trace in traces) else None
+    mark = db_time()
+    for trace in traces:
+        trace.add(sql, site, mark)
+
+
+def install(conn):
+    """
+    Hook de connexion (db.add_connect_hook): trace les instructions de conn
+    """
+    conn.set_trace_callback(_on_statement)
+
+
+_enabled = False
+_enable_lock = threading.Lock()
+
+
+def enable():
+    """
+    Installe le callback sur les nouvelles connexions du pool; les connexions
+    inactives sont fermées pour être rouvertes avec le callback
+    """
+    global _enabled
+    with _enable_lock:
+        if _enabled:
+            return
+        _enabled = True
+    db.add_connect_hook(install)
+    db.get_pool().close_all()
+
+
+def disable():
+    global _enabled
+    with _enable_lock:
+        _enabled = False
+    db.remove_connect_hook(install)
+    db.get_pool().close_all()
+
+
+def start(call_sites=True):
+    """
+    Commence une trace pour le fil courant (enable() doit avoir été appelé)
+    """
+    trace = QueryTrace(call_sites)
+    if not hasattr(_local, 'traces'):
+        _local.traces = []
+    _local.traces.append(trace)
+    return trace
+
+
+def stop(trace):
+    _local.traces.remove(trace)
+    trace.finish()
+    return trace
+
+
+def is_enabled(app):
+    """
+    SQL_TRACE de la configuration; par défaut (None), actif en mode debug
+    """
+    flag = app.config.get('SQL_TRACE')
+    return app.debug if flag is None else bool(flag)
+
+
+def init_app(app):
+    """
+    Trace les requêtes de l'application quand is_enabled(app)
+    """
+    @app.before_request
+    def start_sql_trace():
+        if is_enabled(app):
+            enable()
+            g.sql_trace = start()
+
+    @app.after_request
+    def report_sql_trace(response):
+        trace = g.pop('sql_trace', None)
+        if trace is None:
+            return response
+        stop(trace)
+        repeated = trace.repeated()
+        response.headers['X-SQL-Queries'] = str(trace.query_count)
+        response.headers['X-SQL-Time-Ms'] = f'{trace.db_seconds * 1000:.2f}'
+        response.headers['X-SQL-Repeated'] = str(len(repeated))
+        for item in repeated:
+            logger.warning('%s %s: instruction exécutée %d fois (%d texte(s) distinct(s), %.2f ms) depuis %s: %s',
+                           request.method, request.path, item['count'], item['distinct'], item['ms'],
+                           ', '.join(item['sites']) or '?', item['sql'])
+        logger.debug('%s %s: %d instruction(s), %.2f ms SQLite',
+                     request.method, request.path, trace.query_count, trace.db_seconds * 1000)
+        entry = trace.to_dict()
+        entry.update({'method': request.method, 'path': request.full_path.rstrip('?'),
+                      'status': response.status_code})
+        recent_traces.append(entry)
+        return response
+
+    @app.teardown_request
+    def discard_sql_trace(error):
+        # Exception non gérée: after_request n'a pas été appelé
+        trace = g.pop('sql_trace', None)
+        if trace is not None:
+            stop(trace)
@@ -0,0 +1,113 @@
+"""
+Statistiques par période, adossées à l'agrégat mensuel statistique_mensuelle.
+
+apply_assignments() y reporte ses variations (mois, infirmier, salle) dans la même
+transaction que statistique. Une requête sur [debut, fin] lit l'agrégat pour les mois
+entièrement couverts et ne compte les lignes brutes de assignment que pour les mois
+partiels aux deux bornes : le coût dépend du nombre de mois, pas de jours × salles.
+"""
+from collections import Counter
+from datetime import date, timedelta
+
+# Bornes utilisées quand la période est ouverte d'un côté
+MIN_MONTH = '0000-01'
+MAX_MONTH = '9999-12'
+
+
+def month_of(day):
+    """Mois 'YYYY-MM' d'une date 'YYYY-MM-DD'."""
+    return str(day)[:7]
+
+def apply_monthly_deltas(conn, deltas):
+    """Applique les variations {(infirmier_id, salle, mois): delta} à l'agrégat mensuel
+    (compteurs bornés à 0), en une requête executemany."""
+    rows = [(mois, infirmier_id, salle, delta)
+            for (infirmier_id, salle, mois), delta in deltas.items() if delta]
+    if not rows:
+        return
+    conn.executemany(
+        """
+        INSERT INTO statistique_mensuelle (mois, infirmier_id, room, total)
+        VALUES (?, ?, ?, MAX(?, 0))
+        ON CONFLICT (mois, infirmier_id, room) DO UPDATE SET total = MAX(total + ?, 0)
+        """,
+        [(mois, infirmier_id, salle, delta, delta) for mois, infirmier_id, salle, delta in rows]
+    )
+
+def rebuild_monthly(conn):
+    """Recalcule entièrement l'agrégat mensuel depuis assignment (une agrégation SQL)."""
+    conn.execute('DELETE FROM statistique_mensuelle')
+    cursor = conn.execute(
+        """
+        INSERT INTO statistique_mensuelle (mois, infirmier_id, room, total)
+        SELECT substr(date, 1, 7), infirmier_id, room, COUNT(*)
+        FROM assignment
+        WHERE infirmier_id IS NOT NULL AND label IS NOT NULL
+        GROUP BY substr(date, 1, 7), infirmier_id, room
+        """
+    )
+    return cursor.rowcount
+
+def _raw_counts(conn, debut, fin, counts):
+    """Ajoute à counts les affectations brutes de [debut, fin] (dates incluses)."""
+    for row in conn.execute(
+        """
+        SELECT infirmier_id, room, COUNT(*) AS total
+        FROM assignment
+        WHERE date BETWEEN ? AND ? AND infirmier_id IS NOT NULL AND label IS NOT NULL
+        GROUP BY infirmier_id, room
+        """,
+        (debut, fin)
+    ):
+        counts[(row['infirmier_id'], row['room'])] += row['total']
+
+def _monthly_counts(conn, first_month, last_month, counts):
+    """Ajoute à counts l'agrégat des mois [first_month, last_month]."""
+    for row in conn.execute(
+        """
+        SELECT infirmier_id, room, SUM(total) AS total
+        FROM statistique_mensuelle
+        WHERE mois BETWEEN ? AND ?
+        GROUP BY infirmier_id, room
+        """,
+        (first_month, last_month)
+    ):
+        counts[(row['infirmier_id'], row['room'])] += row['total']
+
+def _next_month_start(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def range_counts(conn, debut=None, fin=None):
+    """Nombre d'affectations par (infirmier_id, salle) entre debut et fin inclus
+    (objets date, None = période ouverte). Retourne un Counter."""
+    counts = Counter()
+    if debut is not None and fin is not None and debut > fin:
+        return counts
+
+    # Premier et dernier mois entièrement couverts par la période
+    if debut is None:
+        first_month = MIN_MONTH
+    elif debut.day == 1:
+        first_month = month_of(debut.isoformat())
+    else:
+        first_month = month_of(_next_month_start(debut).isoformat())
+    if fin is None:
+        last_month = MAX_MONTH
+    elif _next_month_start(fin) - timedelta(days=1) == fin:
+        last_month = month_of(fin.isoformat())
+    else:
+        last_month = month_of((fin.replace(day=1) - timedelta(days=1)).isoformat())
+
+    if first_month > last_month:
+        # Période contenue dans au plus deux mois partiels: lecture brute bornée
+        _raw_counts(conn, debut.isoformat(), fin.isoformat(), counts)
+        return counts
+
+    _monthly_counts(conn, first_month, last_month, counts)
+    # Mois partiels aux bornes
+    if debut is not None and month_of(debut.isoformat()) != first_month:
+        head_end = date.fromisoformat(first_month + '-01') - timedelta(days=1)
+        _raw_counts(conn, debut.isoformat(), head_end.isoformat(), counts)
+    if fin is not None and month_of(fin.isoformat()) != last_month:
+        _raw_counts(conn, fin.replace(day=1).isoformat(), fin.isoformat(), counts)
+    return counts
@@ -0,0 +1,83 @@
+"""
+Reconstruction et vérification de la table statistique.
+
+Les compteurs de statistique sont tenus à jour de façon incrémentale par le chemin
+d'écriture des affectations. Ce module les recalcule en une seule agrégation SQL sur
+la table assignment (GROUP BY infirmier), sans boucle Python sur les lignes :
+    rebuild_statistics(conn)  réécrit tous les compteurs (et l'agrégat mensuel)
+    verify_statistics(conn)   liste les écarts (infirmier, salle, stocké, attendu) sans écrire
+"""
+from assignments import SALLE_NAMES
+from stat_rollup import rebuild_monthly
+
+
+def _counts_query():
+    """
+    Sous-requête: nombre d'affectations par infirmier et par salle, calculé depuis assignment
+    """
+    columns = ', '.join(f"SUM(room = '{salle}') AS {salle}" for salle in SALLE_NAMES)
+    return f"""
+        SELECT infirmier_id, {columns}
+        FROM assignment
+        WHERE infirmier_id IS NOT NULL AND label IS NOT NULL
+        GROUP BY infirmier_id
+    """
+
+
+def rebuild_statistics(conn):
+    """
+    Recalcule tous les compteurs de statistique et l'agrégat statistique_mensuelle
+    (dans la transaction courante). Retourne le nombre de lignes statistique mises à jour.
+    """
+    # Une ligne de statistique par infirmier, compteurs remis à zéro
+    conn.execute('INSERT OR IGNORE INTO statistique (infirmierID) SELECT id FROM listeInfirmier')
+    conn.execute(f"UPDATE statistique SET {', '.join(f'{salle} = 0' for salle in SALLE_NAMES)}")
+
+    # Puis les comptes agrégés, en une seule requête
+    assignments = ', '.join(f'{salle} = counts.{salle}' for salle in SALLE_NAMES)
+    cursor = conn.execute(
+        f"""
+        UPDATE statistique SET {assignments}
+        FROM ({_counts_query()}) AS counts
+        WHERE statistique.infirmierID = counts.infirmier_id
+        """
+    )
+    updated = cursor.rowcount
+    rebuild_monthly(conn)
+    return updated
+
+
+def verify_statistics(conn):
+    """
+    Compare statistique aux comptes recalculés, sans rien écrire.
+    Retourne la liste des écarts [{infirmier_id, label, salle, stored, expected, drift}].
+    """
+    stored = ', '.join(f'COALESCE(s.{salle}, 0) AS stored_{salle}' for salle in SALLE_NAMES)
+    expected = ', '.join(f'COALESCE(c.{salle}, 0) AS expected_{salle}' for salle in SALLE_NAMES)
+    mismatch = ' OR '.join(f'COALESCE(s.{salle}, 0) != COALESCE(c.{salle}, 0)' for salle in SALLE_NAMES)
+    rows = conn.execute(
+        f"""
+        SELECT i.id, i.prenom, i.nom, i.status, {stored}, {expected}
+        FROM listeInfirmier i
+        LEFT JOIN statistique s ON s.infirmierID = i.id
+        LEFT JOIN ({_counts_query()}) AS c ON c.infirmier_id = i.id
+        WHERE {mismatch}
+        ORDER BY i.id
+        """
+    ).fetchall()
+
+    # Seules les lignes en écart sont parcourues, pour mettre en forme le rapport
+    drifts = []
+    for row in rows:
+        label = f"{row['prenom']} {row['nom']} - {row['status']}"
+        for salle in SALLE_NAMES:
+            if row[f'stored_{salle}'] != row[f'expected_{salle}']:
+                drifts.append({
+                    'infirmier_id': row['id'],
+                    'label': label,
+                    'salle': salle,
+                    'stored': row[f'stored_{salle}'],
+                    'expected': row[f'expected_{salle}'],
+                    'drift': row[f'stored_{salle}'] - row[f'expected_{salle}'],
+                })
+    return drifts
@@ -0,0 +1,70 @@
+"""
+Version des données et GET conditionnels (ETag / Last-Modified).
+
+Chaque route d'écriture appelle bump_data_version() dans sa transaction. Les routes
+de lecture décorées par @conditional renvoient l'ETag correspondant à la version
+courante et répondent 304 à If-None-Match sans lire les tables de données : seule
+la ligne unique de data_version est consultée.
+
+If-Modified-Since n'est pas pris en compte : updated_at est à la seconde près, une
+écriture dans la même seconde que la réponse précédente donnerait un 304 périmé.
+Last-Modified reste envoyé à titre indicatif.
+"""
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import request, make_response
+
+from db import get_db_connection
+
+
+def bump_data_version(conn):
+    """
+    Incrémente la version des données (à appeler dans la transaction d'écriture)
+    """
+    conn.execute(
+        "UPDATE data_version SET version = version + 1, "
+        "updated_at = strftime('%Y-%m-%dT%H:%M:%SZ', 'now') WHERE id = 1"
+    )
+
+
+def get_data_version(conn):
+    """
+    Retourne (version, date de dernière modification en UTC)
+    """
+    row = conn.execute('SELECT version, updated_at FROM data_version WHERE id = 1').fetchone()
+    if row is None:
+        return 0, None
+    updated_at = datetime.strptime(row['updated_at'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+    return row['version'], updated_at
+
+
+def conditional(view):
+    """
+    Décorateur de route GET: ETag / Last-Modified dérivés de la version des données,
+    réponse 304 sans exécuter la route si le client est à jour.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        conn = get_db_connection()
+        try:
+            version, updated_at = get_data_version(conn)
+        finally:
+            conn.close()
+        etag = f'v{version}'
+
+        # Seul l'ETag (version incrémentée à chaque écriture) fait foi
+        if request.if_none_match and request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag, weak=True)
+        if updated_at:
+            response.last_modified = updated_at
+        # Le navigateur garde la réponse mais la revalide à chaque appel
+        response.cache_control.no_cache = True
+        return response
+    return wrapper
@@ -0,0 +1,130 @@
+"""
+Benchmark du remplissage automatique : 300 infirmiers × 365 jours.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_autofill.py [--nurses 300] [--days 365] [--budget-ms 2000]
+
+Deux mesures :
+  - moteur seul (algorithm.auto_fill) sur un problème synthétique
+  - de bout en bout via POST /api/planning/auto-fill sur une base temporaire
+    (lecture, calcul, écriture des affectations et des statistiques)
+Le résultat est vérifié : aucune double affectation par jour, salles fermées et
+infirmiers absents respectés.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, 'api'))
+
+import db
+from app import app, SCHEMA_DIR
+from migrations import apply_migrations
+from assignments import SALLE_NAMES
+from algorithm import SchedulingProblem, auto_fill
+
+START = date(2024, 1, 1)
+STATUSES = ['J', 'J1', 'J1*', 'J3']
+
+
+def synthetic_problem(nurses, days, seed=0):
+    rand = random.Random(seed)
+    dates = [(START + timedelta(days=i)).isoformat() for i in range(days)]
+    nurse_rows = [(i + 1, STATUSES[i % len(STATUSES)]) for i in range(nurses)]
+    counts = {(i + 1, salle): rand.randint(0, 20) for i in range(nurses) for salle in SALLE_NAMES}
+    open_cells = {d: [salle for salle in SALLE_NAMES if rand.random() > 0.1] for d in dates}
+    return SchedulingProblem(dates, SALLE_NAMES, nurse_rows, counts=counts, open_cells=open_cells)
+
+
+def seed_database(path, nurses, days, seed=0):
+    rand = random.Random(seed)
+    conn = db.ConnectionPool(path, size=0).acquire()
+    with open(os.path.join(SCHEMA_DIR, 'db_schema.sql'), 'r') as f:
+        conn.executescript(f.read())
+    apply_migrations(conn)
+    conn.executemany(
+        'INSERT INTO listeInfirmier (nom, prenom, status, present) VALUES (?, ?, ?, ?)',
+        [(f'Nom{i}', f'Prenom{i}', STATUSES[i % len(STATUSES)], int(rand.random() > 0.05))
+         for i in range(nurses)]
+    )
+    conn.execute('INSERT INTO statistique (infirmierID) SELECT id FROM listeInfirmier')
+    # Quelques salles fermées ou inutilisées
+    dates = [(START + timedelta(days=i)).isoformat() for i in range(days)]
+    conn.executemany('INSERT INTO planning_jour (date) VALUES (?)', [(d,) for d in dates])
+    conn.executemany(
+        'INSERT INTO assignment (date, room, state) VALUES (?, ?, ?)',
+        [(d, salle, rand.choice(['close', 'unuse'])) for d in dates for salle in SALLE_NAMES
+         if rand.random() < 0.05]
+    )
+    conn.commit()
+    conn.close()
+
+
+def check_database(path):
+    conn = db.ConnectionPool(path, size=0).acquire()
+    doubles = conn.execute(
+        'SELECT COUNT(*) FROM (SELECT date, infirmier_id FROM assignment '
+        'WHERE infirmier_id IS NOT NULL GROUP BY date, infirmier_id HAVING COUNT(*) > 1)'
+    ).fetchone()[0]
+    closed = conn.execute(
+        'SELECT COUNT(*) FROM assignment WHERE state IS NOT NULL AND label IS NOT NULL'
+    ).fetchone()[0]
+    absents = conn.execute(
+        'SELECT COUNT(*) FROM assignment a JOIN listeInfirmier i ON i.id = a.infirmier_id '
+        'WHERE i.present = 0'
+    ).fetchone()[0]
+    conn.close()
+    return doubles, closed, absents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nurses', type=int, default=300)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--budget-ms', type=int, default=2000)
+    args = parser.parse_args()
+
+    problem = synthetic_problem(args.nurses, args.days)
+    result = auto_fill(problem, time_budget=args.budget_ms / 1000, seed=0)
+    print(f"moteur      {len(result.assignments)} cases en {result.elapsed:.2f} s | "
+          f"score {result.initial_score:.0f} -> {result.score:.0f} | "
+          f"{result.iterations} itérations, {result.improvements} améliorations")
+
+    client = app.test_client()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'autofill.db')
+        seed_database(path, args.nurses, args.days)
+        db.configure(path)
+        fin = START + timedelta(days=args.days - 1)
+        start = time.perf_counter()
+        response = client.post('/api/planning/auto-fill', json={
+            'debut': START.isoformat(),
+            'fin': fin.isoformat(),
+            'weekends': True,
+            'time_budget_ms': args.budget_ms,
+            'status_rooms': {status: SALLE_NAMES for status in STATUSES},
+            'seed': 0,
+        })
+        elapsed = time.perf_counter() - start
+        data = response.get_json()
+        db.configure()
+        if response.status_code != 200:
+            print(f"erreur {response.status_code}: {data}")
+            return 1
+        doubles, closed, absents = check_database(path)
+
+    print(f"bout en bout {data['applied']} cases écrites en {elapsed:.2f} s "
+          f"(calcul {data['elapsed_ms'] / 1000:.2f} s) | non remplies {len(data['unfilled'])}")
+    print(f"contrôles   doubles affectations {doubles} | salles fermées occupées {closed} | "
+          f"absents affectés {absents}")
+    return 0 if not (doubles or closed or absents) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
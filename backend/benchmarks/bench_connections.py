@@ -0,0 +1,90 @@
+"""
+Benchmark de latence des requêtes : connexion ouverte à chaque requête vs pool.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_connections.py [--requests 500]
+
+Le scénario « avant » reproduit l'ancien comportement (pool de taille 0 : chaque
+requête ouvre puis ferme sa connexion, PRAGMA par défaut de SQLite). Le scénario
+« après » utilise le pool avec WAL et les réglages de db.py.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, 'api'))
+
+import db
+from app import app, SCHEMA_DIR
+from migrations import apply_migrations
+
+LEGACY_SETTINGS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'cache_size': -2000,
+    'mmap_size': 0,
+}
+
+
+def seed_database(path, nurses=150):
+    conn = db.ConnectionPool(path, size=0).acquire()
+    with open(os.path.join(SCHEMA_DIR, 'db_schema.sql'), 'r') as f:
+        conn.executescript(f.read())
+    apply_migrations(conn)
+    conn.executemany(
+        'INSERT INTO listeInfirmier (nom, prenom, status, present) VALUES (?, ?, ?, 1)',
+        [(f'Nom{i}', f'Prenom{i}', 'J') for i in range(nurses)]
+    )
+    conn.execute('INSERT INTO statistique (infirmierID) SELECT id FROM listeInfirmier')
+    conn.commit()
+    conn.close()
+
+
+def run_scenario(client, requests):
+    timings = []
+    for i in range(requests):
+        start = time.perf_counter()
+        if i % 2:
+            client.get('/api/infirmiers')
+        else:
+            client.post('/api/assign-infirmier', json={
+                'date': f'2024-01-{(i % 28) + 1:02d}',
+                'salle': 'salle16',
+                'label': f'Prenom{i % 150} Nom{i % 150} - J',
+            })
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'mean': statistics.mean(timings),
+        'p50': timings[len(timings) // 2],
+        'p95': timings[int(len(timings) * 0.95) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    client = app.test_client()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, pool_size, settings in (('avant', 0, LEGACY_SETTINGS), ('après', None, {})):
+            path = os.path.join(tmp, f'{name}.db')
+            seed_database(path)
+            db.configure(path, pool_size=pool_size, **settings)
+            run_scenario(client, 20)  # échauffement
+            results[name] = run_scenario(client, args.requests)
+        db.configure()
+
+    for name, r in results.items():
+        print(f"{name:6s} moyenne {r['mean']:.3f} ms | p50 {r['p50']:.3f} ms | p95 {r['p95']:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
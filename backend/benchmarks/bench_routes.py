@@ -0,0 +1,464 @@
+"""
+Banc de performance des routes de l'API (blueprint api_bp) sur une base générée.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_routes.py [--nurses 300] [--days 365] [--requests 200]
+        [--concurrency 1] [--routes planning_week,assign] [--output results.json]
+        [--baseline baseline.json] [--tolerance 0.5]
+
+La base temporaire contient N infirmiers et M jours de planning (11 salles occupées
+sur 12, insérées par l'import en masse), ainsi qu'un historique d'absences terminées
+avant le début du planning (ABSENCE_HISTORY par infirmier). Chaque route est appelée via le client de
+test Flask par --concurrency fils en parallèle. Pour chaque route : latences p50, p95,
+p99 (ms), débit (requêtes/s), erreurs (réponses hors 2xx/304), nombre d'instructions
+SQL par requête (sql_trace.py, étapes des triggers comprises) et instructions répétées
+dans une même requête (N+1 probables).
+
+Avec --baseline, les résultats sont comparés à une exécution précédente : une route
+est en régression si son p95 dépasse celui de référence de plus de --tolerance (et de
+plus de --min-delta-ms), si elle exécute plus d'instructions SQL ou si une nouvelle
+instruction y est répétée. Le code de sortie
+vaut alors 1. Comparer des exécutions de mêmes paramètres (--nurses, --days,
+--requests, --concurrency) : avec plusieurs fils, les percentiles sont plus bruités.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, 'api'))
+
+import db
+from app import app, SCHEMA_DIR
+from assignments import SALLE_NAMES
+from bulk_import import run_import
+from label_index import label_index
+from migrations import apply_migrations
+import sql_trace
+
+START = date(2024, 1, 1)
+STATUSES = ['J', 'J1', 'J1*', 'J3']
+
+# Salle laissée vide dans la base générée (cible des déplacements)
+FREE_ROOM = SALLE_NAMES[-1]
+
+# Absences de 5 jours par infirmier dans l'année précédant START
+ABSENCE_HISTORY = 12
+
+# Routes de développement (404 hors mode debug): sans scénario
+DEV_ENDPOINTS = {'api.get_sql_traces'}
+
+
+# ============================
+# Base générée
+# ============================
+
+def seed_database(path, nurses, days):
+    conn = db.ConnectionPool(path, size=0).acquire()
+    with open(os.path.join(SCHEMA_DIR, 'db_schema.sql'), 'r') as f:
+        conn.executescript(f.read())
+    apply_migrations(conn)
+    roster = [
+        {'nom': f'Nom{i}', 'prenom': f'Prenom{i}', 'status': STATUSES[i % len(STATUSES)]}
+        for i in range(nurses)
+    ]
+    labels = [f"Prenom{i} Nom{i} - {STATUSES[i % len(STATUSES)]}" for i in range(nurses)]
+    schedule = []
+    for d in range(days):
+        day = (START + timedelta(days=d)).isoformat()
+        for r, salle in enumerate(SALLE_NAMES[:-1]):
+            schedule.append({'date': day, 'salle': salle, 'label': labels[(d * 7 + r) % nurses]})
+    with db.transaction(conn):
+        run_import(conn, roster, schedule)
+        ids = [row[0] for row in conn.execute('SELECT id FROM listeInfirmier ORDER BY id')]
+        conn.executemany(
+            'INSERT INTO absence (infirmier_id, start_date, end_date, reason) VALUES (?, ?, ?, ?)',
+            [
+                (infirmier_id,
+                 (START - timedelta(days=365 - k * 30 - n % 25)).isoformat(),
+                 (START - timedelta(days=361 - k * 30 - n % 25)).isoformat(),
+                 'congé')
+                for n, infirmier_id in enumerate(ids) for k in range(ABSENCE_HISTORY)
+            ]
+        )
+    conn.close()
+    return labels
+
+
+# ============================
+# Scénarios (une entrée par route)
+# ============================
+
+class Context:
+    """
+    Données de la base générée utilisées pour construire les requêtes
+    """
+    def __init__(self, labels, days):
+        self.labels = labels
+        self.days = days
+        self.lock = threading.Lock()
+        self.pending_ids = []   # infirmiers créés pour les scénarios de modification / suppression
+
+    def day(self, i):
+        return (START + timedelta(days=i % self.days)).isoformat()
+
+    def label(self, i):
+        return self.labels[i % len(self.labels)]
+
+    def take_id(self):
+        with self.lock:
+            return self.pending_ids.pop()
+
+
+def create_nurses(client, ctx, count):
+    roster = [{'nom': f'Bench{i}', 'prenom': f'Tmp{i}', 'status': 'J'} for i in range(count)]
+    client.post('/api/import', json={'infirmiers': roster})
+    infirmiers = client.get('/api/infirmiers').get_json()['infirmiers']
+    ctx.pending_ids = [row['id'] for row in infirmiers if row['nom'].startswith('Bench')]
+
+
+def create_absences(client, ctx, count):
+    ctx.pending_ids = [
+        client.post('/api/absences', json={
+            'infirmier_id': i % len(ctx.labels) + 1, 'from': ctx.day(i), 'to': ctx.day(i), 'reason': 'bench'
+        }).get_json()['id']
+        for i in range(count)
+    ]
+
+
+def move_request(ctx, i):
+    # Aller-retour entre une salle occupée et la salle libre, un jour différent par requête
+    forward = (i // ctx.days) % 2 == 0
+    source, target = (SALLE_NAMES[0], FREE_ROOM) if forward else (FREE_ROOM, SALLE_NAMES[0])
+    day = ctx.day(i)
+    return ('POST', '/api/move-assignment', {
+        'source_date': day, 'source_salle': source, 'target_date': day, 'target_salle': target
+    })
+
+
+def week_range(ctx, i):
+    debut = START + timedelta(days=(i * 7) % max(ctx.days - 7, 1))
+    return debut.isoformat(), (debut + timedelta(days=6)).isoformat()
+
+
+# nom -> (endpoint, construction de la requête (ctx, i), nombre maximum de requêtes, préparation)
+SCENARIOS = {
+    'infirmiers': ('api.get_infirmiers', lambda ctx, i: ('GET', '/api/infirmiers', None), None, None),
+    'infirmier': ('api.get_infirmier', lambda ctx, i: ('GET', f'/api/infirmiers/{i % len(ctx.labels) + 1}', None), None, None),
+    'infirmier_affectations': (
+        'api.get_infirmier_affectations',
+        lambda ctx, i: ('GET', f'/api/infirmiers/{i % len(ctx.labels) + 1}/affectations', None), None, None),
+    'infirmier_create': (
+        'api.add_infirmier',
+        lambda ctx, i: ('POST', '/api/infirmiers', {'nom': f'Cree{i}', 'prenom': 'Bench', 'status': 'J'}), None, None),
+    'infirmier_update': (
+        'api.update_infirmier',
+        lambda ctx, i: ('PUT', f'/api/infirmiers/{i % len(ctx.labels) + 1}', {'present': i % 2}), None, None),
+    'infirmier_delete': (
+        'api.delete_infirmier',
+        lambda ctx, i: ('DELETE', f'/api/infirmiers/{ctx.take_id()}', None), None, create_nurses),
+    'statistiques': ('api.get_statistiques', lambda ctx, i: ('GET', '/api/statistiques', None), None, None),
+    'statistiques_periode': (
+        'api.get_statistiques',
+        lambda ctx, i: ('GET', f'/api/statistiques?from={ctx.day(10)}&to={ctx.day(ctx.days - 10)}', None), None, None),
+    'fairness': ('api.get_statistiques_fairness', lambda ctx, i: ('GET', '/api/statistiques/fairness', None), 50, None),
+    'emplois_semaine': (
+        'api.get_emplois_du_temps_semaine',
+        lambda ctx, i: ('GET', '/api/emplois-du-temps/semaine?debut={}&fin={}'.format(*week_range(ctx, i)), None),
+        None, None),
+    'planning_week': (
+        'api.get_planning_week',
+        lambda ctx, i: ('GET', '/api/planning/week?debut={}&fin={}&stats=1'.format(*week_range(ctx, i)), None),
+        None, None),
+    'planning_range': (
+        'api.get_planning_range',
+        lambda ctx, i: ('GET', f'/api/planning?from={ctx.day(0)}&to={ctx.day(ctx.days - 1)}&limit=366&columns=1', None),
+        50, None),
+    'auto_fill': (
+        'api.auto_fill_planning',
+        lambda ctx, i: ('POST', '/api/planning/auto-fill', dict(
+            zip(('debut', 'fin'), week_range(ctx, i)), time_budget_ms=50, dry_run=True,
+            status_rooms={'J3': ['reveil1', 'reveil2']}
+        )), 20, None),
+    'assign': (
+        'api.assign_infirmier',
+        lambda ctx, i: ('POST', '/api/assign-infirmier', {
+            'date': ctx.day(i), 'salle': SALLE_NAMES[i % (len(SALLE_NAMES) - 1)], 'label': ctx.label(i * 13)
+        }), None, None),
+    'batch': (
+        'api.batch_assignments',
+        lambda ctx, i: ('POST', '/api/assignments/batch', {'operations': [
+            {'date': ctx.day(i + k), 'salle': SALLE_NAMES[k], 'label': ctx.label(i + k * 31)} for k in range(10)
+        ]}), None, None),
+    'move': ('api.move_assignment', move_request, None, None),
+    'reset': (
+        'api.reset_assignment',
+        lambda ctx, i: ('POST', '/api/reset-assignment', {'date': ctx.day(i), 'salle': SALLE_NAMES[1]}), None, None),
+    'salle_state': (
+        'api.update_salle_state',
+        lambda ctx, i: ('POST', '/api/salle-state', {
+            'date': ctx.day(i), 'salle': SALLE_NAMES[2], 'state': 'close' if i % 2 == 0 else None
+        }), None, None),
+    'salle_states': ('api.get_salle_states', lambda ctx, i: ('GET', f'/api/salle-states/{ctx.day(i)}', None), None, None),
+    'availability': (
+        'api.check_nurse_availability',
+        lambda ctx, i: ('POST', '/api/check-nurse-availability', {'label': ctx.label(i), 'date': ctx.day(i)}),
+        None, None),
+    'availability_week': (
+        'api.get_availability',
+        lambda ctx, i: ('GET', '/api/availability?from={}&to={}'.format(*week_range(ctx, i)), None), None, None),
+    'conflicts': (
+        'api.get_conflicts',
+        lambda ctx, i: ('GET', '/api/conflicts?from={}&to={}'.format(*week_range(ctx, i)), None), None, None),
+    'absences': (
+        'api.get_absences',
+        lambda ctx, i: ('GET', '/api/absences?from={}&to={}'.format(*week_range(ctx, i)), None), None, None),
+    'absence_create': (
+        'api.add_absence',
+        lambda ctx, i: ('POST', '/api/absences', {
+            # Après la fin du planning: sans effet sur les scénarios d'affectation
+            'infirmier_id': i % len(ctx.labels) + 1, 'from': (START + timedelta(days=ctx.days + i)).isoformat(),
+            'reason': 'bench'
+        }), None, None),
+    'absence_delete': (
+        'api.delete_absence',
+        lambda ctx, i: ('DELETE', f'/api/absences/{ctx.take_id()}', None), None, create_absences),
+    'available': (
+        'api.get_available_infirmiers',
+        lambda ctx, i: ('GET', '/api/infirmiers/disponibles?from={}&to={}'.format(*week_range(ctx, i)), None),
+        None, None),
+    'stats_rebuild': ('api.rebuild_statistiques', lambda ctx, i: ('POST', '/api/admin/statistiques/rebuild', {}), 20, None),
+    'events': ('api.stream_events', lambda ctx, i: ('STREAM', '/api/events', None), None, None),
+    'changes': ('api.get_changes', lambda ctx, i: ('GET', '/api/changes?since=0&limit=500', None), None, None),
+    'journal_compact': ('api.compact_changes', lambda ctx, i: ('POST', '/api/admin/journal/compact', {}), 20, None),
+    'export': (
+        'api.export_planning_route',
+        lambda ctx, i: ('GET', f'/api/export/planning?from={ctx.day(0)}&to={ctx.day(30)}&format=csv', None), 50, None),
+    'import': (
+        'api.bulk_import',
+        lambda ctx, i: ('POST', '/api/import', {'planning': [
+            {'date': ctx.day(i + k), 'salle': SALLE_NAMES[3], 'label': ctx.label(i + k)} for k in range(50)
+        ]}), 50, None),
+    'metrics': ('api.get_metrics', lambda ctx, i: ('GET', '/api/metrics', None), None, None),
+}
+
+
+def send(client, method, url, body):
+    """
+    Exécute une requête et retourne le code HTTP. STREAM: lecture du premier morceau
+    d'un flux sans fin (SSE), puis déconnexion.
+    """
+    if method == 'STREAM':
+        response = client.get(url, buffered=False)
+        next(iter(response.response))
+        response.close()
+        return response.status_code
+    response = client.open(url, method=method, json=body)
+    response.get_data()
+    return response.status_code
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(name, ctx, requests, concurrency, warmup=0):
+    _, build, max_requests, prepare = SCENARIOS[name]
+    total = min(requests, max_requests) if max_requests else requests
+    warmup = min(warmup, total)
+    if prepare:
+        prepare(app.test_client(), ctx, total + warmup)
+
+    # Échauffement (non mesuré): index en mémoire, cache de pages, connexions du pool
+    client = app.test_client()
+    for i in range(total, total + warmup):
+        send(client, *build(ctx, i))
+
+    timings = []
+    statements = []
+    repeated = {}   # forme d'instruction -> nombre maximal d'exécutions par requête
+    errors = []
+    next_index = iter(range(total))
+    index_lock = threading.Lock()
+
+    def worker():
+        client = app.test_client()
+        while True:
+            with index_lock:
+                i = next(next_index, None)
+            if i is None:
+                return
+            method, url, body = build(ctx, i)
+            # Sans pile d'appel: le traçage ne doit pas fausser les latences
+            trace = sql_trace.start(call_sites=False)
+            start = time.perf_counter()
+            try:
+                status = send(client, method, url, body)
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                sql_trace.stop(trace)
+            with index_lock:
+                timings.append(elapsed)
+                statements.append(trace.events)
+                for item in trace.repeated():
+                    repeated[item['sql']] = max(repeated.get(item['sql'], 0), item['count'])
+                if status >= 400:
+                    errors.append(status)
+
+    threads = [threading.Thread(target=worker) for _ in range(max(1, concurrency))]
+    wall = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall
+
+    timings.sort()
+    return {
+        'endpoint': SCENARIOS[name][0],
+        'requests': total,
+        'errors': len(errors),
+        'error_codes': sorted(set(errors)),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'max_ms': round(timings[-1], 3),
+        'throughput_rps': round(total / wall, 1) if wall else 0.0,
+        'sql_per_request': round(statistics.mean(statements), 1),
+        'sql_repeated': dict(sorted(repeated.items())),
+    }
+
+
+# ============================
+# Comparaison avec une référence
+# ============================
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """
+    Retourne [(route, message)] des régressions par rapport à baseline
+    """
+    regressions = []
+    for name, current in results['routes'].items():
+        reference = baseline.get('routes', {}).get(name)
+        if reference is None:
+            continue
+        base_p95, p95 = reference['p95_ms'], current['p95_ms']
+        if p95 > base_p95 * (1 + tolerance) and p95 - base_p95 > min_delta_ms:
+            regressions.append((name, f'p95 {base_p95:.2f} -> {p95:.2f} ms ({(p95 / base_p95 - 1) * 100:+.0f}%)'))
+        if current['sql_per_request'] > reference['sql_per_request'] + 0.5:
+            regressions.append((name, f"SQL {reference['sql_per_request']} -> {current['sql_per_request']} instructions/requête"))
+        # Références antérieures sans sql_repeated: pas de comparaison
+        known = reference.get('sql_repeated')
+        if known is not None:
+            for statement, count in current.get('sql_repeated', {}).items():
+                if statement not in known:
+                    regressions.append((name, f'instruction répétée {count} fois: {statement[:120]}'))
+        if current['errors'] > reference['errors']:
+            regressions.append((name, f"erreurs {reference['errors']} -> {current['errors']}"))
+    return regressions
+
+
+def uncovered_routes():
+    """
+    Routes du blueprint sans scénario (à ajouter à SCENARIOS)
+    """
+    covered = {endpoint for endpoint, _, _, _ in SCENARIOS.values()} | DEV_ENDPOINTS
+    return sorted({
+        rule.endpoint for rule in app.url_map.iter_rules()
+        if rule.endpoint.startswith('api.') and rule.endpoint not in covered
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nurses', type=int, default=300)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--requests', type=int, default=200, help='requêtes par route')
+    parser.add_argument('--concurrency', type=int, default=1, help='fils en parallèle')
+    parser.add_argument('--routes', help='scénarios à exécuter, séparés par des virgules')
+    parser.add_argument('--output', help='fichier JSON des résultats')
+    parser.add_argument('--baseline', help='résultats JSON de référence')
+    parser.add_argument('--warmup', type=int, default=10, help='requêtes non mesurées avant chaque route')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='hausse de p95 tolérée (0.5 = 50 %%)')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help='hausse de p95 ignorée en dessous')
+    args = parser.parse_args()
+
+    names = args.routes.split(',') if args.routes else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"scénarios inconnus: {', '.join(unknown)} (disponibles: {', '.join(SCENARIOS)})")
+
+    results = {
+        'meta': {
+            'date': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'nurses': args.nurses,
+            'days': args.days,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+        },
+        'routes': {},
+        'uncovered': uncovered_routes(),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        labels = seed_database(path, args.nurses, args.days)
+        sql_trace.enable()
+        db.configure(path)
+        label_index.invalidate()
+        try:
+            ctx = Context(labels, args.days)
+            for name in names:
+                # Chaque route sur la même base de départ: les écritures restent limitées
+                results['routes'][name] = result = run_scenario(
+                    name, ctx, args.requests, args.concurrency, args.warmup)
+                print(f"{name:24s} p50 {result['p50_ms']:8.2f} | p95 {result['p95_ms']:8.2f} | "
+                      f"p99 {result['p99_ms']:8.2f} ms | {result['throughput_rps']:8.1f} req/s | "
+                      f"SQL {result['sql_per_request']:7.1f} | répétées {len(result['sql_repeated'])} | "
+                      f"erreurs {result['errors']}")
+        finally:
+            sql_trace.disable()
+            db.configure()
+            label_index.invalidate()
+
+    if results['uncovered']:
+        print(f"[WARN] Routes sans scénario: {', '.join(results['uncovered'])}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"[OK] Résultats enregistrés dans {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for key in ('nurses', 'days', 'requests', 'concurrency'):
+            if baseline.get('meta', {}).get(key) != results['meta'][key]:
+                print(f"[WARN] Paramètre différent de la référence: {key} "
+                      f"{baseline.get('meta', {}).get(key)} -> {results['meta'][key]}")
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        for name, message in regressions:
+            print(f"[REGRESSION] {name}: {message}")
+        if regressions:
+            return 1
+        print(f"[OK] Aucune régression par rapport à {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
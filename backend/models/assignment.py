@@ -0,0 +1,35 @@
+class Assignment:
+    """
+    Classe représentant l'affectation d'une case du planning (une date, une salle)
+    """
+    def __init__(self, date=None, room=None, infirmier_id=None, label=None, state=None):
+        self.date = date
+        self.room = room
+        self.infirmier_id = infirmier_id
+        self.label = label  # libellé "Prenom Nom - Status"
+        self.state = state  # None, 'close' ou 'unuse'
+    
+    def to_dict(self):
+        """
+        Convertit l'objet en dictionnaire
+        """
+        return {
+            'date': self.date,
+            'room': self.room,
+            'infirmier_id': self.infirmier_id,
+            'label': self.label,
+            'state': self.state
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Crée une instance à partir d'un dictionnaire
+        """
+        return cls(
+            date=data.get('date'),
+            room=data.get('room'),
+            infirmier_id=data.get('infirmier_id'),
+            label=data.get('label'),
+            state=data.get('state')
+        )
@@ -0,0 +1,32 @@
+"""
+Configuration des tests (depuis backend/: python -m pytest tests).
+
+Les modules de l'API sont importés à plat comme par app.py et les benchmarks
+(backend/api dans sys.path), le moteur de remplissage depuis la racine du dépôt.
+"""
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, 'api'))
+sys.path.append(os.path.dirname(BACKEND_DIR))
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Client de test Flask sur une base temporaire (schéma et migrations appliqués)"""
+    import db
+    from app import create_app, init_db
+    from conflicts import conflict_index
+    from label_index import label_index
+
+    original = db.DATABASE_PATH
+    db.configure(str(tmp_path / 'test.db'))
+    init_db()
+    label_index.invalidate()
+    conflict_index.invalidate()
+    yield create_app({'TESTING': True}).test_client()
+    db.configure(original)
@@ -0,0 +1,62 @@
+import itertools
+
+import numpy as np
+
+from fairness import fair_share_deviation, rotation_entropy, suggest_swaps
+
+
+def squared_deviation(matrix):
+    return (fair_share_deviation(matrix) ** 2).sum()
+
+
+def apply_swap(matrix, a, b, x, y):
+    """A cède une garde en X à B, B cède une garde en Y à A"""
+    swapped = matrix.copy()
+    swapped[a, x] -= 1
+    swapped[b, x] += 1
+    swapped[b, y] -= 1
+    swapped[a, y] += 1
+    return swapped
+
+
+def small_matrix():
+    return np.random.default_rng(0).integers(0, 6, (7, 4)).astype(np.float64)
+
+
+def test_suggest_swaps_are_unique():
+    matrix = small_matrix()
+    swaps = suggest_swaps(matrix, fair_share_deviation(matrix), limit=50)
+    assert swaps
+    exchanges = [frozenset([(a, x), (b, y)]) for _, a, b, x, y in swaps]
+    assert len(exchanges) == len(set(exchanges))
+    room_pairs = [frozenset([x, y]) for _, _, _, x, y in swaps]
+    assert len(room_pairs) == len(set(room_pairs))
+
+
+def test_suggest_swaps_gain_matches_recomputation():
+    matrix = small_matrix()
+    before = squared_deviation(matrix)
+    # Meilleur gain par paire de salles, par recalcul complet de chaque échange possible
+    best = {}
+    for a, b in itertools.permutations(range(matrix.shape[0]), 2):
+        for x, y in itertools.permutations(range(matrix.shape[1]), 2):
+            if matrix[a, x] > 0 and matrix[b, y] > 0:
+                gain = before - squared_deviation(apply_swap(matrix, a, b, x, y))
+                pair = frozenset([x, y])
+                best[pair] = max(best.get(pair, -np.inf), gain)
+
+    swaps = suggest_swaps(matrix, fair_share_deviation(matrix), limit=50)
+    for gain, a, b, x, y in swaps:
+        assert matrix[a, x] > 0 and matrix[b, y] > 0
+        assert np.isclose(gain, before - squared_deviation(apply_swap(matrix, a, b, x, y)))
+        assert np.isclose(gain, best[frozenset([x, y])])
+    assert [gain for gain, *_ in swaps] == sorted((gain for gain, *_ in swaps), reverse=True)
+    # Toutes les paires de salles dont un échange réduit l'écart sont proposées
+    assert len(swaps) == sum(1 for gain in best.values() if gain > 1e-9)
+
+
+def test_rotation_entropy_single_room_is_positive_zero():
+    entropy = rotation_entropy(np.array([[0, 5, 0, 0], [0, 0, 0, 0], [1, 1, 1, 1]], dtype=np.float64))
+    assert entropy[0] == 0.0 and not np.signbit(entropy[0])
+    assert entropy[1] == 0.0 and not np.signbit(entropy[1])
+    assert np.isclose(entropy[2], 1.0)
@@ -0,0 +1,56 @@
+import db
+from label_index import label_index
+
+
+def count_loads(monkeypatch):
+    loads = []
+    original = label_index.load
+
+    def load(conn, version=None):
+        loads.append(version)
+        return original(conn, version)
+    monkeypatch.setattr(label_index, 'load', load)
+    return loads
+
+
+def ensure_loaded():
+    conn = db.get_db_connection()
+    try:
+        label_index.ensure_loaded(conn)
+    finally:
+        conn.close()
+
+
+def test_nurse_routes_keep_index_without_reload(client, monkeypatch):
+    ensure_loaded()
+    loads = count_loads(monkeypatch)
+
+    nurse_id = client.post('/api/infirmiers', json={'prenom': 'Ana', 'nom': 'Martin', 'status': 'J'}).json['id']
+    ensure_loaded()
+    assert label_index.lookup('Ana Martin - J') == nurse_id
+
+    client.put(f'/api/infirmiers/{nurse_id}', json={'status': 'J3'})
+    ensure_loaded()
+    assert label_index.lookup('Ana Martin - J3') == nurse_id
+    assert label_index.lookup('Ana Martin - J') is None
+
+    client.delete(f'/api/infirmiers/{nurse_id}')
+    ensure_loaded()
+    assert label_index.lookup('Ana Martin - J3') is None
+    assert loads == []
+
+
+def test_index_reloads_after_outside_write(client, monkeypatch):
+    ensure_loaded()
+    loads = count_loads(monkeypatch)
+
+    # Écriture d'un autre processus (script), puis une route: l'index ne doit pas
+    # retenir le compteur de la route, qui ne suit plus le sien
+    conn = db.get_db_connection()
+    conn.execute("INSERT INTO listeInfirmier (nom, prenom, status) VALUES ('Script', 'Bob', 'J')")
+    conn.commit()
+    conn.close()
+    client.post('/api/infirmiers', json={'prenom': 'Ana', 'nom': 'Martin', 'status': 'J'})
+    ensure_loaded()
+    assert len(loads) == 1
+    assert label_index.lookup('Bob Script - J') is not None
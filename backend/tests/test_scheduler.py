@@ -0,0 +1,120 @@
+import itertools
+import random
+
+from algorithm import AutoScheduler, SchedulingProblem, auto_fill
+from assignments import SALLE_NAMES
+
+ROOMS = ['salle16', 'salle17', 'salle18', 'reveil1', 'reveil2']
+STATUS_ROOMS = {'J3': ['reveil1', 'reveil2'], 'J1': ['salle16', 'salle17', 'salle18']}
+
+
+def small_problem(seed=0, load_weight=1.0):
+    """Petit problème tiré au hasard: compteurs existants, infirmiers déjà affectés"""
+    rand = random.Random(seed)
+    dates = [f'2024-01-{day:02d}' for day in range(1, 6)]
+    statuses = ['J', 'J', 'J1', 'J3', 'J3', 'J', 'J1', 'J']
+    nurses = list(enumerate(statuses, start=1))
+    counts = {(nurse_id, room): rand.randrange(6) for nurse_id, _ in nurses for room in ROOMS}
+    busy = {date: {rand.choice(nurses)[0]} for date in dates}
+    open_cells = {date: rand.sample(ROOMS, 4) for date in dates}
+    return SchedulingProblem(dates, ROOMS, nurses, counts=counts, open_cells=open_cells,
+                             busy=busy, status_rooms=STATUS_ROOMS, load_weight=load_weight)
+
+
+def constructed(seed=0, load_weight=1.0):
+    scheduler = AutoScheduler(small_problem(seed, load_weight), seed=seed)
+    scheduler.construct()
+    return scheduler
+
+
+def test_add_cost_matches_recomputation():
+    for load_weight in (1.0, 0.5):
+        scheduler = constructed(load_weight=load_weight)
+        for n, r in itertools.product(range(len(scheduler.nurse_ids)), range(len(ROOMS))):
+            before = scheduler.score()
+            cost = scheduler.add_cost(n, r)
+            scheduler.count[n][r] += 1
+            scheduler.total[n] += 1
+            assert scheduler.score() - before == cost
+            scheduler.count[n][r] -= 1
+            scheduler.total[n] -= 1
+
+
+def test_remove_cost_matches_recomputation():
+    for load_weight in (1.0, 0.5):
+        scheduler = constructed(load_weight=load_weight)
+        for cell in list(scheduler.assigned):
+            n = scheduler.assigned[cell]
+            before = scheduler.score()
+            cost = scheduler.remove_cost(n, cell[1])
+            scheduler._unplace(cell)
+            assert scheduler.score() - before == cost
+            scheduler._place(cell, n)
+
+
+def test_swap_cost_matches_recomputation():
+    scheduler = constructed()
+    by_day = {}
+    for cell in scheduler.assigned:
+        by_day.setdefault(cell[0], []).append(cell)
+    checked = 0
+    for cells in by_day.values():
+        for cell, other in itertools.combinations(cells, 2):
+            a, b = scheduler.assigned[cell], scheduler.assigned[other]
+            r1, r2 = cell[1], other[1]
+            before = scheduler.score()
+            cost = scheduler.swap_cost(a, b, r1, r2)
+            scheduler._unplace(cell)
+            scheduler._unplace(other)
+            scheduler._place(cell, b)
+            scheduler._place(other, a)
+            assert scheduler.score() - before == cost
+            scheduler._unplace(cell)
+            scheduler._unplace(other)
+            scheduler._place(cell, a)
+            scheduler._place(other, b)
+            checked += 1
+    assert checked
+
+
+def test_improve_keeps_counts_in_step_with_assignments():
+    problem = small_problem(seed=3)
+    scheduler = AutoScheduler(problem, seed=3)
+    result = scheduler.run(time_budget=0.2)
+    # Score retourné = score recalculé depuis les compteurs initiaux et le plan final
+    expected = AutoScheduler(problem)
+    for date, room, nurse_id in result.assignments:
+        cell = (problem.dates.index(date), ROOMS.index(room))
+        expected._place(cell, expected.nurse_ids.index(nurse_id))
+    assert expected.score() == result.score
+    assert result.score <= result.initial_score
+
+
+def test_auto_fill_respects_status_rooms():
+    for seed in range(5):
+        problem = small_problem(seed)
+        status_of = dict(problem.nurses)
+        result = auto_fill(problem, time_budget=0.1, seed=seed)
+        assert result.assignments
+        for date, room, nurse_id in result.assignments:
+            assert room in STATUS_ROOMS.get(status_of[nurse_id], ROOMS)
+            assert nurse_id not in problem.busy.get(date, ())
+
+
+def test_auto_fill_route_respects_status_rooms(client):
+    statuses = {}
+    for index, status in enumerate(['J', 'J', 'J', 'J3', 'J3', 'J1']):
+        nurse = client.post('/api/infirmiers', json={'prenom': f'P{index}', 'nom': 'Test', 'status': status}).json
+        statuses[nurse['id']] = status
+
+    status_rooms = {'J3': ['reveil1', 'reveil2'], 'J1': ['salle16']}
+    response = client.post('/api/planning/auto-fill', json={
+        'debut': '2024-01-08', 'fin': '2024-01-12', 'seed': 1, 'time_budget_ms': 100,
+        'status_rooms': status_rooms,
+    })
+    assert response.status_code == 200
+    assignments = response.json['assignments']
+    assert assignments
+    for assignment in assignments:
+        allowed = status_rooms.get(statuses[assignment['infirmier_id']], SALLE_NAMES)
+        assert assignment['salle'] in allowed
@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+import time
+
+# L'import vit dans backend/api (partagé avec l'endpoint POST /api/import)
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(HERE), 'backend', 'api'))
+
+from bulk_import import BulkImportError, parse_records, run_import
+from db import DATABASE_PATH, get_db_connection, transaction
+
+# Importe en une seule transaction une liste d'infirmiers et/ou un planning historique
+# (CSV ou JSON, format déduit de l'extension). Les statistiques reçoivent les variations des
+# cases importées (--rebuild-stats: recalcul complet).
+#
+#   python database/import_data.py --infirmiers equipe.csv --planning historique.csv
+
+def read_file(path):
+    fmt = 'json' if path.lower().endswith('.json') else 'csv'
+    with open(path, 'rb') as f:
+        return parse_records(f.read(), fmt, key=None)
+
+def main():
+    parser = argparse.ArgumentParser(description="Import en masse d'infirmiers et de plannings")
+    parser.add_argument('--infirmiers', help="fichier CSV/JSON: nom, prenom, status, present")
+    parser.add_argument('--planning', help="fichier CSV/JSON: date, salle, label, state (ou une colonne par salle)")
+    parser.add_argument('--replace-days', action='store_true',
+                        help="efface les cases existantes des jours importés")
+    parser.add_argument('--skip-invalid', action='store_true',
+                        help="ignore les lignes invalides au lieu d'annuler l'import")
+    parser.add_argument('--rebuild-stats', action='store_true',
+                        help="recalcule toute la table statistique (écrase les corrections manuelles)")
+    args = parser.parse_args()
+
+    if not args.infirmiers and not args.planning:
+        parser.error('--infirmiers ou --planning est requis')
+    if not os.path.exists(DATABASE_PATH):
+        print(f"[INFO] Database file not found: {DATABASE_PATH}")
+        return 1
+
+    try:
+        nurses = read_file(args.infirmiers) if args.infirmiers else None
+        schedule = read_file(args.planning) if args.planning else None
+    except (OSError, BulkImportError) as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+    conn = get_db_connection()
+    try:
+        start = time.perf_counter()
+        with transaction(conn):
+            report = run_import(conn, nurses, schedule,
+                                replace_days=args.replace_days, skip_invalid=args.skip_invalid,
+                                rebuild=args.rebuild_stats)
+    except BulkImportError as e:
+        for error in e.errors:
+            print(f"[INVALID] {error['fichier']} ligne {error['ligne']}: {error['erreur']}")
+        print(f"[FAIL] {e}")
+        return 1
+    finally:
+        conn.close()
+
+    for error in report['errors']:
+        print(f"[SKIP] {error['fichier']} ligne {error['ligne']}: {error['erreur']}")
+    print(f"[DONE] {report['infirmiers']['inserted']} infirmier(s) importé(s) "
+          f"({report['infirmiers']['skipped']} déjà présent(s)), "
+          f"{report['planning']['cells']} case(s) sur {report['planning']['days']} jour(s) "
+          f"en {time.perf_counter() - start:.2f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
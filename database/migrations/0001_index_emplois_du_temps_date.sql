@@ -0,0 +1,7 @@
+-- Une seule ligne d'emploi du temps par date, indexée pour les recherches WHERE date = ?
+-- Les éventuels doublons sont d'abord supprimés en gardant la ligne la plus ancienne
+-- (celle que l'API lisait déjà via fetchone()).
+DELETE FROM emploisDuTemps
+WHERE id NOT IN (SELECT MIN(id) FROM emploisDuTemps GROUP BY date);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_emploisDuTemps_date ON emploisDuTemps (date);
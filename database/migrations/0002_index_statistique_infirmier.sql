@@ -0,0 +1,6 @@
+-- Une seule ligne de statistiques par infirmier, indexée pour WHERE infirmierID = ?
+DELETE FROM statistique
+WHERE infirmierID IS NOT NULL
+  AND id NOT IN (SELECT MIN(id) FROM statistique WHERE infirmierID IS NOT NULL GROUP BY infirmierID);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_statistique_infirmierID ON statistique (infirmierID);
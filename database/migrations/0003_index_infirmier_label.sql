@@ -0,0 +1,2 @@
+-- Recherche d'un infirmier à partir de son libellé "Prenom Nom - Status"
+CREATE INDEX IF NOT EXISTS idx_listeInfirmier_label ON listeInfirmier (prenom, nom, status);
@@ -0,0 +1,9 @@
+-- Compteur de version des données: incrémenté par chaque écriture de l'API,
+-- il sert d'ETag / Last-Modified aux routes de lecture (GET conditionnels).
+CREATE TABLE IF NOT EXISTS data_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
+);
+
+INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 1);
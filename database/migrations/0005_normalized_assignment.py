@@ -0,0 +1,48 @@
+"""
+Stockage normalisé des affectations: une ligne par case (date, salle) non vide.
+
+    planning_jour  une ligne par jour de planning (reprend les id de emploisDuTemps)
+    assignment     libellé, infirmier résolu et état de chaque case occupée ou fermée
+
+L'ancienne table large emploisDuTemps est remplacée par une vue du même nom et des
+mêmes colonnes: les routes existantes gardent leur forme JSON. Des triggers INSTEAD OF
+permettent encore d'y écrire en SQL (scripts), l'API écrivant directement dans assignment.
+Reprise des données, vue et triggers sont générés pour chaque salle de SALLE_NAMES
+(planning_view.py).
+"""
+from assignments import SALLE_NAMES
+from planning_view import copy_legacy_rows_sql, triggers_sql, view_sql
+
+TABLES = """
+CREATE TABLE IF NOT EXISTS planning_jour (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL UNIQUE -- Format YYYY-MM-DD
+);
+
+CREATE TABLE IF NOT EXISTS assignment (
+    date TEXT NOT NULL REFERENCES planning_jour (date) ON DELETE CASCADE,
+    room TEXT NOT NULL CHECK (room IN ({rooms})),
+    infirmier_id INTEGER REFERENCES listeInfirmier (id) ON DELETE SET NULL,
+    label TEXT, -- libellé "Prenom Nom - Status" tel qu'affiché
+    state TEXT CHECK (state IN ('close', 'unuse') OR state IS NULL) DEFAULT NULL,
+    PRIMARY KEY (date, room),
+    CHECK (label IS NOT NULL OR state IS NOT NULL)
+) WITHOUT ROWID;
+
+-- "Où est l'infirmier X ?" et "qui a occupé la salle Y ?" deviennent des recherches indexées
+CREATE INDEX IF NOT EXISTS idx_assignment_infirmier ON assignment (infirmier_id, date);
+CREATE INDEX IF NOT EXISTS idx_assignment_room ON assignment (room, date);
+
+-- Reprise des données existantes
+INSERT OR IGNORE INTO planning_jour (id, date) SELECT id, date FROM emploisDuTemps;
+"""
+
+
+def build_sql():
+    return '\n'.join([
+        TABLES.format(rooms=', '.join(f"'{room}'" for room in SALLE_NAMES)),
+        copy_legacy_rows_sql(),
+        'DROP TABLE emploisDuTemps;\n',
+        view_sql(),
+        triggers_sql(),
+    ])
@@ -0,0 +1,18 @@
+-- Agrégat mensuel des affectations: une ligne par (mois, infirmier, salle).
+-- Tenu à jour à chaque écriture d'affectation (assignments.apply_assignments); les
+-- statistiques sur une période lisent ces lignes pour les mois complets et ne
+-- comptent les affectations brutes que pour les mois partiels aux bornes.
+CREATE TABLE IF NOT EXISTS statistique_mensuelle (
+    mois TEXT NOT NULL, -- Format YYYY-MM
+    infirmier_id INTEGER NOT NULL REFERENCES listeInfirmier (id) ON DELETE CASCADE,
+    room TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (mois, infirmier_id, room)
+) WITHOUT ROWID;
+
+-- Reprise de l'historique existant
+INSERT OR IGNORE INTO statistique_mensuelle (mois, infirmier_id, room, total)
+SELECT substr(date, 1, 7), infirmier_id, room, COUNT(*)
+FROM assignment
+WHERE infirmier_id IS NOT NULL AND label IS NOT NULL
+GROUP BY substr(date, 1, 7), infirmier_id, room;
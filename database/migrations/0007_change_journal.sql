@@ -0,0 +1,107 @@
+-- Journal des modifications (append-only) pour la synchronisation par delta.
+--
+-- Chaque écriture dans assignment (stockage de la vue emploisDuTemps), statistique et
+-- listeInfirmier ajoute une ligne numérotée (seq) par trigger: tous les chemins
+-- d'écriture sont couverts, API comme scripts. GET /api/changes?since=<seq> renvoie
+-- l'état courant des seules entités modifiées depuis <seq>.
+--
+-- journal_state.floor_seq: plus haut numéro supprimé par la troncature. Un client dont
+-- le dernier numéro connu est inférieur doit tout recharger (resync).
+CREATE TABLE IF NOT EXISTS change_journal (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    entity TEXT NOT NULL CHECK (entity IN ('cell', 'stat', 'infirmier')),
+    entity_key TEXT NOT NULL,
+    op TEXT NOT NULL CHECK (op IN ('upsert', 'delete')),
+    data TEXT NOT NULL, -- état JSON de l'entité après l'écriture
+    changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
+);
+
+-- Compaction: retrouver les entrées remplacées par une plus récente
+CREATE INDEX IF NOT EXISTS idx_change_journal_entity ON change_journal (entity, entity_key, seq);
+
+CREATE TABLE IF NOT EXISTS journal_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    floor_seq INTEGER NOT NULL DEFAULT 0,
+    retention INTEGER NOT NULL DEFAULT 100000 -- nombre maximum d'entrées conservées
+);
+
+INSERT OR IGNORE INTO journal_state (id, floor_seq, retention) VALUES (1, 0, 100000);
+
+-- Troncature automatique toutes les 1000 entrées: au-delà de la rétention, les plus
+-- anciennes sont supprimées et floor_seq avance
+CREATE TRIGGER IF NOT EXISTS change_journal_truncate
+AFTER INSERT ON change_journal
+WHEN NEW.seq % 1000 = 0
+BEGIN
+    UPDATE journal_state
+    SET floor_seq = MAX(floor_seq, NEW.seq - retention)
+    WHERE id = 1;
+    DELETE FROM change_journal
+    WHERE seq <= (SELECT floor_seq FROM journal_state WHERE id = 1);
+END;
+
+-- Cases du planning (clé: date|salle)
+CREATE TRIGGER IF NOT EXISTS journal_assignment_insert
+AFTER INSERT ON assignment
+BEGIN
+    INSERT INTO change_journal (entity, entity_key, op, data)
+    VALUES ('cell', NEW.date || '|' || NEW.room, 'upsert', json_object('date', NEW.date, 'salle', NEW.room, 'label', NEW.label, 'state', NEW.state));
+END;
+
+CREATE TRIGGER IF NOT EXISTS journal_assignment_update
+AFTER UPDATE ON assignment
+BEGIN
+    INSERT INTO change_journal (entity, entity_key, op, data)
+    VALUES ('cell', NEW.date || '|' || NEW.room, 'upsert', json_object('date', NEW.date, 'salle', NEW.room, 'label', NEW.label, 'state', NEW.state));
+END;
+
+CREATE TRIGGER IF NOT EXISTS journal_assignment_delete
+AFTER DELETE ON assignment
+BEGIN
+    INSERT INTO change_journal (entity, entity_key, op, data)
+    VALUES ('cell', OLD.date || '|' || OLD.room, 'delete', json_object('date', OLD.date, 'salle', OLD.room, 'label', NULL, 'state', NULL));
+END;
+
+-- Compteurs de statistique (clé: id infirmier)
+CREATE TRIGGER IF NOT EXISTS journal_statistique_insert
+AFTER INSERT ON statistique
+BEGIN
+    INSERT INTO change_journal (entity, entity_key, op, data)
+    VALUES ('stat', CAST(NEW.infirmierID AS TEXT), 'upsert', json_object('id', NEW.infirmierID, 'salle16', COALESCE(NEW.salle16, 0), 'salle17', COALESCE(NEW.salle17, 0), 'salle18', COALESCE(NEW.salle18, 0), 'salle19', COALESCE(NEW.salle19, 0), 'salle20', COALESCE(NEW.salle20, 0), 'salle21', COALESCE(NEW.salle21, 0), 'salle22', COALESCE(NEW.salle22, 0), 'salle23', COALESCE(NEW.salle23, 0), 'salle24', COALESCE(NEW.salle24, 0), 'reveil1', COALESCE(NEW.reveil1, 0), 'reveil2', COALESCE(NEW.reveil2, 0), 'perinduction', COALESCE(NEW.perinduction, 0)));
+END;
+
+CREATE TRIGGER IF NOT EXISTS journal_statistique_update
+AFTER UPDATE ON statistique
+BEGIN
+    INSERT INTO change_journal (entity, entity_key, op, data)
+    VALUES ('stat', CAST(NEW.infirmierID AS TEXT), 'upsert', json_object('id', NEW.infirmierID, 'salle16', COALESCE(NEW.salle16, 0), 'salle17', COALESCE(NEW.salle17, 0), 'salle18', COALESCE(NEW.salle18, 0), 'salle19', COALESCE(NEW.salle19, 0), 'salle20', COALESCE(NEW.salle20, 0), 'salle21', COALESCE(NEW.salle21, 0), 'salle22', COALESCE(NEW.salle22, 0), 'salle23', COALESCE(NEW.salle23, 0), 'salle24', COALESCE(NEW.salle24, 0), 'reveil1', COALESCE(NEW.reveil1, 0), 'reveil2', COALESCE(NEW.reveil2, 0), 'perinduction', COALESCE(NEW.perinduction, 0)));
+END;
+
+CREATE TRIGGER IF NOT EXISTS journal_statistique_delete
+AFTER DELETE ON statistique
+BEGIN
+    INSERT INTO change_journal (entity, entity_key, op, data)
+    VALUES ('stat', CAST(OLD.infirmierID AS TEXT), 'delete', json_object('id', OLD.infirmierID));
+END;
+
+-- Infirmiers (clé: id)
+CREATE TRIGGER IF NOT EXISTS journal_infirmier_insert
+AFTER INSERT ON listeInfirmier
+BEGIN
+    INSERT INTO change_journal (entity, entity_key, op, data)
+    VALUES ('infirmier', CAST(NEW.id AS TEXT), 'upsert', json_object('id', NEW.id, 'nom', NEW.nom, 'prenom', NEW.prenom, 'status', NEW.status, 'present', NEW.present));
+END;
+
+CREATE TRIGGER IF NOT EXISTS journal_infirmier_update
+AFTER UPDATE ON listeInfirmier
+BEGIN
+    INSERT INTO change_journal (entity, entity_key, op, data)
+    VALUES ('infirmier', CAST(NEW.id AS TEXT), 'upsert', json_object('id', NEW.id, 'nom', NEW.nom, 'prenom', NEW.prenom, 'status', NEW.status, 'present', NEW.present));
+END;
+
+CREATE TRIGGER IF NOT EXISTS journal_infirmier_delete
+AFTER DELETE ON listeInfirmier
+BEGIN
+    INSERT INTO change_journal (entity, entity_key, op, data)
+    VALUES ('infirmier', CAST(OLD.id AS TEXT), 'delete', json_object('id', OLD.id));
+END;
@@ -0,0 +1,35 @@
+-- Suspension de la journalisation case par case pendant les écritures en masse.
+--
+-- Un import de plusieurs milliers de jours ajouterait une entrée de journal par case,
+-- aussitôt tronquée par la rétention. Pendant un import, journal_state.suspended vaut 1:
+-- les triggers de assignment ne journalisent plus, puis floor_seq est avancé au-delà
+-- du dernier numéro (journal.journal_suspended) et tous les clients rechargent.
+ALTER TABLE journal_state ADD COLUMN suspended INTEGER NOT NULL DEFAULT 0;
+
+DROP TRIGGER IF EXISTS journal_assignment_insert;
+DROP TRIGGER IF EXISTS journal_assignment_update;
+DROP TRIGGER IF EXISTS journal_assignment_delete;
+
+CREATE TRIGGER journal_assignment_insert
+AFTER INSERT ON assignment
+WHEN (SELECT suspended FROM journal_state WHERE id = 1) = 0
+BEGIN
+    INSERT INTO change_journal (entity, entity_key, op, data)
+    VALUES ('cell', NEW.date || '|' || NEW.room, 'upsert', json_object('date', NEW.date, 'salle', NEW.room, 'label', NEW.label, 'state', NEW.state));
+END;
+
+CREATE TRIGGER journal_assignment_update
+AFTER UPDATE ON assignment
+WHEN (SELECT suspended FROM journal_state WHERE id = 1) = 0
+BEGIN
+    INSERT INTO change_journal (entity, entity_key, op, data)
+    VALUES ('cell', NEW.date || '|' || NEW.room, 'upsert', json_object('date', NEW.date, 'salle', NEW.room, 'label', NEW.label, 'state', NEW.state));
+END;
+
+CREATE TRIGGER journal_assignment_delete
+AFTER DELETE ON assignment
+WHEN (SELECT suspended FROM journal_state WHERE id = 1) = 0
+BEGIN
+    INSERT INTO change_journal (entity, entity_key, op, data)
+    VALUES ('cell', OLD.date || '|' || OLD.room, 'delete', json_object('date', OLD.date, 'salle', OLD.room, 'label', NULL, 'state', NULL));
+END;
@@ -0,0 +1,41 @@
+-- État partagé entre plusieurs processus serveur (python api/serve.py --workers N).
+--
+-- cache_version: compteur incrémenté par trigger à chaque écriture dans listeInfirmier.
+-- L'index libellé -> id de chaque processus (label_index) compare ce compteur à celui de
+-- son chargement et se reconstruit si un autre processus (ou un script) a modifié les
+-- infirmiers.
+CREATE TABLE IF NOT EXISTS cache_version (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+INSERT OR IGNORE INTO cache_version (name, version) VALUES ('listeInfirmier', 0);
+
+CREATE TRIGGER IF NOT EXISTS cache_version_infirmier_insert
+AFTER INSERT ON listeInfirmier
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'listeInfirmier';
+END;
+
+CREATE TRIGGER IF NOT EXISTS cache_version_infirmier_update
+AFTER UPDATE ON listeInfirmier
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'listeInfirmier';
+END;
+
+CREATE TRIGGER IF NOT EXISTS cache_version_infirmier_delete
+AFTER DELETE ON listeInfirmier
+BEGIN
+    UPDATE cache_version SET version = version + 1 WHERE name = 'listeInfirmier';
+END;
+
+-- event_bus: événements temps réel (/api/events) publiés par tous les processus. Chaque
+-- processus relit les nouvelles lignes et les diffuse à ses propres abonnés: un client
+-- reçoit aussi les modifications faites via un autre processus, et son Last-Event-ID
+-- reste valable s'il se reconnecte ailleurs.
+CREATE TABLE IF NOT EXISTS event_bus (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_type TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
+);
@@ -0,0 +1,21 @@
+-- Calendrier des absences (congés, formation, maladie...): une ligne par période
+-- [start_date, end_date], bornes incluses, au format YYYY-MM-DD.
+--
+-- listeInfirmier.present reste l'indicateur manuel (absent jusqu'à nouvel ordre); les
+-- absences datées permettent de prévoir un congé sans basculer present chaque jour.
+CREATE TABLE IF NOT EXISTS absence (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    infirmier_id INTEGER NOT NULL REFERENCES listeInfirmier (id) ON DELETE CASCADE,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    reason TEXT,
+    CHECK (start_date <= end_date)
+);
+
+-- Recherche par intervalle (chevauchement: end_date >= début AND start_date <= fin).
+-- end_date en tête: seules les absences non terminées au début de la période sont lues,
+-- jamais l'historique; start_date est comparée dans l'index (couvrant).
+--   - un infirmier à une date (affectation, déplacement)
+CREATE INDEX IF NOT EXISTS idx_absence_infirmier ON absence (infirmier_id, end_date, start_date);
+--   - tous les infirmiers sur une période (disponibilités, remplissage automatique)
+CREATE INDEX IF NOT EXISTS idx_absence_period ON absence (end_date, start_date, infirmier_id);
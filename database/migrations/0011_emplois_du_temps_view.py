@@ -0,0 +1,11 @@
+"""
+Vue emploisDuTemps et triggers INSTEAD OF régénérés depuis SALLE_NAMES (planning_view.py).
+
+Le trigger de mise à jour refuse désormais un changement de date ou d'id du jour: les
+cases restaient auparavant sur l'ancienne date sans erreur.
+"""
+from planning_view import recreate_view_sql
+
+
+def build_sql():
+    return recreate_view_sql()
@@ -0,0 +1,76 @@
+-- Absences dans le journal des modifications.
+--
+-- Les conflits du planning (conflicts.py) dépendent aussi des absences datées: un
+-- infirmier affecté un jour où il est absent. Chaque écriture dans absence ajoute une
+-- entrée 'absence' au journal; la clé infirmier_id|début|fin porte la période, même
+-- après une suppression ou une compaction, pour ne réévaluer que ces jours-là.
+--
+-- SQLite ne modifie pas une contrainte CHECK: change_journal est recréée avec la même
+-- structure (numéros conservés, compteur AUTOINCREMENT compris) et son trigger de
+-- troncature. Les triggers des autres tables désignent change_journal par son nom:
+-- ils écrivent dans la nouvelle table sans être recréés.
+CREATE TABLE change_journal_new (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    entity TEXT NOT NULL CHECK (entity IN ('cell', 'stat', 'infirmier', 'absence')),
+    entity_key TEXT NOT NULL,
+    op TEXT NOT NULL CHECK (op IN ('upsert', 'delete')),
+    data TEXT NOT NULL, -- état JSON de l'entité après l'écriture
+    changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
+);
+
+INSERT INTO change_journal_new (seq, entity, entity_key, op, data, changed_at)
+SELECT seq, entity, entity_key, op, data, changed_at FROM change_journal ORDER BY seq;
+
+-- Le compteur peut dépasser le dernier numéro conservé (troncature, import en masse)
+DELETE FROM sqlite_sequence WHERE name = 'change_journal_new';
+INSERT INTO sqlite_sequence (name, seq)
+SELECT 'change_journal_new', seq FROM sqlite_sequence WHERE name = 'change_journal';
+
+-- Mode legacy: le renommage ne revalide pas les triggers des autres tables, qui
+-- désignent change_journal, absente entre DROP et RENAME
+PRAGMA legacy_alter_table = ON;
+DROP TABLE change_journal;
+ALTER TABLE change_journal_new RENAME TO change_journal;
+PRAGMA legacy_alter_table = OFF;
+
+CREATE INDEX IF NOT EXISTS idx_change_journal_entity ON change_journal (entity, entity_key, seq);
+
+CREATE TRIGGER IF NOT EXISTS change_journal_truncate
+AFTER INSERT ON change_journal
+WHEN NEW.seq % 1000 = 0
+BEGIN
+    UPDATE journal_state
+    SET floor_seq = MAX(floor_seq, NEW.seq - retention)
+    WHERE id = 1;
+    DELETE FROM change_journal
+    WHERE seq <= (SELECT floor_seq FROM journal_state WHERE id = 1);
+END;
+
+-- Absences (clé: infirmier_id|début|fin); une modification de période journalise
+-- l'ancienne et la nouvelle
+CREATE TRIGGER IF NOT EXISTS journal_absence_insert
+AFTER INSERT ON absence
+BEGIN
+    INSERT INTO change_journal (entity, entity_key, op, data)
+    VALUES ('absence', NEW.infirmier_id || '|' || NEW.start_date || '|' || NEW.end_date, 'upsert',
+            json_object('id', NEW.id, 'infirmier_id', NEW.infirmier_id, 'from', NEW.start_date, 'to', NEW.end_date, 'reason', NEW.reason));
+END;
+
+CREATE TRIGGER IF NOT EXISTS journal_absence_update
+AFTER UPDATE ON absence
+BEGIN
+    INSERT INTO change_journal (entity, entity_key, op, data)
+    VALUES ('absence', OLD.infirmier_id || '|' || OLD.start_date || '|' || OLD.end_date, 'delete',
+            json_object('id', OLD.id, 'infirmier_id', OLD.infirmier_id, 'from', OLD.start_date, 'to', OLD.end_date));
+    INSERT INTO change_journal (entity, entity_key, op, data)
+    VALUES ('absence', NEW.infirmier_id || '|' || NEW.start_date || '|' || NEW.end_date, 'upsert',
+            json_object('id', NEW.id, 'infirmier_id', NEW.infirmier_id, 'from', NEW.start_date, 'to', NEW.end_date, 'reason', NEW.reason));
+END;
+
+CREATE TRIGGER IF NOT EXISTS journal_absence_delete
+AFTER DELETE ON absence
+BEGIN
+    INSERT INTO change_journal (entity, entity_key, op, data)
+    VALUES ('absence', OLD.infirmier_id || '|' || OLD.start_date || '|' || OLD.end_date, 'delete',
+            json_object('id', OLD.id, 'infirmier_id', OLD.infirmier_id, 'from', OLD.start_date, 'to', OLD.end_date));
+END;
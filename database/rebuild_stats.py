@@ -0,0 +1,51 @@
+import argparse
+import os
+import sys
+import time
+
+# Le recalcul vit dans backend/api (partagé avec l'endpoint d'administration)
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(HERE), 'backend', 'api'))
+
+from db import DATABASE_PATH, get_db_connection, transaction
+from stats_rebuild import rebuild_statistics, verify_statistics
+from versioning import bump_data_version
+
+# Recalcule la table `statistique` à partir des affectations en une seule agrégation SQL.
+# Avec --verify, affiche les écarts par infirmier et par salle sans rien écrire.
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcul de la table statistique")
+    parser.add_argument('--verify', action='store_true',
+                        help="affiche les écarts sans modifier la base")
+    args = parser.parse_args()
+
+    if not os.path.exists(DATABASE_PATH):
+        print(f"[INFO] Database file not found: {DATABASE_PATH}")
+        return 1
+
+    conn = get_db_connection()
+    try:
+        start = time.perf_counter()
+        if args.verify:
+            drifts = verify_statistics(conn)
+            for drift in drifts:
+                print(f"[DRIFT] {drift['label']} ({drift['infirmier_id']}) {drift['salle']}: "
+                      f"stocké {drift['stored']}, attendu {drift['expected']} ({drift['drift']:+d})")
+            elapsed = time.perf_counter() - start
+            if drifts:
+                print(f"[FAIL] {len(drifts)} écart(s) trouvé(s) en {elapsed:.2f}s")
+                return 1
+            print(f"[OK] Aucun écart ({elapsed:.2f}s)")
+            return 0
+
+        with transaction(conn):
+            updated = rebuild_statistics(conn)
+            bump_data_version(conn)
+        print(f"[DONE] {updated} ligne(s) statistique recalculée(s) en {time.perf_counter() - start:.2f}s")
+        return 0
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
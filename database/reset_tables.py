@@ -3,7 +3,8 @@ import sqlite3
 
 DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schedule.db')
 
-TABLES_TO_CLEAR = ['emploisDuTemps', 'statistique']
+# emploisDuTemps is a view over planning_jour / assignment (migration 0005)
+TABLES_TO_CLEAR = ['assignment', 'planning_jour', 'statistique', 'statistique_mensuelle']
 
 def main():
     if not os.path.exists(DB_PATH):
@@ -16,7 +17,7 @@ def main():
         # Use foreign_keys off for batch clears
         cur.execute('PRAGMA foreign_keys = OFF;')
 
-        # Clear emploisDuTemps and statistique
+        # Clear the planning (assignment, planning_jour) and statistique (+ monthly rollup)
         for table in TABLES_TO_CLEAR:
             try:
                 cur.execute(f'DELETE FROM {table};')
@@ -34,6 +35,22 @@ def main():
         except sqlite3.Error as e:
             print(f"[WARN] Could not recreate statistique rows: {e}")
 
+        # Drop the change journal: clients behind the new floor must resync
+        try:
+            cur.execute("UPDATE journal_state SET floor_seq = "
+                        "COALESCE((SELECT MAX(seq) FROM change_journal), floor_seq) WHERE id = 1;")
+            cur.execute('DELETE FROM change_journal;')
+            print("[OK] Cleared table change_journal")
+        except sqlite3.Error as e:
+            print(f"[WARN] Could not clear change_journal: {e}")
+
+        # Invalidate cached API responses (ETag derived from data_version)
+        try:
+            cur.execute("UPDATE data_version SET version = version + 1, "
+                        "updated_at = strftime('%Y-%m-%dT%H:%M:%SZ', 'now') WHERE id = 1;")
+        except sqlite3.Error:
+            pass
+
         conn.commit()
         # Optional: reclaim space
         try:
@@ -1,14 +1,32 @@
 import os
+import sys
 
-# Script de migration déprécié
-# Désormais, le schéma complet est défini dans `database/db_schema.sql`.
-# Ce script ne fait plus aucune modification et est conservé uniquement pour référence.
+# Le moteur de migrations vit dans backend/api (partagé avec l'application)
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(HERE), 'backend', 'api'))
+
+from db import DATABASE_PATH, get_db_connection
+from migrations import MIGRATIONS_DIR, apply_migrations, get_current_version
+
+# Applique les migrations de `database/migrations/` à la base existante.
+# Le schéma de départ reste `database/db_schema.sql` ; l'application exécute
+# également ces migrations automatiquement au démarrage.
 
 def main():
-    here = os.path.dirname(os.path.abspath(__file__))
-    print("[INFO] Migration désactivée. Utilisez le fichier unique de schéma:")
-    print(f"       {os.path.join(here, 'db_schema.sql')}")
-    print("[INFO] Pour repartir proprement en dev: supprimez schedule.db puis relancez l'application.")
+    if not os.path.exists(DATABASE_PATH):
+        print(f"[INFO] Database file not found: {DATABASE_PATH}")
+        print("[INFO] Lancez l'application pour créer la base depuis db_schema.sql.")
+        return
+
+    conn = get_db_connection()
+    try:
+        before = get_current_version(conn)
+        applied = apply_migrations(conn)
+        for version in applied:
+            print(f"[OK] Migration {version:04d} appliquée")
+        print(f"[DONE] Version du schéma: {before} -> {get_current_version(conn)} ({MIGRATIONS_DIR})")
+    finally:
+        conn.close()
 
 if __name__ == "__main__":
     main()
@@ -275,6 +275,13 @@ async function assignInfirmierToCell(infirmierData, cell, date, room) {
       ? infirmierData.label.trim()
       : `${infirmierData.prenom} ${infirmierData.nom}${infirmierData.status ? ' - ' + infirmierData.status : ''}`;
     
+    // Absence connue dans la matrice de la semaine: refus sans appel réseau
+    const absence = availabilityCovers(date) ? findAbsence(label, date) : null;
+    if (absence) {
+      alert(absenceMessage(absence));
+      return;
+    }
+    
     // Appeler l'API pour assigner par label - endpoint /assign-infirmier
     const response = await fetch(`${API_BASE_URL}/assign-infirmier`, {
       method: 'POST',
@@ -288,6 +295,11 @@ async function assignInfirmierToCell(infirmierData, cell, date, room) {
       })
     });
     
+    if (response.status === 409) {
+      const refusal = await response.json();
+      alert(refusal.absence ? absenceMessage(refusal.absence) : refusal.error);
+      return;
+    }
     if (!response.ok) {
       throw new Error(`Erreur HTTP: ${response.status}`);
     }
@@ -298,14 +310,8 @@ async function assignInfirmierToCell(infirmierData, cell, date, room) {
     // Mettre à jour l'affichage visuel
     updateVisualAssignment({ label }, cell);
     
-    // Recharger les données de la semaine pour mettre à jour tout l'affichage
-    if (currentWeekStart) {
-      loadWeekData(currentWeekStart);
-    }
-    // Rafraîchir les statistiques en temps réel
-    if (window.StatsChartManager && typeof window.StatsChartManager.refresh === 'function') {
-      await window.StatsChartManager.refresh();
-    }
+    // Appliquer uniquement les modifications (doublons et statistiques inclus)
+    syncChanges();
     
   } catch (error) {
     console.error('Erreur lors de l\'assignation de l\'infirmier:', error);
@@ -358,76 +364,250 @@ function markInfirmierAsAssigned(infirmierId) {
  */
 async function moveInfirmierBetweenCells(infirmierData, targetCell, targetDate, targetRoom, sourceDate, sourceRoom) {
   try {
-    // 1. Vérifier la disponibilité de l'infirmier à la date cible, en excluant la salle source
-    if (sourceDate === targetDate && sourceRoom !== targetRoom) {
-      const availabilityResponse = await fetch(
-        `${API_BASE_URL}/check-nurse-availability?label=${encodeURIComponent(infirmierData.label)}&date=${targetDate}&current_room=${sourceRoom}`
-      );
-
-      if (!availabilityResponse.ok) {
-        throw new Error(`Erreur HTTP: ${availabilityResponse.status}`);
+    targetCell.classList.add('loading');
+
+    // Refus immédiat d'après la matrice des disponibilités (sans aller-retour)
+    const sourceLabel = availability.cells.get(`${sourceDate}|${sourceRoom}`) || infirmierData.label;
+    if (sourceLabel && availabilityCovers(targetDate)) {
+      const check = checkMoveLocally(sourceLabel, targetDate, targetRoom, sourceDate, sourceRoom);
+      if (check.closed) {
+        alert('La salle cible est fermée ou non utilisée.');
+        return;
       }
-
-      const availabilityData = await availabilityResponse.json();
-      
-      // Si l'infirmier n'est pas disponible à cette date (déjà assigné ailleurs)
-      if (!availabilityData.available && availabilityData.assigned_room !== sourceRoom) {
-        alert(`Cet infirmier est déjà assigné à la salle ${availabilityData.assigned_room} ce jour-là.`);
+      if (check.absence) {
+        alert(absenceMessage(check.absence));
+        return;
+      }
+      if (!check.available) {
+        alert(`Cet infirmier est déjà assigné à la salle ${check.assigned_room} ce jour-là.`);
         return;
       }
     }
-    
-    // 2. Supprimer l'infirmier de la salle d'origine
-    await fetch(`${API_BASE_URL}/assign-infirmier`, {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json'
-      },
-      body: JSON.stringify({
-        label: null, // null signifie supprimer
-        date: sourceDate,
-        salle: sourceRoom
-      })
-    });
 
-    // 3. Assigner l'infirmier à la nouvelle salle
-    await fetch(`${API_BASE_URL}/assign-infirmier`, {
+    // Un seul appel: vérification de disponibilité, retrait de la source,
+    // affectation de la cible et statistiques dans une même transaction côté serveur
+    const response = await fetch(`${API_BASE_URL}/move-assignment`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json'
       },
       body: JSON.stringify({
         label: infirmierData.label,
-        date: targetDate,
-        salle: targetRoom
+        source_date: sourceDate,
+        source_salle: sourceRoom,
+        target_date: targetDate,
+        target_salle: targetRoom
       })
     });
 
-    // 4. Mettre à jour l'affichage visuel
-    updateVisualAssignment(infirmierData, targetCell);
+    const result = await response.json();
 
-    // 5. Supprimer l'affichage visuel de la salle d'origine
-    const sourceCell = document.querySelector(`.schedule-cell[data-date="${sourceDate}"][data-room="${sourceRoom}"]`);
-    if (sourceCell) {
-      const existingEvents = sourceCell.querySelectorAll('.event');
-      existingEvents.forEach(event => event.remove());
+    if (response.status === 409 && result.assigned_room) {
+      alert(`Cet infirmier est déjà assigné à la salle ${result.assigned_room} ce jour-là.`);
+      return;
     }
-
-    // 6. Recharger les données de la semaine pour mettre à jour tout l'affichage
-    if (currentWeekStart) {
-      loadWeekData(currentWeekStart);
+    if (response.status === 409 && result.absence) {
+      alert(absenceMessage(result.absence));
+      return;
     }
-    // Rafraîchir les statistiques en temps réel
-    if (window.StatsChartManager && typeof window.StatsChartManager.refresh === 'function') {
-      await window.StatsChartManager.refresh();
+    if (!response.ok) {
+      throw new Error(result.error || `Erreur HTTP: ${response.status}`);
+    }
+
+    // Mettre à jour uniquement les cases et statistiques modifiées
+    applyCellChanges(result.cells || [], result.doublons || {});
+    if (window.StatsChartManager && typeof window.StatsChartManager.applyRows === 'function') {
+      window.StatsChartManager.applyRows(result.stats || []);
     }
 
   } catch (error) {
     console.error('Erreur lors du déplacement de l\'infirmier:', error);
     alert('Erreur lors du déplacement de l\'infirmier. Veuillez réessayer.');
+  } finally {
+    targetCell.classList.remove('loading');
+  }
+}
+
+/**
+ * Applique des cases modifiées renvoyées par l'API sans recharger la semaine
+ * @param {Array<Object>} cells - Cases modifiées [{date, salle, label, state}]
+ * @param {Object} doublons - Salles en doublon par date {date: [salles]}
+ */
+function applyCellChanges(cells, doublons) {
+  updateAvailability(cells);
+  cells.forEach(change => {
+    const cell = document.querySelector(`.schedule-cell[data-date="${change.date}"][data-room="${change.salle}"]`);
+    if (!cell) return;
+    if ('state' in change) {
+      updateRoomStateUI(cell, change.state || null);
+    }
+    cell.querySelectorAll('.event, .doublon-info').forEach(el => el.remove());
+    if (change.label) {
+      addLabelToCell(cell, change.label);
+    }
+  });
+
+  Object.keys(doublons).forEach(date => {
+    const salles = doublons[date] || [];
+    document.querySelectorAll(`.schedule-cell[data-date="${date}"]`).forEach(cell => {
+      const isDoublon = salles.includes(cell.getAttribute('data-room'));
+      cell.classList.toggle('doublon', isDoublon);
+      cell.querySelectorAll('.doublon-info').forEach(el => el.remove());
+      if (isDoublon && cell.querySelector('.event')) {
+        const infoElement = document.createElement('div');
+        infoElement.className = 'doublon-info';
+        infoElement.textContent = '⚠️ Doublon';
+        infoElement.title = 'Ce libellé est affecté à plusieurs salles ce jour-là';
+        infoElement.style.fontSize = '0.7em';
+        infoElement.style.color = '#d32f2f';
+        infoElement.style.marginTop = '2px';
+        cell.appendChild(infoElement);
+      }
+    });
+  });
+}
+
+// Disponibilités de la semaine affichée (/availability), tenues à jour par applyCellChanges:
+// les dépôts sont vérifiés localement, le serveur reste seul juge à l'écriture
+const availability = {
+  from: null,
+  to: null,
+  rooms: [],
+  placements: new Map(), // libellé -> Set des cases "date|salle" où il est placé
+  cells: new Map(),      // "date|salle" -> libellé
+  closed: {},            // date -> {salle: état} des salles fermées ou non utilisées
+  absences: {}           // libellé -> [[début, fin, motif], ...] des absences de la période
+};
+
+/**
+ * Charge en une requête les disponibilités d'une période
+ * @param {string} from - Première date (YYYY-MM-DD)
+ * @param {string} to - Dernière date (YYYY-MM-DD)
+ */
+async function loadAvailability(from, to) {
+  try {
+    const response = await fetch(`${API_BASE_URL}/availability?from=${from}&to=${to}`);
+    if (!response.ok) {
+      throw new Error(`Erreur HTTP: ${response.status}`);
+    }
+    const data = await response.json();
+    availability.placements = new Map();
+    availability.cells = new Map();
+    Object.entries(data.placements || {}).forEach(([label, cells]) => {
+      cells.forEach(([date, room]) => setAvailabilityCell(date, room, label));
+    });
+    availability.rooms = data.rooms || [];
+    availability.closed = data.closed || {};
+    availability.absences = data.absences || {};
+    availability.from = from;
+    availability.to = to;
+  } catch (error) {
+    // Sans matrice, les vérifications repassent par le serveur
+    console.error('Erreur lors du chargement des disponibilités:', error);
+    availability.from = availability.to = null;
+  }
+}
+
+/**
+ * Indique si la matrice chargée couvre une date
+ * @param {string} date - Date (YYYY-MM-DD)
+ * @returns {boolean}
+ */
+function availabilityCovers(date) {
+  return availability.from !== null && date >= availability.from && date <= availability.to;
+}
+
+/**
+ * Place (ou retire, label vide) un libellé dans une case de la matrice
+ */
+function setAvailabilityCell(date, room, label) {
+  const key = `${date}|${room}`;
+  const previous = availability.cells.get(key);
+  if (previous) {
+    const keys = availability.placements.get(previous);
+    if (keys) {
+      keys.delete(key);
+      if (!keys.size) availability.placements.delete(previous);
+    }
+    availability.cells.delete(key);
+  }
+  if (label) {
+    availability.cells.set(key, label);
+    if (!availability.placements.has(label)) availability.placements.set(label, new Set());
+    availability.placements.get(label).add(key);
   }
 }
 
+/**
+ * Reporte dans la matrice des cases modifiées [{date, salle, label, state}]
+ * @param {Array<Object>} cells - Cases modifiées
+ */
+function updateAvailability(cells) {
+  cells.forEach(change => {
+    if (!availabilityCovers(change.date)) return;
+    setAvailabilityCell(change.date, change.salle, change.label || null);
+    if ('state' in change) {
+      const states = availability.closed[change.date] || (availability.closed[change.date] = {});
+      if (change.state) {
+        states[change.salle] = change.state;
+      } else {
+        delete states[change.salle];
+      }
+    }
+  });
+}
+
+/**
+ * Salle où un libellé est déjà placé ce jour-là (ordre des salles du planning)
+ * @param {string} label - Libellé de l'infirmier
+ * @param {string} date - Date (YYYY-MM-DD)
+ * @param {Function} ignore - Cases à ignorer (room => boolean)
+ * @returns {string|null}
+ */
+function findPlacedRoom(label, date, ignore = () => false) {
+  const keys = availability.placements.get(label);
+  if (!keys) return null;
+  return availability.rooms.find(room => !ignore(room) && keys.has(`${date}|${room}`)) || null;
+}
+
+/**
+ * Absence d'un libellé couvrant une date, d'après la matrice chargée
+ * @param {string} label - Libellé de l'infirmier
+ * @param {string} date - Date (YYYY-MM-DD)
+ * @returns {Object|null} - {from, to, reason} ou null
+ */
+function findAbsence(label, date) {
+  const period = (availability.absences[label] || []).find(([from, to]) => from <= date && date <= to);
+  return period ? { from: period[0], to: period[1], reason: period[2] } : null;
+}
+
+/**
+ * Message d'un refus pour absence
+ * @param {Object} absence - {from, to, reason}
+ * @returns {string}
+ */
+function absenceMessage(absence) {
+  const reason = absence.reason ? ` (${absence.reason})` : '';
+  return `Cet infirmier est absent du ${absence.from} au ${absence.to}${reason}.`;
+}
+
+/**
+ * Vérifie localement un déplacement (mêmes règles que /move-assignment)
+ * @returns {Object} - {available, closed, assigned_room, absence}
+ */
+function checkMoveLocally(label, targetDate, targetRoom, sourceDate, sourceRoom) {
+  if ((availability.closed[targetDate] || {})[targetRoom]) {
+    return { available: false, closed: true, assigned_room: null, absence: null };
+  }
+  const absence = findAbsence(label, targetDate);
+  if (absence) {
+    return { available: false, closed: false, assigned_room: null, absence };
+  }
+  const assignedRoom = findPlacedRoom(label, targetDate, room =>
+    room === targetRoom || (targetDate === sourceDate && room === sourceRoom));
+  return { available: assignedRoom === null, closed: false, assigned_room: assignedRoom, absence: null };
+}
+
 /**
  * Vérifie si un infirmier est disponible à une date donnée
  * @param {number} infirmierId - ID de l'infirmier
@@ -446,6 +626,18 @@ async function checkNurseAvailability(infirmierId, date, currentRoom = null) {
       const status = item.dataset.status || '';
       label = `${prenom} ${nom}${status ? ' - ' + status : ''}`.trim();
     }
+    // Matrice de la semaine chargée: réponse locale, même forme que l'API
+    if (label && availabilityCovers(date)) {
+      const assignedRoom = findPlacedRoom(label, date);
+      const absence = findAbsence(label, date);
+      return {
+        available: (assignedRoom === null || assignedRoom === currentRoom) && absence === null,
+        assigned_room: assignedRoom,
+        sallesOccupees: assignedRoom && assignedRoom !== currentRoom ? [assignedRoom] : [],
+        sallesFermees: Object.keys(availability.closed[date] || {}),
+        absence
+      };
+    }
     let url = `${API_BASE_URL}/check-nurse-availability?label=${encodeURIComponent(label || '')}&date=${date}`;
     if (currentRoom) url += `&current_room=${currentRoom}`;
 
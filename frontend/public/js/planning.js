@@ -6,9 +6,11 @@
 // Configuration
 const DAYS_OF_WEEK = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi'];
 const MS_PER_DAY = 86400000; // 24 * 60 * 60 * 1000
+const EVENTS_RETRY_DELAY_MS = 30000; // Nouvel essai du flux /events refusé (503)
 
 // Variables globales
 let currentWeekStart = null;
+let journalSeq = null; // Dernier numéro du journal des modifications appliqué
 
 /**
  * Initialise le module de planning
@@ -18,6 +20,54 @@ function initPlanningModule() {
   addRoomStateControlsToAllCells();
   addRoomStateControlsToHeaders();
   setCurrentWeek(getCurrentWeekStart());
+  subscribeToScheduleEvents();
+}
+
+/**
+ * S'abonne au flux /events: les modifications faites par les autres plannificateurs
+ * sont appliquées case par case, sans recharger la semaine
+ */
+function subscribeToScheduleEvents() {
+  if (typeof EventSource === 'undefined') return;
+  const source = new EventSource(`${API_BASE_URL}/events`);
+
+  source.addEventListener('cells', event => {
+    const data = JSON.parse(event.data);
+    applyCellChanges(data.cells || [], data.doublons || {});
+    if (window.StatsChartManager && typeof window.StatsChartManager.applyCounters === 'function') {
+      window.StatsChartManager.applyCounters(data.stats || []);
+    }
+  });
+
+  source.addEventListener('infirmier', () => {
+    if (typeof loadInfirmiers === 'function') {
+      loadInfirmiers();
+    }
+    if (window.StatsChartManager) {
+      window.StatsChartManager.refresh();
+    }
+  });
+
+  source.addEventListener('stats', () => {
+    if (window.StatsChartManager) {
+      window.StatsChartManager.refresh();
+    }
+  });
+
+  // Trop d'événements manqués: rattrapage par le journal des modifications
+  source.addEventListener('resync', () => {
+    syncChanges();
+  });
+
+  // Refus du serveur (503, trop de flux ouverts): EventSource ne se reconnecte pas
+  // seul, nouvel essai plus tard puis rattrapage de ce qui a été manqué
+  source.addEventListener('error', () => {
+    if (source.readyState !== EventSource.CLOSED) return;
+    setTimeout(() => {
+      subscribeToScheduleEvents();
+      syncChanges();
+    }, EVENTS_RETRY_DELAY_MS);
+  });
 }
 
 /**
@@ -146,14 +196,8 @@ async function handleWeeklyRoomStateChange(room, state) {
     const skipMsg = skippedCount > 0 ? ` (${skippedCount} jours ignorés car un infirmier y est déjà assigné)` : '';
     showMessage(`Salle ${room} ${stateMsg} pour ${successCount} jours de la semaine${skipMsg}`, 'success');
     
-    // Recharger les états des salles pour mettre à jour l'affichage
-    if (currentWeekStart) {
-      await loadRoomStates(currentWeekStart);
-    }
-    // Rafraîchir les statistiques en temps réel (au cas où des affectations ont été supprimées)
-    if (window.StatsChartManager && typeof window.StatsChartManager.refresh === 'function') {
-      await window.StatsChartManager.refresh();
-    }
+    // Appliquer uniquement les modifications (états, affectations retirées, statistiques)
+    await syncChanges();
     
   } catch (error) {
     console.error('Erreur lors du changement d\'\u00e9tat de la salle sur la semaine:', error);
@@ -478,15 +522,9 @@ async function handleRoomStateChange(cell, state) {
     // Mise à jour de l'UI avec le nouvel état
     updateRoomStateUI(cell, state);
     
-    // Si l'état est 'close' ou 'unuse', l'API aura déjà retiré l'infirmier de cette salle
-    // Recharger les états des salles pour mettre à jour l'affichage
-    if (currentWeekStart) {
-      loadRoomStates(currentWeekStart);
-    }
-    // Rafraîchir les statistiques (décrément possible côté backend)
-    if (window.StatsChartManager && typeof window.StatsChartManager.refresh === 'function') {
-      await window.StatsChartManager.refresh();
-    }
+    // Si l'état est 'close' ou 'unuse', l'API aura déjà retiré l'infirmier de cette salle:
+    // appliquer uniquement les modifications (affectations et statistiques)
+    syncChanges();
     
     // Montrer un message de confirmation
     const stateMsg = state ? (state === 'close' ? 'fermée' : 'marquée comme non utilisée') : 'ouverte';
@@ -590,46 +628,64 @@ function addRoomStateControlsToHeaders() {
   });
 }
 
+/**
+ * Retourne les dates (YYYY-MM-DD) du lundi au vendredi de la semaine
+ * @param {Date} weekStartDate - Date du début de semaine
+ * @returns {Array<string>} Les 5 dates de la semaine
+ */
+function getWeekDates(weekStartDate) {
+  const dates = [];
+  for (let i = 0; i < 5; i++) { // Du lundi au vendredi
+    const dayDate = new Date(weekStartDate);
+    dayDate.setDate(weekStartDate.getDate() + i);
+    dates.push(dayDate.toISOString().split('T')[0]); // Format YYYY-MM-DD
+  }
+  return dates;
+}
+
+/**
+ * Récupère en une requête les données d'une semaine (libellés, doublons, états des salles)
+ * @param {Date} weekStartDate - Date du début de semaine
+ * @param {boolean} includeStats - Inclure la matrice des statistiques
+ * @returns {Promise<Object>} Réponse de /planning/week
+ */
+async function fetchWeekBundle(weekStartDate, includeStats = false) {
+  const dates = getWeekDates(weekStartDate);
+  const apiUrl = `${API_BASE_URL}/planning/week?debut=${dates[0]}&fin=${dates[dates.length - 1]}${includeStats ? '&stats=1' : ''}`;
+  const response = await fetch(apiUrl);
+  if (!response.ok) {
+    throw new Error(`Erreur HTTP: ${response.status}`);
+  }
+  return await response.json();
+}
+
+/**
+ * Applique les états des salles de la semaine aux cellules (jours sans données = salles ouvertes)
+ * @param {Date} weekStartDate - Date du début de semaine
+ * @param {Array<Object>} days - Jours renvoyés par /planning/week
+ */
+function applyWeekRoomStates(weekStartDate, days) {
+  const statesByDate = {};
+  (days || []).forEach(day => {
+    statesByDate[day.date] = day.states || {};
+  });
+
+  getWeekDates(weekStartDate).forEach(date => {
+    const states = statesByDate[date] || {};
+    document.querySelectorAll(`.schedule-cell[data-date="${date}"]`).forEach(cell => {
+      updateRoomStateUI(cell, states[cell.getAttribute('data-room')] || null);
+    });
+  });
+}
+
 /**
  * Charge les états des salles pour une période donnée
  * @param {Date} weekStartDate - Date du début de semaine
  */
 async function loadRoomStates(weekStartDate) {
   try {
-    // Préparer les dates pour chaque jour de la semaine
-    const dates = [];
-    for (let i = 0; i < 5; i++) { // Du lundi au vendredi
-      const dayDate = new Date(weekStartDate);
-      dayDate.setDate(weekStartDate.getDate() + i);
-      dates.push(dayDate.toISOString().split('T')[0]); // Format YYYY-MM-DD
-    }
-    
-    // Récupérer les états des salles pour chaque jour
-    for (const date of dates) {
-      const response = await fetch(`${API_BASE_URL}/salle-states/${date}`);
-      
-      if (!response.ok) {
-        console.warn(`Impossible de récupérer les états des salles pour ${date}`);
-        continue;
-      }
-      
-      const data = await response.json();
-      
-      // Appliquer les états aux cellules correspondantes
-      if (data && data.states) {
-        const salles = Object.keys(data.states);
-        
-        salles.forEach(salle => {
-          const state = data.states[salle];
-          const cell = document.querySelector(`.schedule-cell[data-date="${date}"][data-room="${salle}"]`);
-          
-          if (cell) {
-            updateRoomStateUI(cell, state);
-          }
-        });
-      }
-    }
-    
+    const data = await fetchWeekBundle(weekStartDate);
+    applyWeekRoomStates(weekStartDate, data.days);
   } catch (error) {
     console.error('Erreur lors du chargement des états des salles:', error);
   }
@@ -709,69 +765,62 @@ function createNotificationContainer() {
  */
 async function loadWeekData(weekStartDate) {
   try {
-    // Préparer les dates de début et fin de la semaine pour l'API
-    const weekStart = weekStartDate.toISOString().split('T')[0]; // Format YYYY-MM-DD
-    
-    // Calculer la date de fin (vendredi)
-    const weekEndDate = new Date(weekStartDate);
-    weekEndDate.setDate(weekStartDate.getDate() + 4); // Vendredi = lundi + 4
-    const weekEnd = weekEndDate.toISOString().split('T')[0];
-    
-    // Construire l'URL de l'API avec paramètres de dates
-    const apiUrl = `${API_BASE_URL}/emplois-du-temps/semaine?debut=${weekStart}&fin=${weekEnd}`;
+    // Une seule requête: libellés, doublons, états des salles et statistiques
+    const data = await fetchWeekBundle(weekStartDate, true);
+    journalSeq = data.seq != null ? data.seq : null;
+    // Disponibilités de la semaine pour valider les dépôts localement
+    const weekDates = getWeekDates(weekStartDate);
+    if (typeof loadAvailability === 'function') {
+      loadAvailability(weekDates[0], weekDates[weekDates.length - 1]);
+    }
     
     // Effacer les événements existants
     clearEvents();
     
-    // Appel à l'API pour les données d'emploi du temps
-    const response = await fetch(apiUrl);
-    if (!response.ok) {
-      throw new Error(`Erreur HTTP: ${response.status}`);
-    }
-    
-    const data = await response.json();
-    
-    // Charger également les états des salles
-    await loadRoomStates(weekStartDate);
+    // Appliquer les états des salles
+    applyWeekRoomStates(weekStartDate, data.days);
     
     // Ajouter les événements au calendrier (nouveau modèle via labels)
-    if (data && data.length > 0) {
-      data.forEach(item => {
-        const dateStr = item.date;
-        const salles = ['salle16', 'salle17', 'salle18', 'salle19', 'salle20', 'salle21', 
-                        'salle22', 'salle23', 'salle24', 'reveil1', 'reveil2', 'perinduction'];
+    const days = data.days || [];
+    days.forEach(item => {
+      const dateStr = item.date;
+      const salles = data.rooms || [];
 
-        const doublons = item.doublons || [];
-        if (doublons.length > 0) {
-          doublons.forEach(salle => {
-            const doublonCell = document.querySelector(`.schedule-cell[data-date="${dateStr}"][data-room="${salle}"]`);
-            if (doublonCell) {
-              doublonCell.classList.add('doublon');
-            }
-          });
-        }
+      const doublons = item.doublons || [];
+      if (doublons.length > 0) {
+        doublons.forEach(salle => {
+          const doublonCell = document.querySelector(`.schedule-cell[data-date="${dateStr}"][data-room="${salle}"]`);
+          if (doublonCell) {
+            doublonCell.classList.add('doublon');
+          }
+        });
+      }
 
-        const labels = item.labels || {};
-        salles.forEach(salle => {
-          const label = labels[salle];
-          if (label) {
-            const cell = document.querySelector(`.schedule-cell[data-date="${dateStr}"][data-room="${salle}"]`);
-            if (cell) {
-              addLabelToCell(cell, label);
-              if (doublons.includes(salle)) {
-                const infoElement = document.createElement('div');
-                infoElement.className = 'doublon-info';
-                infoElement.textContent = '⚠️ Doublon';
-                infoElement.title = 'Ce libellé est affecté à plusieurs salles ce jour-là';
-                infoElement.style.fontSize = '0.7em';
-                infoElement.style.color = '#d32f2f';
-                infoElement.style.marginTop = '2px';
-                cell.appendChild(infoElement);
-              }
+      const labels = item.labels || {};
+      salles.forEach(salle => {
+        const label = labels[salle];
+        if (label) {
+          const cell = document.querySelector(`.schedule-cell[data-date="${dateStr}"][data-room="${salle}"]`);
+          if (cell) {
+            addLabelToCell(cell, label);
+            if (doublons.includes(salle)) {
+              const infoElement = document.createElement('div');
+              infoElement.className = 'doublon-info';
+              infoElement.textContent = '⚠️ Doublon';
+              infoElement.title = 'Ce libellé est affecté à plusieurs salles ce jour-là';
+              infoElement.style.fontSize = '0.7em';
+              infoElement.style.color = '#d32f2f';
+              infoElement.style.marginTop = '2px';
+              cell.appendChild(infoElement);
             }
           }
-        });
+        }
       });
+    });
+    
+    // Mettre à jour le graphique des statistiques avec la matrice reçue
+    if (data.stats && window.StatsChartManager && typeof window.StatsChartManager.setData === 'function') {
+      window.StatsChartManager.setData(data.stats);
     }
   } catch (error) {
     console.error('Erreur lors du chargement des données de la semaine:', error);
@@ -779,6 +828,44 @@ async function loadWeekData(weekStartDate) {
   }
 }
 
+/**
+ * Applique les modifications enregistrées depuis le dernier chargement (/changes?since=)
+ * au lieu de recharger toute la semaine; recharge la semaine si le journal est trop loin
+ */
+async function syncChanges() {
+  if (journalSeq === null) {
+    if (currentWeekStart) await loadWeekData(currentWeekStart);
+    return;
+  }
+  try {
+    let more = true;
+    while (more) {
+      const response = await fetch(`${API_BASE_URL}/changes?since=${journalSeq}`);
+      if (!response.ok) {
+        throw new Error(`Erreur HTTP: ${response.status}`);
+      }
+      const data = await response.json();
+      if (data.resync_required) {
+        if (currentWeekStart) await loadWeekData(currentWeekStart);
+        return;
+      }
+      applyCellChanges(data.cells || [], data.doublons || {});
+      const rows = (data.stats || []).filter(row => !row.deleted);
+      if (rows.length && window.StatsChartManager && typeof window.StatsChartManager.applyRows === 'function') {
+        window.StatsChartManager.applyRows(rows);
+      }
+      if ((data.infirmiers || []).length && typeof loadInfirmiers === 'function') {
+        loadInfirmiers();
+      }
+      journalSeq = data.last_seq;
+      more = data.more;
+    }
+  } catch (error) {
+    console.error('Erreur lors de la synchronisation des modifications:', error);
+    if (currentWeekStart) loadWeekData(currentWeekStart);
+  }
+}
+
 /**
  * Efface tous les événements affichés dans les cellules du planning
  * et réinitialise les statuts de doublon
@@ -935,15 +1022,8 @@ async function removeInfirmierFromCell(date, room, cell) {
     const existingEvents = cell.querySelectorAll('.event');
     existingEvents.forEach(event => event.remove());
 
-    // Rafraîchir les statistiques en temps réel après suppression
-    if (window.StatsChartManager && typeof window.StatsChartManager.refresh === 'function') {
-      await window.StatsChartManager.refresh();
-    }
-    
-    // Recharger les données de la semaine pour mettre à jour tout l'affichage
-    if (currentWeekStart) {
-      loadWeekData(currentWeekStart);
-    }
+    // Appliquer uniquement les modifications (doublons et statistiques inclus)
+    syncChanges();
     
     console.log('Infirmier retiré avec succès');
     
@@ -998,68 +1078,8 @@ function handleInfirmierDragEnd(e) {
   document.body.style.cursor = 'default';
 }
 
-/**
- * Gère le déplacement d'un infirmier d'une cellule à une autre
- * @param {Object} infirmierData - Données de l'infirmier
- * @param {HTMLElement} targetCell - La cellule de destination
- * @param {string} targetDate - Date de la cellule de destination
- * @param {string} targetRoom - Salle de la cellule de destination
- * @param {string} sourceDate - Date de la cellule d'origine
- * @param {string} sourceRoom - Salle de la cellule d'origine
- */
-async function moveInfirmierBetweenCells(infirmierData, targetCell, targetDate, targetRoom, sourceDate, sourceRoom) {
-  try {
-    // Afficher un indicateur de chargement sur les deux cellules
-    targetCell.classList.add('loading');
-    
-    // Étape 1: Supprimer l'infirmier de la cellule d'origine
-    const resetResponse = await fetch(`${API_BASE_URL}/reset-assignment`, {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json'
-      },
-      body: JSON.stringify({
-        date: sourceDate,
-        salle: sourceRoom
-      })
-    });
-    
-    if (!resetResponse.ok) {
-      throw new Error(`Erreur HTTP lors de la suppression: ${resetResponse.status}`);
-    }
-    
-    // Étape 2: Assigner l'infirmier à la nouvelle cellule
-    const assignResponse = await fetch(`${API_BASE_URL}/assign-infirmier`, {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json'
-      },
-      body: JSON.stringify({
-        label: infirmierData.label,
-        date: targetDate,
-        salle: targetRoom
-      })
-    });
-    
-    if (!assignResponse.ok) {
-      throw new Error(`Erreur HTTP lors de l'assignation: ${assignResponse.status}`);
-    }
-    
-    // Recharger les données de la semaine pour mettre à jour tout l'affichage
-    if (currentWeekStart) {
-      loadWeekData(currentWeekStart);
-    }
-    
-    console.log('Infirmier déplacé avec succès');
-    
-  } catch (error) {
-    console.error('Erreur lors du déplacement de l\'infirmier:', error);
-    alert('Erreur lors du déplacement de l\'infirmier. Veuillez réessayer.');
-  } finally {
-    // Retirer les indicateurs de chargement
-    targetCell.classList.remove('loading');
-  }
-}
+// Le déplacement d'un infirmier entre deux cellules (moveInfirmierBetweenCells)
+// est géré par drag-drop.js via l'endpoint /move-assignment
 
 // La variable API_BASE_URL est définie dans script.js
 
@@ -1,5 +1,5 @@
 // Global stats chart manager to allow live refresh after assignments
-// Exposes window.StatsChartManager.refresh()
+// Exposes window.StatsChartManager.refresh() / applyRows() / applyCounters() / setData()
 
 (function () {
   const state = {
@@ -22,6 +22,7 @@
     return datasetsRaw.map((d, i) => {
       const color = colorForIndex(i);
       return {
+        id: d.id,
         label: d.label,
         data: d.data,
         borderColor: color,
@@ -34,12 +35,12 @@
     });
   }
 
-  async function init() {
+  async function init(initialData) {
     if (state.initialized) return;
     const canvas = document.getElementById('stats-chart');
     if (!canvas) return;
     try {
-      const data = await fetchStats();
+      const data = initialData || await fetchStats();
       const rooms = data.rooms || [];
       const datasets = buildDatasets(data.datasets || []);
       const ctx = canvas.getContext('2d');
@@ -102,9 +103,51 @@
     }
   }
 
-  window.StatsChartManager = { init, refresh };
+  // Met à jour uniquement les lignes de statistiques renvoyées par l'API ({id, label, data})
+  function applyRows(rows) {
+    if (!state.chart) return;
+    rows.forEach(row => {
+      const dataset = state.chart.data.datasets.find(d => d.id === row.id);
+      if (dataset) {
+        dataset.data = row.data;
+      }
+    });
+    state.chart.update();
+  }
+
+  // Applique des compteurs modifiés reçus du flux /events ({id, salle, delta, value})
+  function applyCounters(counters) {
+    if (!state.chart || !counters.length) return;
+    const rooms = state.chart.data.labels || [];
+    counters.forEach(counter => {
+      const dataset = state.chart.data.datasets.find(d => d.id === counter.id);
+      const index = rooms.indexOf(counter.salle);
+      if (!dataset || index < 0) return;
+      // La valeur absolue rend l'application idempotente (écho de nos propres écritures)
+      dataset.data[index] = counter.value != null
+        ? counter.value
+        : Math.max(0, (dataset.data[index] || 0) + counter.delta);
+    });
+    state.chart.update();
+  }
+
+  // Remplace toutes les données du graphique (matrice reçue avec /planning/week)
+  function setData(data) {
+    if (!state.chart) {
+      init(data);
+      return;
+    }
+    state.chart.data.labels = data.rooms || [];
+    state.chart.data.datasets = buildDatasets(data.datasets || []);
+    state.chart.update();
+  }
+
+  window.StatsChartManager = { init, refresh, applyRows, applyCounters, setData };
 
   document.addEventListener('DOMContentLoaded', () => {
-    init();
+    // Sur la page planning, les statistiques arrivent avec les données de la semaine
+    if (typeof loadWeekData !== 'function') {
+      init();
+    }
   });
 })();
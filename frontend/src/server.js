@@ -22,6 +22,52 @@ const axios = require('axios');
 // Configuration de l'URL du backend
 const BACKEND_URL = 'http://localhost:5000';
 
+// En-têtes relayés pour les réponses en flux
+const STREAM_REQUEST_HEADERS = ['accept', 'last-event-id'];
+const STREAM_RESPONSE_HEADERS = ['content-type', 'content-disposition', 'cache-control'];
+
+/**
+ * Relaie une réponse en flux du backend telle quelle, sans mise en tampon
+ * (flux SSE des modifications, exports CSV / NDJSON)
+ */
+function relayStream(req, res) {
+  const headers = {};
+  STREAM_REQUEST_HEADERS.forEach(name => {
+    if (req.headers[name]) {
+      headers[name] = req.headers[name];
+    }
+  });
+
+  const backendReq = http.get(`${BACKEND_URL}${req.originalUrl}`, { headers }, backendRes => {
+    const responseHeaders = {};
+    STREAM_RESPONSE_HEADERS.forEach(name => {
+      if (backendRes.headers[name]) {
+        responseHeaders[name] = backendRes.headers[name];
+      }
+    });
+    res.writeHead(backendRes.statusCode, responseHeaders);
+    backendRes.pipe(res);
+  });
+
+  backendReq.on('error', error => {
+    console.error('Proxy stream error:', error.message);
+    if (!res.headersSent) {
+      res.status(502).end();
+    } else {
+      res.end();
+    }
+  });
+  // Fermer la connexion au backend quand le navigateur se déconnecte
+  res.on('close', () => backendReq.destroy());
+}
+
+app.get('/api/events', relayStream);
+app.get('/api/export/*', relayStream);
+
+// En-têtes relayés pour les GET conditionnels
+const CONDITIONAL_REQUEST_HEADERS = ['if-none-match', 'if-modified-since'];
+const CONDITIONAL_RESPONSE_HEADERS = ['etag', 'last-modified', 'cache-control'];
+
 // API proxy (pour les requêtes vers l'API Python)
 app.use('/api', async (req, res) => {
   const method = req.method;
@@ -46,13 +92,28 @@ app.use('/api', async (req, res) => {
       },
       validateStatus: () => true // Pour gérer nous-même les codes de statut
     };
+
+    // Transmettre les en-têtes de GET conditionnel (ETag / Last-Modified)
+    CONDITIONAL_REQUEST_HEADERS.forEach(name => {
+      if (req.headers[name]) {
+        options.headers[name] = req.headers[name];
+      }
+    });
     
     console.log(`Proxy ${method} request to: ${url}`);
     
     // Faire la requête vers le backend Python
     const response = await axios(options);
     
-    // Retourner la réponse du backend
+    // Retourner la réponse du backend (avec ses en-têtes de cache)
+    CONDITIONAL_RESPONSE_HEADERS.forEach(name => {
+      if (response.headers[name]) {
+        res.set(name, response.headers[name]);
+      }
+    });
+    if (response.status === 304) {
+      return res.status(304).end();
+    }
     res.status(response.status).json(response.data);
   } catch (error) {
     console.error('Proxy error:', error.message);